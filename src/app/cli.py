@@ -0,0 +1,277 @@
+# allows me to run:
+# $ python app/cli.py list
+# $ python app/cli.py run seed_sync --config job.yaml
+# $ python app/cli.py run-jobs jobs.yaml --output results.jsonl
+import sys
+sys.path.extend(['.', '../'])
+import argparse
+import json
+import time
+
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MyMusicLib
+from packages.song_scrounger.song_scrounger import SongScrounger
+from packages.music_management.playlist_creator import PlaylistCreator
+from packages.music_management.playlist_analyzer import PlaylistAnalyzer
+from packages.music_management.playlist_updater import PlaylistUpdater
+from packages.music_api_clients.rate_limiter import RateLimiter
+from packages.music_api_clients.library_snapshot import LibrarySnapshot
+from packages.music_api_clients.search_cache import SearchCache
+from packages.music_api_clients.spotify import Spotify
+from app.music_lib_bot import (
+    DEFAULT_MIN_ALBUMS_PER_PLAYLIST,
+    DEFAULT_MIN_GENRES_PER_PLAYLIST,
+    DEFAULT_MIN_NUM_ARTISTS_PER_PLAYLIST,
+    DEFAULT_NUM_ALBUMS_TO_FETCH,
+    DEFAULT_NUM_TRACKS_PER_ALBUM,
+    DEFAULT_SEED_PREFIX,
+)
+
+MAX_API_CALLS_PER_SECOND = 10
+DEFAULT_MIN_RECOMMENDED_PERCENTAGE = 0.5
+DEFAULT_NUM_GENRE_PLAYLISTS = 1
+
+
+class JobRunner:
+    """Runs the same actions as MusicLibBot, but with all their parameters given up front,
+    e.g. from a cron job's config file, and returns what they did instead of telling a user.
+
+    Runs any number of jobs, one after the other, with the same client, search cache and
+    rate limiter, so later jobs don't pay for starting up or for a cold cache.
+    """
+
+    def __init__(self, music_api_client, my_music_lib, music_util, song_scrounger, info_logger):
+        self.music_api_client = music_api_client
+        self.my_music_lib = my_music_lib
+        self.music_util = music_util
+        self.song_scrounger = song_scrounger
+        self.info_logger = info_logger
+        self.playlist_creator = PlaylistCreator(music_api_client, my_music_lib, music_util, info_logger)
+        self.playlist_analyzer = PlaylistAnalyzer(my_music_lib, music_util, info_logger)
+        self.playlist_updater = PlaylistUpdater(
+            my_music_lib, music_util, music_api_client, info_logger, self.playlist_analyzer)
+        self.actions = {
+            "artist_discography": self.run_artist_discography,
+            "playlist_of_albums": self.run_playlist_of_albums,
+            "seed_sync": self.run_seed_sync,
+            "genre_playlists": self.run_genre_playlists,
+            "saved_albums_with_similar_genres": self.run_saved_albums_with_similar_genres,
+            "recommendations": self.run_recommendations,
+            "song_scrounger": self.run_song_scrounger,
+        }
+
+    def run_jobs(self, jobs, on_result=None):
+        """
+        Params:
+            jobs ([dict]): each with key "action" (str) and optionally "params" (dict).
+            on_result (func|None): given (dict) the result of each job, as soon as it's done.
+
+        Returns:
+            ([dict]): results of run_job, in the order of jobs.
+        """
+        results = []
+        for job_index, job in enumerate(jobs):
+            result = {"job": job_index, **self.run_job(job["action"], job.get("params", dict()))}
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+        return results
+
+    def run_job(self, action, params):
+        """Never raises: a job that fails is reported as such, so the jobs after it still run.
+
+        Returns:
+            (dict): with keys "action", "status" ("ok" or "error"), "seconds",
+                and "result" (dict) if it went ok, else "error" (str).
+        """
+        start = time.perf_counter()
+        try:
+            if action not in self.actions:
+                raise ValueError(f"Unknown action '{action}'; pick one of {', '.join(self.actions)}.")
+            outcome = {"status": "ok", "result": self.actions[action](**params)}
+        except Exception as error:
+            outcome = {"status": "error", "error": f"{type(error).__name__}: {error}"}
+        finally:
+            if self.music_api_client.search_cache is not None:
+                self.music_api_client.search_cache.save()
+        return {"action": action, **outcome, "seconds": time.perf_counter() - start}
+
+    def run_artist_discography(self, artist_name, playlist_name, num_tracks_per_album=DEFAULT_NUM_TRACKS_PER_ALBUM):
+        artist = self._get_artist(artist_name)
+        albums = self.playlist_creator.create_playlist_from_an_artists_discography(
+            lambda: artist,
+            lambda: num_tracks_per_album,
+            lambda: playlist_name,
+        )
+        if albums is None:
+            raise ValueError(f"Couldn't find any albums by '{artist.name}'.")
+        return {"artist": artist.name, "playlist_name": playlist_name, "num_albums": len(albums)}
+
+    def run_playlist_of_albums(self, playlist_name, new_playlist_name, num_tracks_per_album=DEFAULT_NUM_TRACKS_PER_ALBUM):
+        playlist = self._get_playlist(playlist_name)
+        self.playlist_creator.create_playlist_based_on_existing_playlist(
+            lambda: playlist,
+            lambda: new_playlist_name,
+            lambda: num_tracks_per_album,
+        )
+        return {"playlist_name": new_playlist_name}
+
+    def run_seed_sync(self, seed_prefix=DEFAULT_SEED_PREFIX, num_tracks_per_album=DEFAULT_NUM_TRACKS_PER_ALBUM):
+        seed_playlists = self.my_music_lib.search_my_playlists(seed_prefix)
+        updates = self.playlist_updater.create_or_update_all_targets_from_seeds(
+            seed_playlists,
+            num_tracks_per_album,
+            lambda seed_playlist: seed_playlist.name[len(seed_prefix):],
+        )
+        return {
+            "num_seed_playlists": len(seed_playlists),
+            "updated_playlists": [
+                {"playlist_name": playlist.name, "num_tracks_added": num_tracks_added}
+                for playlist, num_tracks_added in updates
+            ],
+        }
+
+    def run_genre_playlists(
+        self,
+        num_playlists=DEFAULT_NUM_GENRE_PLAYLISTS,
+        entire_library=False,
+        num_albums_to_fetch=DEFAULT_NUM_ALBUMS_TO_FETCH,
+        min_genres_per_group=DEFAULT_MIN_GENRES_PER_PLAYLIST,
+        min_albums_per_playlist=DEFAULT_MIN_ALBUMS_PER_PLAYLIST,
+        min_artists_per_playlist=DEFAULT_MIN_NUM_ARTISTS_PER_PLAYLIST,
+        num_tracks_per_album=DEFAULT_NUM_TRACKS_PER_ALBUM,
+    ):
+        "Creates a playlist for each of the num_playlists groups of albums with matching genres that have the most albums."
+        if entire_library:
+            album_groups = self.my_music_lib.get_all_my_album_groups_by_genre(min_genres_per_group)
+        else:
+            album_groups = self.my_music_lib.get_my_albums_grouped_by_genre(num_albums_to_fetch, min_genres_per_group)
+        album_groups = self.my_music_lib.get_suggested_album_groups(
+            album_groups, min_albums_per_playlist, min_artists_per_playlist)[:num_playlists]
+        for album_group in album_groups:
+            if "albums" not in album_group:
+                # groups of the entire library only have album IDs, so only the top ones are fetched
+                album_group["albums"] = self.my_music_lib.get_albums_of_group(album_group)
+            self.playlist_creator.create_playlist_from_albums(album_group, lambda: num_tracks_per_album)
+        return {
+            "created_playlists": [
+                {"playlist_name": album_group["description"], "num_albums": len(album_group["albums"])}
+                for album_group in album_groups
+            ],
+        }
+
+    def run_saved_albums_with_similar_genres(
+        self,
+        playlist_name,
+        num_tracks_per_album=DEFAULT_NUM_TRACKS_PER_ALBUM,
+        num_albums_to_fetch=DEFAULT_NUM_ALBUMS_TO_FETCH,
+    ):
+        playlist = self._get_playlist(playlist_name)
+        num_tracks_added = self.playlist_updater.add_tracks_from_my_saved_albums_with_same_genres(
+            playlist, lambda: num_tracks_per_album, lambda: num_albums_to_fetch)
+        if num_tracks_added == 0:
+            num_tracks_added = self.playlist_updater.add_tracks_from_my_saved_albums_with_similar_genres(
+                playlist, lambda: num_tracks_per_album, lambda: num_albums_to_fetch)
+        return {"playlist_name": playlist_name, "num_tracks_added": num_tracks_added}
+
+    def run_recommendations(self, playlist_name, min_recommended_percentage=DEFAULT_MIN_RECOMMENDED_PERCENTAGE):
+        "Adds the tracks recommended for at least min_recommended_percentage of the playlist's seed batches."
+        playlist = self._get_playlist(playlist_name)
+        recommended_tracks_by_percentage = self.playlist_updater.get_recommended_tracks_with_similar_attributes(playlist)
+        tracks = [
+            track
+            for recommended_percentage, tracks in recommended_tracks_by_percentage.items()
+            if recommended_percentage >= min_recommended_percentage
+            for track in tracks
+        ]
+        if len(tracks) > 0:
+            self.my_music_lib.add_tracks_to_playlist(playlist, tracks)
+        return {"playlist_name": playlist_name, "num_tracks_added": len(tracks)}
+
+    def run_song_scrounger(self, file, playlist_name, progressive=False):
+        "Creates a playlist of the songs mentioned in file, adding them as they're found if progressive."
+        if progressive:
+            songs_by_name = self.song_scrounger.generate_songs_in_text_file(file)
+        else:
+            songs_by_name = self.song_scrounger.find_songs_in_text_file(file, incremental=True).items()
+        num_tracks_added = self.playlist_creator.create_playlist_from_songs(playlist_name, songs_by_name)
+        return {"playlist_name": playlist_name, "num_tracks_added": num_tracks_added}
+
+    def _get_artist(self, artist_name):
+        matching_artists = self.music_api_client.get_matching_artists(artist_name)
+        exact_matching_artists = self.music_util.filter_exact_matches(artist_name, matching_artists)
+        matching_artists = matching_artists if len(exact_matching_artists) == 0 else exact_matching_artists
+        if matching_artists == []:
+            raise ValueError(f"Couldn't find an artist by the name '{artist_name}'.")
+        return self.music_util.get_most_popular_artist(matching_artists)
+
+    def _get_playlist(self, playlist_name):
+        playlist = self.my_music_lib.get_playlist_by_name(playlist_name)
+        if playlist is None:
+            raise ValueError(f"Couldn't find '{playlist_name}' in your playlists.")
+        return playlist
+
+
+def load_config(path):
+    "Returns (dict|list): the contents of a YAML file (or a JSON one, as JSON is YAML too)."
+    # imported here, as it's slow to import and only needed for configs
+    try:
+        import yaml
+    except ImportError as error:
+        raise ImportError("Reading configs needs PyYAML; install it with: pip install -r requirements.txt") from error
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Runs music library actions without prompting, e.g. from cron. Prints one JSON result per job.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="list the actions that can be run")
+    run_parser = subparsers.add_parser("run", help="run one action")
+    run_parser.add_argument("action")
+    run_parser.add_argument("--config", metavar="PATH", help="YAML mapping of the action's parameters")
+    run_jobs_parser = subparsers.add_parser("run-jobs", help="run many jobs in one process")
+    run_jobs_parser.add_argument("config", metavar="PATH", help="YAML with a list of jobs: each an action and its params")
+    for subparser in [run_parser, run_jobs_parser]:
+        subparser.add_argument("--output", metavar="PATH", help="append results as JSON lines; defaults to stdout")
+        subparser.add_argument("--max-calls-per-second", type=float, default=MAX_API_CALLS_PER_SECOND)
+    return parser.parse_args()
+
+
+def get_jobs(args):
+    if args.command == "run":
+        params = load_config(args.config) if args.config is not None else None
+        return [{"action": args.action, "params": params or dict()}]
+    config = load_config(args.config)
+    return config["jobs"] if isinstance(config, dict) else config
+
+
+def main():
+    args = get_args()
+    # results go to stdout, so everything said along the way goes to stderr
+    info_logger = lambda message: print(message, file=sys.stderr)
+    if args.command == "list":
+        print("\n".join(JobRunner(None, None, None, None, info_logger).actions))
+        return
+
+    spotify = Spotify(search_cache=SearchCache.load(), rate_limiter=RateLimiter(args.max_calls_per_second))
+    music_util = MusicUtil(spotify, info_logger)
+    my_music_lib = MyMusicLib(spotify, music_util, info_logger, LibrarySnapshot())
+    song_scrounger = SongScrounger(spotify, stop_searching_once_artist_mentioned=True)
+    job_runner = JobRunner(spotify, my_music_lib, music_util, song_scrounger, info_logger)
+
+    output = open(args.output, "a") if args.output is not None else sys.stdout
+    try:
+        results = job_runner.run_jobs(
+            get_jobs(args),
+            lambda result: print(json.dumps(result), file=output, flush=True),
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    sys.exit(0 if all(result["status"] == "ok" for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+# allows me to run:
+# $ python app/daemon.py --port 8765
+# $ curl -X POST localhost:8765/jobs -d '{"action": "seed_sync", "params": {"seed_prefix": "seed: "}, "priority": 0}'
+# $ curl localhost:8765/jobs/1
+import sys
+sys.path.extend(['.', '../'])
+import argparse
+import heapq
+import itertools
+import json
+import math
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Thread
+
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MyMusicLib
+from packages.song_scrounger.song_scrounger import SongScrounger
+from packages.music_api_clients.rate_limiter import RateLimiter
+from packages.music_api_clients.library_snapshot import LibrarySnapshot
+from packages.music_api_clients.search_cache import SearchCache
+from packages.music_api_clients.spotify import Spotify
+from packages.music_api_clients.warm_spotify import DEFAULT_TTL_SECONDS, WarmSpotify
+from app.cli import MAX_API_CALLS_PER_SECOND, JobRunner
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_CONCURRENT_JOBS = 2
+# e.g. so two seed syncs don't both add the same tracks to a target playlist
+DEFAULT_MAX_CONCURRENT_JOBS_PER_ACTION = 1
+# whatever the limit per action; SongScrounger keeps the text it's scrounging on itself
+MAX_CONCURRENT_JOBS_BY_ACTION = {"song_scrounger": 1}
+# the param naming the playlist each action writes to, or None if it can't be told up front,
+# e.g. the targets of a seed sync; actions left out write to none
+PLAYLIST_PARAM_BY_ACTION = {
+    "artist_discography": "playlist_name",
+    "playlist_of_albums": "new_playlist_name",
+    "seed_sync": None,
+    "genre_playlists": None,
+    "saved_albums_with_similar_genres": "playlist_name",
+    "recommendations": "playlist_name",
+    "song_scrounger": "playlist_name",
+}
+# lower runs first
+DEFAULT_PRIORITY = 10
+MAX_FINISHED_JOBS_KEPT = 1000
+
+
+class JobQueue:
+    """Runs submitted jobs through a JobRunner, most urgent first, at most
+    max_concurrent_jobs at a time and max_concurrent_jobs_per_action of any one action,
+    or fewer for actions in max_concurrent_jobs_by_action.
+    Jobs of the same priority run in the order they were submitted.
+
+    Jobs that write to the same playlist run one at a time, whatever their actions, e.g.
+    a seed sync and recommendations for one of its targets. Jobs whose playlist can't be
+    told from their params, see playlist_param_by_action, run alone among those that write.
+    """
+
+    def __init__(
+        self,
+        job_runner,
+        max_concurrent_jobs=DEFAULT_MAX_CONCURRENT_JOBS,
+        max_concurrent_jobs_per_action=DEFAULT_MAX_CONCURRENT_JOBS_PER_ACTION,
+        max_concurrent_jobs_by_action=MAX_CONCURRENT_JOBS_BY_ACTION,
+        playlist_param_by_action=PLAYLIST_PARAM_BY_ACTION,
+    ):
+        self.job_runner = job_runner
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_concurrent_jobs_per_action = max_concurrent_jobs_per_action
+        self.max_concurrent_jobs_by_action = max_concurrent_jobs_by_action
+        self.playlist_param_by_action = playlist_param_by_action
+        self.jobs = dict()
+        self._queue = []
+        self._job_ids = itertools.count(1)
+        self._num_running_by_action = dict()
+        # of each running job that writes to a playlist: (str) its name, or None if it may be any
+        self._playlists_being_written = []
+        self._condition = Condition()
+        self._is_stopping = False
+        self._workers = []
+
+    def start(self):
+        "Returns (JobQueue): itself, with its workers waiting for jobs."
+        self._is_stopping = False
+        self._workers = [Thread(target=self._work, daemon=True) for _ in range(self.max_concurrent_jobs)]
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def stop(self):
+        "Waits for running jobs to finish; queued ones stay queued."
+        with self._condition:
+            self._is_stopping = True
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def submit(self, action, params=None, priority=DEFAULT_PRIORITY):
+        """
+        Params:
+            action (str).
+            params (dict|None): keyword arguments of the action.
+            priority (int|float): lower runs first.
+
+        Returns:
+            (dict): the job, see get_job.
+
+        Raises:
+            ValueError: if params or priority are of the wrong type, before anything is queued.
+        """
+        if params is not None and not isinstance(params, dict):
+            raise ValueError("Expected params to be an object.")
+        # bools are ints, but not priorities; NaN doesn't order
+        if isinstance(priority, bool) or not isinstance(priority, (int, float)) or not math.isfinite(priority):
+            raise ValueError("Expected priority to be a number.")
+        with self._condition:
+            job_id = next(self._job_ids)
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "action": action,
+                "params": params or dict(),
+                "priority": priority,
+                "status": "queued",
+                "submitted_at": time.time(),
+            }
+            heapq.heappush(self._queue, (priority, job_id))
+            self._forget_old_jobs()
+            self._condition.notify_all()
+            return dict(self.jobs[job_id])
+
+    def get_job(self, job_id):
+        """
+        Returns:
+            (dict|None): with keys "job_id", "action", "params", "priority", "submitted_at",
+                and "status": "queued", "running", then as in JobRunner.run_job.
+        """
+        with self._condition:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def get_jobs(self):
+        with self._condition:
+            return [dict(job) for job in self.jobs.values()]
+
+    def wait_until_idle(self, timeout_seconds=None):
+        "Returns (bool): whether every job submitted so far is done."
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: len(self._queue) == 0 and sum(self._num_running_by_action.values()) == 0,
+                timeout_seconds,
+            )
+
+    def _work(self):
+        while True:
+            with self._condition:
+                job = self._condition.wait_for(lambda: self._is_stopping or self._pop_runnable_job())
+                if self._is_stopping:
+                    return
+                job["status"] = "running"
+                self._num_running_by_action[job["action"]] = self._num_running_by_action.get(job["action"], 0) + 1
+                if self._writes_to_playlist(job):
+                    self._playlists_being_written.append(self._get_playlist_written(job))
+
+            result = self.job_runner.run_job(job["action"], job["params"])
+
+            with self._condition:
+                job.update(result)
+                job["finished_at"] = time.time()
+                self._num_running_by_action[job["action"]] -= 1
+                if self._writes_to_playlist(job):
+                    self._playlists_being_written.remove(self._get_playlist_written(job))
+                self._condition.notify_all()
+
+    def _pop_runnable_job(self):
+        """Returns (dict|None): the most urgent queued job whose action isn't at its limit,
+        and whose playlist isn't being written to by a running job."""
+        skipped, job = [], None
+        while len(self._queue) > 0:
+            entry = heapq.heappop(self._queue)
+            queued_job = self.jobs[entry[1]]
+            action = queued_job["action"]
+            if (
+                self._num_running_by_action.get(action, 0) < self._get_max_concurrent_jobs(action) and
+                not self._is_playlist_being_written(queued_job)
+            ):
+                job = queued_job
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+        return job
+
+    def _get_max_concurrent_jobs(self, action):
+        return min(
+            self.max_concurrent_jobs_per_action,
+            self.max_concurrent_jobs_by_action.get(action, self.max_concurrent_jobs_per_action),
+        )
+
+    def _writes_to_playlist(self, job):
+        return job["action"] in self.playlist_param_by_action
+
+    def _get_playlist_written(self, job):
+        "Returns (str|None): None if it may be any playlist."
+        playlist_param = self.playlist_param_by_action[job["action"]]
+        return job["params"].get(playlist_param) if playlist_param is not None else None
+
+    def _is_playlist_being_written(self, job):
+        if not self._writes_to_playlist(job) or len(self._playlists_being_written) == 0:
+            return False
+        playlist = self._get_playlist_written(job)
+        return playlist is None or None in self._playlists_being_written or playlist in self._playlists_being_written
+
+    def _forget_old_jobs(self):
+        finished_job_ids = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job["status"] not in ("queued", "running")
+        ]
+        for job_id in finished_job_ids[:max(0, len(finished_job_ids) - MAX_FINISHED_JOBS_KEPT)]:
+            del self.jobs[job_id]
+
+
+class DaemonServer:
+    """Local HTTP API to a JobQueue:
+        POST /jobs          {"action": ..., "params": {...}, "priority": 0} -> the job, with its "job_id"
+        GET  /jobs          -> every job
+        GET  /jobs/<job_id> -> the job, with its "result" once it's done
+        GET  /actions       -> the actions that can be run
+    """
+
+    def __init__(self, job_queue, port=DEFAULT_PORT):
+        """
+        Params:
+            job_queue (JobQueue).
+            port (int): on the loopback interface; 0 to pick a free one.
+        """
+        self.job_queue = job_queue
+        self.port = port
+        self._http_server = None
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._http_server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        "Returns (DaemonServer): itself, serving in the background."
+        daemon_server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                daemon_server._handle(self, "GET")
+
+            def do_POST(self):
+                daemon_server._handle(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http_server = ThreadingHTTPServer(("127.0.0.1", self.port), RequestHandler)
+        self._http_server.daemon_threads = True
+        self._thread = Thread(target=self._http_server.serve_forever, kwargs={"poll_interval": 0.1}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._http_server is None:
+            return
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        self._thread.join()
+        self._http_server = None
+
+    def _handle(self, request_handler, method):
+        path = request_handler.path.strip("/").split("/")
+        if method == "POST" and path == ["jobs"]:
+            length = int(request_handler.headers.get("Content-Length", 0))
+            try:
+                job = json.loads(request_handler.rfile.read(length) or b"{}")
+                if not isinstance(job, dict):
+                    raise ValueError("Expected a JSON object.")
+                if job.get("action") not in self.job_queue.job_runner.actions:
+                    raise ValueError(f"Unknown action '{job.get('action')}'.")
+                job = self.job_queue.submit(job["action"], job.get("params"), job.get("priority", DEFAULT_PRIORITY))
+            except ValueError as error:
+                return self._respond(request_handler, 400, {"error": str(error)})
+            return self._respond(request_handler, 202, job)
+        if method == "GET" and path == ["jobs"]:
+            return self._respond(request_handler, 200, self.job_queue.get_jobs())
+        if method == "GET" and path == ["actions"]:
+            return self._respond(request_handler, 200, list(self.job_queue.job_runner.actions))
+        if method == "GET" and len(path) == 2 and path[0] == "jobs" and path[1].isdigit():
+            job = self.job_queue.get_job(int(path[1]))
+            if job is not None:
+                return self._respond(request_handler, 200, job)
+        self._respond(request_handler, 404, {"error": f"Nothing at {method} {request_handler.path}"})
+
+    def _respond(self, request_handler, status, body):
+        content = json.dumps(body).encode("utf-8")
+        request_handler.send_response(status)
+        request_handler.send_header("Content-Type", "application/json")
+        request_handler.send_header("Content-Length", str(len(content)))
+        request_handler.end_headers()
+        request_handler.wfile.write(content)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Keeps a warm Spotify client and runs jobs submitted over a local HTTP API.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-concurrent-jobs", type=int, default=DEFAULT_MAX_CONCURRENT_JOBS)
+    parser.add_argument(
+        "--max-concurrent-jobs-per-action", type=int, default=DEFAULT_MAX_CONCURRENT_JOBS_PER_ACTION,
+        help=f"except {', '.join(f'{action} ({limit})' for action, limit in MAX_CONCURRENT_JOBS_BY_ACTION.items())}")
+    parser.add_argument("--max-calls-per-second", type=float, default=MAX_API_CALLS_PER_SECOND)
+    parser.add_argument("--ttl-seconds", type=float, default=DEFAULT_TTL_SECONDS, help="how long to keep playlists and genres")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    info_logger = print
+    spotify = WarmSpotify(
+        Spotify(search_cache=SearchCache.load(), rate_limiter=RateLimiter(args.max_calls_per_second)),
+        args.ttl_seconds,
+    )
+    music_util = MusicUtil(spotify, info_logger)
+    my_music_lib = MyMusicLib(spotify, music_util, info_logger, LibrarySnapshot())
+    song_scrounger = SongScrounger(spotify, stop_searching_once_artist_mentioned=True)
+    job_queue = JobQueue(
+        JobRunner(spotify, my_music_lib, music_util, song_scrounger, info_logger),
+        args.max_concurrent_jobs,
+        args.max_concurrent_jobs_per_action,
+    ).start()
+    with DaemonServer(job_queue, args.port) as daemon_server:
+        print(f"Listening on {daemon_server.url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Stopping once running jobs are done...")
+    job_queue.stop()
+
+
+if __name__ == "__main__":
+    main()
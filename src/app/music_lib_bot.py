@@ -2,6 +2,7 @@
 # $ python app/music_lib_bot.py
 import sys
 sys.path.extend(['.', '../'])
+import argparse
 import os
 
 from packages.music_management.music_util import MusicUtil
@@ -11,6 +12,8 @@ from packages.music_management.playlist_creator import PlaylistCreator
 from packages.music_management.playlist_analyzer import PlaylistAnalyzer
 from packages.music_management.playlist_updater import PlaylistUpdater
 from app.lib.interactive_option_picker import InteractiveOptionPicker
+from packages.music_api_clients.library_snapshot import LibrarySnapshot
+from packages.music_api_clients.search_cache import SearchCache
 from packages.music_api_clients.spotify import Spotify
 from app.lib.console_ui import ConsoleUI
 
@@ -26,6 +29,51 @@ DEFAULT_NUM_TRACKS_TO_ADD = 0
 MIN_NUM_TRACKS_TO_ADD = 1
 MAX_NUM_TRACKS_TO_ADD = 100
 DEFAULT_SEED_PREFIX = "seed: "
+# methods traced when given an Instrumentation: the ones actions call that make API calls,
+# not helpers called per word or per track, which would each record a span
+TRACED_MY_MUSIC_LIB_METHODS = [
+    "get_playlist_by_name",
+    "search_my_playlists",
+    "create_playlist",
+    "get_my_albums_grouped_by_genre",
+    "get_all_my_album_groups_by_genre",
+    "get_albums_of_group",
+    "find_my_albums_with_genres",
+    "add_tracks_to_playlist",
+    "add_tracks_in_random_positions",
+    "remove_tracks_from_playlist",
+]
+TRACED_MUSIC_UTIL_METHODS = [
+    "get_discography",
+    "get_most_popular_tracks_from_each",
+    "get_albums_by_ids",
+    "populate_track_audio_features",
+    "get_recommendations_based_on_tracks",
+    "get_strict_song_attribute_ranges",
+    "get_lenient_song_attribute_ranges",
+    "get_common_genres_in_playlist",
+]
+TRACED_SONG_SCROUNGER_METHODS = [
+    "find_songs_in_text_file",
+    "generate_songs_in_text_file",
+    "look_up_names",
+]
+TRACED_PLAYLIST_CREATOR_METHODS = [
+    "create_playlist_from_albums",
+    "create_playlist_from_songs",
+    "create_playlist_based_on_existing_playlist",
+    "create_playlist_from_an_artists_discography",
+]
+TRACED_PLAYLIST_ANALYZER_METHODS = [
+    "sketch_playlist",
+]
+TRACED_PLAYLIST_UPDATER_METHODS = [
+    "create_or_update_all_targets_from_seeds",
+    "create_or_update_target_from_seed",
+    "add_tracks_from_my_saved_albums_with_same_genres",
+    "add_tracks_from_my_saved_albums_with_similar_genres",
+    "get_recommended_tracks_with_similar_attributes",
+]
 
 
 class MusicLibBot:
@@ -38,28 +86,33 @@ class MusicLibBot:
     modules. Hence, there should be little-to-no command logic here. All command-specific
     logic should exist in other modules which are imported here e.g. PlaylistUpdater.
 
+    Given an Instrumentation, each action picked in `run` is traced, its API calls
+    attributed to the MusicUtil, MyMusicLib, PlaylistUpdater etc. methods that made them,
+    and the instrumentation's exporters are handed its cost once it's done.
+
     For example, notice that `run_create_or_update_target_from_seed` literally runs
     `create_or_update_target_from_seed`. All other logic in that function is for
     collecting configuration parameters from the user and informing the user.
     """
 
-    def __init__(self, music_api_client, my_music_lib, music_util, song_scrounger, ui):
+    def __init__(self, music_api_client, my_music_lib, music_util, song_scrounger, ui, instrumentation=None):
+        self.instrumentation = instrumentation
         self.music_api_client = music_api_client
-        self.my_music_lib = my_music_lib
-        self.music_util = music_util
-        self.song_scrounger = song_scrounger
+        self.my_music_lib = self._trace(my_music_lib, TRACED_MY_MUSIC_LIB_METHODS)
+        self.music_util = self._trace(music_util, TRACED_MUSIC_UTIL_METHODS)
+        self.song_scrounger = self._trace(song_scrounger, TRACED_SONG_SCROUNGER_METHODS)
         self.ui = ui
-        self.playlist_creator = PlaylistCreator(
+        self.playlist_creator = self._trace(PlaylistCreator(
             self.music_api_client,
             self.my_music_lib,
             self.music_util,
             self.ui.tell_user,
-        )
-        self.playlist_analyzer = PlaylistAnalyzer(
+        ), TRACED_PLAYLIST_CREATOR_METHODS)
+        self.playlist_analyzer = self._trace(PlaylistAnalyzer(
             self.my_music_lib,
             self.music_util,
             self.ui.tell_user,
-        )
+        ), TRACED_PLAYLIST_ANALYZER_METHODS)
 
     def run_create_or_update_target_from_seed(self):
         self.ui.tell_user("Let's update target playlists from seed playlists.")
@@ -87,13 +140,7 @@ class MusicLibBot:
             f"How many tracks per album do you want in the target playlist? default is {DEFAULT_NUM_TRACKS_PER_ALBUM}",
             DEFAULT_NUM_TRACKS_PER_ALBUM
         )
-        updates = PlaylistUpdater(
-            self.my_music_lib,
-            self.music_util,
-            self.music_api_client,
-            self.ui.tell_user,
-            self.playlist_analyzer,
-        ).create_or_update_all_targets_from_seeds(
+        updates = self._get_playlist_updater().create_or_update_all_targets_from_seeds(
             seed_playlists,
             num_tracks_per_album,
             lambda seed_playlist: seed_playlist.name[len(seed_prefix):],
@@ -113,13 +160,7 @@ class MusicLibBot:
         self.ui.tell_user("Let's update an existing playlist with tracks from my saved albums with similar genres.")
         playlist = self._get_playlist_from_user(
             self.my_music_lib.get_playlist_by_name)
-        playlist_updater = PlaylistUpdater(
-            self.my_music_lib,
-            self.music_util,
-            self.music_api_client,
-            self.ui.tell_user,
-            self.playlist_analyzer,
-        )
+        playlist_updater = self._get_playlist_updater()
         num_tracks_added = playlist_updater.add_tracks_from_my_saved_albums_with_same_genres(
             playlist,
             self._get_num_tracks_per_album,
@@ -138,11 +179,7 @@ class MusicLibBot:
         self.ui.tell_user("Let's update an existing playlist with recommended tracks with similar attributes.")
         playlist = self._get_playlist_from_user(
             self.my_music_lib.get_playlist_by_name)
-        self.music_util.populate_track_audio_features(playlist)
-        song_attribute_ranges = self.music_util.get_lenient_song_attribute_ranges(
-            playlist)
-        recommended_tracks_by_percentage = self.music_util.get_recommendations_based_on_tracks(
-            playlist.get_tracks(), song_attribute_ranges)
+        recommended_tracks_by_percentage = self._get_playlist_updater().get_recommended_tracks_with_similar_attributes(playlist)
         if len(recommended_tracks_by_percentage) == 0:
             self.ui.tell_user("Sorry, couldn't find recommendations to add :(")
             return
@@ -183,6 +220,9 @@ class MusicLibBot:
             self.ui.tell_user("Couldn't find any suggested playlists!")
             return
         def playlist_pick_handler(playlist):
+            if "albums" not in playlist:
+                # groups of the entire library only have album IDs, so only picked ones are fetched
+                playlist = dict(playlist, albums=self.my_music_lib.get_albums_of_group(playlist))
             return self.playlist_creator.create_playlist_from_albums(
                 playlist, self._get_num_tracks_per_album)
         InteractiveOptionPicker(
@@ -241,7 +281,15 @@ class MusicLibBot:
                 Ok! Let's do it!
             """)
         file = self._get_file_from_user()
-        songs = self.song_scrounger.find_songs_in_text_file(file)
+        fill_progressively = self.ui.get_yes_or_no(
+            "Should I add songs to a new playlist as I find them, instead of showing you what I found first? y or n - default is n", False)
+        if fill_progressively:
+            self._scrounge_songs_into_new_playlist(file)
+            return
+
+        songs = self.song_scrounger.find_songs_in_text_file(file, incremental=True)
+        if self.music_api_client.search_cache is not None:
+            self.music_api_client.search_cache.save()
         if len(songs) == 0:
             self.ui.tell_user("Didn't find any songs :(")
             return
@@ -266,12 +314,23 @@ class MusicLibBot:
         new_playlist_name = self.ui.get_non_empty_string("What should your new playlist be called?")
 
         self.ui.tell_user("Creating playlist...")
-        songs_to_add = [
-            s
-            for ss in songs.values()
-            for s in ss
-        ]
-        self.my_music_lib.create_playlist(new_playlist_name, songs_to_add)
+        self.playlist_creator.create_playlist_from_songs(new_playlist_name, songs.items())
+        self.ui.tell_user("Done!")
+
+    def _scrounge_songs_into_new_playlist(self, file):
+        new_playlist_name = self.ui.get_non_empty_string("What should your new playlist be called?")
+        self.ui.tell_user(f"Creating '{new_playlist_name}'. I'll add songs to it as I find them...")
+
+        num_songs_added = self.playlist_creator.create_playlist_from_songs(
+            new_playlist_name,
+            self.song_scrounger.generate_songs_in_text_file(file),
+            on_chunk_added=lambda num_songs_added: self.ui.tell_user(f"- added {num_songs_added} song(s) so far"),
+        )
+        if self.music_api_client.search_cache is not None:
+            self.music_api_client.search_cache.save()
+        if num_songs_added == 0:
+            self.ui.tell_user("Didn't find any songs :(")
+            return
         self.ui.tell_user("Done!")
 
     def run(self):
@@ -294,7 +353,7 @@ class MusicLibBot:
             "g": self.run_song_scrounger,
         }
         def option_pick_handler(pick):
-            functions[pick]()
+            self._run_action(functions[pick])
         def get_option_description(pick):
             return options[pick]
         InteractiveOptionPicker(
@@ -304,6 +363,30 @@ class MusicLibBot:
             get_option_description,
         ).run()
 
+    def _run_action(self, action):
+        if self.instrumentation is None:
+            action()
+            return
+        try:
+            with self.instrumentation.span(f"{type(self).__name__}.{action.__name__}"):
+                action()
+        finally:
+            self.instrumentation.export()
+
+    def _trace(self, obj, method_names):
+        if self.instrumentation is None:
+            return obj
+        return self.instrumentation.trace_methods(obj, method_names)
+
+    def _get_playlist_updater(self):
+        return self._trace(PlaylistUpdater(
+            self.my_music_lib,
+            self.music_util,
+            self.music_api_client,
+            self.ui.tell_user,
+            self.playlist_analyzer,
+        ), TRACED_PLAYLIST_UPDATER_METHODS)
+
     def _get_file_from_user(self):
         file_path = None
         while file_path is None:
@@ -374,7 +457,7 @@ class MusicLibBot:
     def _get_albums_by_genre(self):
         min_genres_per_group = self._get_min_genres_per_group()
         if self._look_at_entire_library():
-            albums_by_genre = self.my_music_lib.get_all_my_albums_grouped_by_genre(
+            albums_by_genre = self.my_music_lib.get_all_my_album_groups_by_genre(
                 min_genres_per_group)
         else:
             albums_by_genre = self.my_music_lib.get_my_albums_grouped_by_genre(
@@ -383,41 +466,29 @@ class MusicLibBot:
 
     def _get_suggested_playlists(self, albums_by_genre):
         """
+        Params:
+            albums_by_genre ([dict]): from MyMusicLib.get_my_albums_grouped_by_genre,
+                or get_all_my_album_groups_by_genre.
+
         Returns:
-            ([dict]): each with 2 key-value pairs:
-                key "description", value (str).
-                key "albums", value ([Album]).
+            ([dict]): each with key "description", value (str), and the album group's
+                albums, or album and artist IDs and artist names, sorted in descending
+                order by number of albums.
         """
-        min_albums_per_playlist = self._get_min_albums_per_playlist()
-        min_artists_per_playlist = self._get_min_artists_per_playlist()
-        playlist_criteria = lambda albums: len(albums) >= min_albums_per_playlist and self.music_util.get_num_diff_artists(albums) >= min_artists_per_playlist
-        return [
-            dict(
-                description=', '.join(album_group['genres']),
-                albums=album_group['albums']
-            )
-            for album_group in albums_by_genre
-            if playlist_criteria(album_group['albums'])
-        ]
+        return self.my_music_lib.get_suggested_album_groups(
+            albums_by_genre,
+            self._get_min_albums_per_playlist(),
+            self._get_min_artists_per_playlist(),
+        )
 
     def _get_playlist_options(self):
-        """
-        Returns:
-            ([dict]): each dict with 2 key-value pairs:
-                - key "description", value (str).
-                - key "albums", value ([Album]).
-                sorted in descending order by number of albums,
-        """
+        "Returns ([dict]): see _get_suggested_playlists."
         albums_by_genre = self._get_albums_by_genre()
         if len(albums_by_genre) == 0:
             self.ui.tell_user("Couldn't match the albums into groups.. the genres didn't match :/")
             return
 
-        return sorted(
-            self._get_suggested_playlists(albums_by_genre),
-            key=lambda album_group: len(album_group['albums']),
-            reverse=True
-        )
+        return self._get_suggested_playlists(albums_by_genre)
 
     def _get_artist_from_user(self):
         artist_name = self.ui.get_non_empty_string("What artist interests you?")
@@ -432,25 +503,60 @@ class MusicLibBot:
         return artist
 
     def _get_playlist_description(self, album_group):
-        artists = list({
-            artist.name
-            for album in album_group['albums']
-            for artist in album.artists
-        })
+        if "artist_names" in album_group:
+            artists = album_group["artist_names"]
+        else:
+            artists = list({
+                artist.name
+                for album in album_group['albums']
+                for artist in album.artists
+            })
         return "\n\t".join([
             f"Description: {album_group['description']}",
-            f"Number of albums: {len(album_group['albums'])}",
+            f"Number of albums: {self.my_music_lib.get_num_albums(album_group)}",
             f"Artists: {', '.join(artists)}",
         ])
 
 
+def get_args():
+    parser = argparse.ArgumentParser(description="Interactive music library management.")
+    parser.add_argument("--cost-report", action="store_true", help="print the API calls each action made")
+    parser.add_argument("--trace-jsonl", metavar="PATH", help="append each action's spans to a JSON lines file")
+    parser.add_argument("--trace-otlp", metavar="PATH", help="append each action's spans as OTLP/JSON")
+    return parser.parse_args()
+
+
+def get_instrumentation(args, ui):
+    "Returns (Instrumentation|None): None unless asked for a cost report or traces."
+    # only imported when asked for, to start up faster
+    from packages.music_api_clients.instrumentation import (
+        Instrumentation,
+        JsonLinesExporter,
+        OpenTelemetryJsonExporter,
+        StdoutSummaryExporter,
+    )
+
+    exporters = []
+    if args.cost_report:
+        exporters.append(StdoutSummaryExporter(ui.tell_user))
+    if args.trace_jsonl is not None:
+        exporters.append(JsonLinesExporter(args.trace_jsonl))
+    if args.trace_otlp is not None:
+        exporters.append(OpenTelemetryJsonExporter(args.trace_otlp))
+    if len(exporters) == 0:
+        return None
+    return Instrumentation(exporters)
+
+
 def main():
-    spotify = Spotify()
+    args = get_args()
     ui = ConsoleUI()
+    instrumentation = get_instrumentation(args, ui)
+    spotify = Spotify(search_cache=SearchCache.load(), instrumentation=instrumentation)
     music_util = MusicUtil(spotify, ui.tell_user)
-    my_music_lib = MyMusicLib(spotify, music_util, ui.tell_user)
-    song_scrounger = SongScrounger(spotify)
-    MusicLibBot(spotify, my_music_lib, music_util, song_scrounger, ui).run()
+    my_music_lib = MyMusicLib(spotify, music_util, ui.tell_user, LibrarySnapshot())
+    song_scrounger = SongScrounger(spotify, stop_searching_once_artist_mentioned=True)
+    MusicLibBot(spotify, my_music_lib, music_util, song_scrounger, ui, instrumentation).run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+import json
+import os
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+# how much bigger than the baseline a stage's peak RSS can get before it's flagged
+DEFAULT_TOLERANCE = 0.25
+# how much slower; timings of even the fastest of a few runs vary by up to 50%
+DEFAULT_TIMING_TOLERANCE = 0.75
+
+
+def load_baseline(path=BASELINE_PATH):
+    "Returns (dict|None): as saved by save_baseline, or None if there isn't one."
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def save_baseline(config, measurements, path=BASELINE_PATH):
+    """
+    Params:
+        config (dict): what the measurements depend on, e.g. {"num_albums": 500}.
+        measurements (dict): key (str) stage name, val (dict) as returned by measure.measure_stage.
+    """
+    with open(path, "w") as f:
+        json.dump({"config": config, "stages": measurements}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def find_regressions(baseline, measurements, tolerance=DEFAULT_TOLERANCE, timing_tolerance=DEFAULT_TIMING_TOLERANCE):
+    """
+    Params:
+        baseline (dict): as returned by load_baseline.
+        measurements (dict): key (str) stage name, val (dict) as returned by measure.measure_stage.
+        tolerance (float): e.g. 0.25 flags stages whose peak RSS is more than 25% above the baseline.
+        timing_tolerance (float): e.g. 0.75 flags stages more than 75% slower than the baseline.
+
+    Returns:
+        ([str]): e.g. ["seed_sync: api_calls went from 207 to 250"].
+    """
+    regressions = []
+    for stage_name, measurement in measurements.items():
+        baseline_measurement = baseline["stages"].get(stage_name)
+        if baseline_measurement is None:
+            continue
+        # API calls are deterministic, so any increase is a regression
+        if measurement["api_calls"] > baseline_measurement["api_calls"]:
+            regressions.append(_describe(stage_name, "api_calls", baseline_measurement, measurement))
+        for metric in ("wall_seconds", "cpu_seconds"):
+            if measurement[metric] > baseline_measurement[metric] * (1 + timing_tolerance):
+                regressions.append(_describe(stage_name, metric, baseline_measurement, measurement))
+        if measurement["peak_rss_mb"] > baseline_measurement["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(_describe(stage_name, "peak_rss_mb", baseline_measurement, measurement))
+    return regressions
+
+def _describe(stage_name, metric, baseline_measurement, measurement):
+    return f"{stage_name}: {metric} went from {_format(baseline_measurement[metric])} to {_format(measurement[metric])}"
+
+def _format(value):
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
@@ -0,0 +1,78 @@
+# allows me to run:
+# $ python benchmarks/benchmark_tokenizer.py
+# $ python benchmarks/benchmark_tokenizer.py --paragraphs 5000
+# $ python benchmarks/benchmark_tokenizer.py --artists 1000
+import argparse
+import re
+import sys
+import timeit
+sys.path.extend(['.', '../'])
+
+from packages.music_api_clients.spotify import SPOTIFY_SEARCH_API_LIMIT
+from packages.song_scrounger.tokenizer import find_occurrences, find_quoted_tokens, to_name
+
+
+PARAGRAPH = (
+    "This week I had \"Sorry\" by Justin Bieber on repeat, then “Hello” by Adele, "
+    "and finally \"Bohemian Rhapsody,\" which Queen released in 1975. "
+    "The Rolling Stones, Lonnie Donnegan & His Skiffle Group and Allen Stone round it out."
+)
+ARTIST_NAMES = ["justin bieber", "adele", "queen", "the rolling stones", "lonnie donnegan", "allen stone", "taylor swift"]
+# the artists of one page of search results for a name, as checked when disambiguating it
+DEFAULT_NUM_ARTISTS = SPOTIFY_SEARCH_API_LIMIT
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Times quote extraction and mention checks, per paragraph.")
+    parser.add_argument("--paragraphs", type=int, default=200)
+    # a long document can turn up more candidate artists than the re module caches patterns for (512)
+    parser.add_argument("--artists", type=int, default=DEFAULT_NUM_ARTISTS, help="number of candidate artist names to check")
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def scrounge_paragraph_inline(paragraph, artist_names):
+    "How SongScrounger used to do it: a fresh pattern per call, straight quotes only, several passes."
+    tokens = re.findall("\"([^\"]*)\"", paragraph)
+    tokens = [token for token in tokens if len(token.strip(" ")) > 0]
+    names = list(map(lambda token: token.rstrip(",."), map(lambda token: token.strip(" "), tokens)))
+    lowered_paragraph = paragraph.lower()
+    mentioned = [
+        artist_name for artist_name in artist_names
+        if len(re.findall(f"(^|[^a-zA-Z]){artist_name}([^a-zA-Z]|$)", lowered_paragraph)) > 0
+    ]
+    return names, mentioned
+
+
+def scrounge_paragraph_with_tokenizer(paragraph, artist_names):
+    names = [to_name(token) for token in find_quoted_tokens(paragraph)]
+    lowered_paragraph = paragraph.lower()
+    mentioned = [
+        artist_name for artist_name in artist_names
+        if len(find_occurrences(artist_name, lowered_paragraph)) > 0
+    ]
+    return names, mentioned
+
+
+def time_per_paragraph(scrounge_paragraph, paragraphs, artist_names, repeat):
+    "Returns (float): best time, in microseconds, to scrounge one paragraph."
+    run = lambda: [scrounge_paragraph(paragraph, artist_names) for paragraph in paragraphs]
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / len(paragraphs) * 1e6
+
+
+def main():
+    args = get_args()
+    paragraphs = [f"{PARAGRAPH} ({index} plays)" for index in range(args.paragraphs)]
+    extra_artist_names = [f"artist number {index}" for index in range(max(0, args.artists - len(ARTIST_NAMES)))]
+    artist_names = (ARTIST_NAMES + extra_artist_names)[:args.artists]
+
+    inline_us = time_per_paragraph(scrounge_paragraph_inline, paragraphs, artist_names, args.repeat)
+    tokenizer_us = time_per_paragraph(scrounge_paragraph_with_tokenizer, paragraphs, artist_names, args.repeat)
+
+    print(f"inline regexes:    {inline_us:8.2f} us/paragraph")
+    print(f"tokenizer module:  {tokenizer_us:8.2f} us/paragraph")
+    print(f"speedup:           {inline_us / tokenizer_us:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import resource
+import sys
+import time
+
+from collections import Counter
+from multiprocessing import Process, Queue
+
+from benchmarks.workloads import STAGES, Workload, build_library
+
+
+def get_peak_rss_mb():
+    "Returns (float): the most memory this process has used so far."
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+
+def get_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def measure_stage(stage_name, server, num_albums):
+    """Runs the stage in a fresh process, so its peak RSS and CPU time aren't mixed up
+    with other stages' or the fake server's.
+
+    Params:
+        stage_name (str): key of workloads.STAGES.
+        server (FakeSpotifyServer): started, serving build_library(num_albums).
+        num_albums (int).
+
+    Returns:
+        (dict): wall_seconds, cpu_seconds, peak_rss_mb, api_calls, api_calls_by_endpoint, rate_limited.
+    """
+    num_requests_before = len(server.requests)
+    num_rate_limited_before = server.num_rate_limited
+    results = Queue()
+    process = Process(target=_run_stage, args=(stage_name, server.base_url, num_albums, results))
+    process.start()
+    measurement = results.get()
+    process.join()
+    if "error" in measurement:
+        raise RuntimeError(f"Stage '{stage_name}' failed: {measurement['error']}")
+
+    requests = server.requests[num_requests_before:]
+    measurement["api_calls"] = len(requests)
+    measurement["api_calls_by_endpoint"] = dict(Counter(_get_endpoint(method, path) for method, path in requests))
+    measurement["rate_limited"] = server.num_rate_limited - num_rate_limited_before
+    return measurement
+
+def _run_stage(stage_name, base_url, num_albums, results):
+    try:
+        workload = Workload(base_url, build_library(num_albums))
+        workload.warm_up()
+        wall_start, cpu_start = time.perf_counter(), get_cpu_seconds()
+        STAGES[stage_name](workload)
+        results.put({
+            "wall_seconds": time.perf_counter() - wall_start,
+            "cpu_seconds": get_cpu_seconds() - cpu_start,
+            "peak_rss_mb": get_peak_rss_mb(),
+        })
+    except Exception as error:
+        results.put({"error": repr(error)})
+
+def _get_endpoint(method, path):
+    "e.g. ('GET', 'playlists/playlist3/items') -> 'GET playlists/{id}/items'"
+    parts = path.split("/")
+    return " ".join([method, "/".join(
+        "{id}" if index % 2 == 1 and parts[0] in ("albums", "artists", "playlists", "users") else part
+        for index, part in enumerate(parts)
+    )])
@@ -0,0 +1,100 @@
+# allows me to run:
+# $ python benchmarks/run_benchmarks.py
+# $ python benchmarks/run_benchmarks.py --albums 10000 --latency-ms 20 --stages seed_sync song_scrounger
+# $ python benchmarks/run_benchmarks.py --update-baseline
+import argparse
+import sys
+import warnings
+sys.path.extend(['.', '../'])
+
+from benchmarks.baseline import BASELINE_PATH, DEFAULT_TIMING_TOLERANCE, DEFAULT_TOLERANCE, find_regressions, load_baseline, save_baseline
+from benchmarks.measure import measure_stage
+from benchmarks.workloads import STAGES, add_playlists, build_library
+from tests.fake_spotify_server import FakeSpotifyServer
+
+
+DEFAULT_NUM_ALBUMS = 500
+DEFAULT_LATENCY_MS = 5
+DEFAULT_REPEATS = 3
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Times the app's core workflows against a local fake of the Spotify Web API.")
+    parser.add_argument("--albums", type=int, default=DEFAULT_NUM_ALBUMS, help="size of the synthetic library")
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS, help="added to every API response")
+    parser.add_argument("--rate-limit-every", type=int, default=None, help="answer every nth request with 429")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="runs of every stage; the fastest of each is kept")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES.keys()), default=list(STAGES.keys()))
+    parser.add_argument("--baseline-path", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="of peak RSS, relative to the baseline")
+    parser.add_argument("--timing-tolerance", type=float, default=DEFAULT_TIMING_TOLERANCE, help="of timings, relative to the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="save these results as the new baseline")
+    return parser.parse_args()
+
+
+def keep_fastest(measurements, stage_name, measurement):
+    "Slower runs of the same stage are noise, so only the lowest timings and peak RSS are kept."
+    if stage_name not in measurements:
+        measurements[stage_name] = measurement
+        return
+    for metric in ("wall_seconds", "cpu_seconds", "peak_rss_mb"):
+        measurements[stage_name][metric] = min(measurements[stage_name][metric], measurement[metric])
+
+
+def print_measurements(measurements):
+    print(f"\n{'stage':<26}{'wall s':>9}{'cpu s':>9}{'peak MB':>9}{'calls':>7}{'429s':>6}")
+    for stage_name, measurement in measurements.items():
+        print(
+            f"{stage_name:<26}"
+            f"{measurement['wall_seconds']:>9.2f}"
+            f"{measurement['cpu_seconds']:>9.2f}"
+            f"{measurement['peak_rss_mb']:>9.1f}"
+            f"{measurement['api_calls']:>7}"
+            f"{measurement['rate_limited']:>6}"
+        )
+        for endpoint, num_calls in sorted(measurement["api_calls_by_endpoint"].items(), key=lambda item: -item[1]):
+            print(f"    {num_calls:>6}  {endpoint}")
+
+
+def main():
+    args = get_args()
+    # spotipy warns about every deprecated endpoint the app still uses
+    warnings.simplefilter("ignore", DeprecationWarning)
+    config = {"num_albums": args.albums, "latency_ms": args.latency_ms, "rate_limit_every": args.rate_limit_every}
+
+    measurements = dict()
+    for repeat in range(args.repeats):
+        # stages change the library, so every repeat starts from a fresh one
+        library = build_library(args.albums)
+        add_playlists(library)
+        with FakeSpotifyServer(library, args.latency_ms / 1000, args.rate_limit_every) as server:
+            for stage_name in args.stages:
+                print(f"Running {stage_name} ({repeat + 1}/{args.repeats})...")
+                keep_fastest(measurements, stage_name, measure_stage(stage_name, server, args.albums))
+    print_measurements(measurements)
+
+    if args.update_baseline:
+        save_baseline(config, measurements, args.baseline_path)
+        print(f"\nSaved baseline to {args.baseline_path}")
+        return
+
+    baseline = load_baseline(args.baseline_path)
+    if baseline is None:
+        print("\nNo baseline to compare to yet; save one with --update-baseline.")
+        return
+    if baseline["config"] != config:
+        print(f"\nNot comparing to the baseline, which was run with {baseline['config']}.")
+        return
+    regressions = find_regressions(baseline, measurements, args.tolerance, args.timing_tolerance)
+    if len(regressions) == 0:
+        print("\nNo regressions compared to the baseline.")
+        return
+    print("\nRegressions compared to the baseline:")
+    for regression in regressions:
+        print(f"- {regression}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
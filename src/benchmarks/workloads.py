@@ -0,0 +1,113 @@
+from random import Random, seed
+
+from packages.music_api_clients.spotify import Spotify
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MyMusicLib
+from packages.music_management.playlist_analyzer import PlaylistAnalyzer
+from packages.music_management.playlist_creator import PlaylistCreator
+from packages.music_management.playlist_updater import PlaylistUpdater
+from packages.song_scrounger.song_scrounger import SongScrounger
+from tests.fake_spotify_server import FAKE_ACCESS_TOKEN, FakeSpotifyLibrary
+
+
+RANDOM_SEED = 42
+NUM_SEED_PLAYLISTS = 3
+TRACKS_PER_SEED_PLAYLIST = 60
+TRACKS_IN_RECOMMENDATIONS_SEED = 25
+NUM_PARAGRAPHS_TO_SCROUNGE = 40
+SEED_PREFIX = "[seed] "
+RECOMMENDATIONS_SEED_PLAYLIST_NAME = "Benchmark Recommendations Seed"
+
+
+def build_library(num_albums):
+    "Returns (FakeSpotifyLibrary): the same one every time for the same num_albums."
+    return FakeSpotifyLibrary(num_albums=num_albums, seed=RANDOM_SEED)
+
+def add_playlists(library):
+    "Adds the playlists that the seed sync and recommendation workloads start from."
+    random = Random(RANDOM_SEED)
+    track_ids = [
+        library.get_track_id(album_index, track_number)
+        for album_index in range(library.num_albums)
+        for track_number in range(1, library.tracks_per_album + 1)
+    ]
+    for index in range(NUM_SEED_PLAYLISTS):
+        playlist = library.create_playlist(f"{SEED_PREFIX}Benchmark {index}", "")
+        library.add_playlist_items(playlist["id"], random.sample(track_ids, TRACKS_PER_SEED_PLAYLIST))
+    playlist = library.create_playlist(RECOMMENDATIONS_SEED_PLAYLIST_NAME, "")
+    library.add_playlist_items(playlist["id"], random.sample(track_ids, TRACKS_IN_RECOMMENDATIONS_SEED))
+
+def get_text_to_scrounge(library):
+    """
+    Returns:
+        (str): paragraphs quoting song names, some of them next to their artist's name.
+    """
+    random = Random(RANDOM_SEED)
+    paragraphs = []
+    for _ in range(NUM_PARAGRAPHS_TO_SCROUNGE):
+        track = library.get_track(library.get_track_id(
+            random.randrange(library.num_albums), random.randrange(1, library.tracks_per_album + 1)))
+        artist_name = track["artists"][0]["name"]
+        if random.random() < 0.5:
+            paragraphs.append(f"Lately I can't stop playing \"{track['name']}\" by {artist_name}.")
+        else:
+            paragraphs.append(f"Someone mentioned \"{track['name']}\" the other day, no idea who it's by.")
+    return "\n".join(paragraphs)
+
+
+class Workload:
+    "Wires up the app's classes against a Web API at base_url, like app/music_lib_bot.py does."
+
+    def __init__(self, base_url, library):
+        self.library = library
+        self.spotify = Spotify(base_url=base_url, access_token=FAKE_ACCESS_TOKEN)
+        self.music_util = MusicUtil(self.spotify, self._log)
+        self.my_music_lib = MyMusicLib(self.spotify, self.music_util, self._log)
+        self.playlist_analyzer = PlaylistAnalyzer(self.my_music_lib, self.music_util, self._log)
+        # workflows shuffle tracks
+        seed(RANDOM_SEED)
+
+    def warm_up(self):
+        "Creates the API client up front, so that importing spotipy isn't timed as part of a stage."
+        self.spotify.client
+
+    def run_artist_discography(self):
+        artist_name = self.library.get_artist(self.library.get_artist_id(0))["name"]
+        artist = self.music_util.get_most_popular_artist(self.spotify.get_matching_artists(artist_name))
+        PlaylistCreator(self.spotify, self.my_music_lib, self.music_util, self._log).create_playlist_from_an_artists_discography(
+            lambda: artist, lambda: 2, lambda: "Benchmark Discography")
+
+    def run_albums_grouped_by_genre(self):
+        self.my_music_lib.get_all_my_albums_grouped_by_genre(min_genres_per_group=1)
+
+    def run_seed_sync(self):
+        seed_playlists = self.my_music_lib.search_my_playlists(SEED_PREFIX)
+        self._get_playlist_updater().create_or_update_all_targets_from_seeds(
+            seed_playlists, 2, lambda seed_playlist: seed_playlist.name[len(SEED_PREFIX):])
+
+    def run_recommendations(self):
+        playlist = self.my_music_lib.get_playlist_by_name(RECOMMENDATIONS_SEED_PLAYLIST_NAME)
+        # tracks are fetched into a set, so their order, which decides the seed batches, changes with the hash seed
+        playlist.get_tracks().sort(key=lambda track: track.spotify_id)
+        self.music_util.populate_track_audio_features(playlist)
+        self._get_playlist_updater().add_recommended_songs_with_similar_attributes(playlist, lambda: 20)
+
+    def run_song_scrounger(self):
+        song_scrounger = SongScrounger(self.spotify, stop_searching_once_artist_mentioned=True)
+        song_scrounger.find_songs(get_text_to_scrounge(self.library))
+
+    def _get_playlist_updater(self):
+        return PlaylistUpdater(self.my_music_lib, self.music_util, self.spotify, self._log, self.playlist_analyzer)
+
+    def _log(self, message):
+        pass
+
+
+# stage name -> Workload method that runs it, in the order they're run
+STAGES = {
+    "artist_discography": Workload.run_artist_discography,
+    "albums_grouped_by_genre": Workload.run_albums_grouped_by_genre,
+    "seed_sync": Workload.run_seed_sync,
+    "recommendations": Workload.run_recommendations,
+    "song_scrounger": Workload.run_song_scrounger,
+}
@@ -0,0 +1,303 @@
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+MAGIC = b"MLBCASSETTE1"
+CODEC_ZSTD = b"z"
+CODEC_ZLIB = b"d"
+# each index entry is a key digest, then the offset and length of its frame in the cassette
+INDEX_ENTRY_FORMAT = ">16sQI"
+INDEX_ENTRY_SIZE = struct.calcsize(INDEX_ENTRY_FORMAT)
+KEY_DIGEST_SIZE = 16
+ZSTD_LEVEL = 3
+REPLAY_ACCESS_TOKEN = "replayed"
+
+
+class CassetteRecorder:
+    """Records every request the Spotify client makes, and the response it got, to a
+    cassette a CassettePlayer can later serve them from, e.g. to profile a slow nightly
+    seed sync locally without credentials.
+
+    A cassette is a file of independently compressed frames, one JSON line each, with zstd
+    if it's installed, else zlib; and next to it, an index of where each request's frame is,
+    sorted by request, so it can be looked up without reading the whole cassette.
+
+    e.g.
+        with CassetteRecorder("seed_sync.cassette") as cassette:
+            spotify = Spotify(cassette=cassette)
+            ...
+    """
+
+    def __init__(self, path):
+        """
+        Params:
+            path (str): where to write the cassette; its index goes to get_index_path(path).
+        """
+        self.path = path
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL) if zstandard is not None else None
+        self._lock = threading.Lock()
+        self._index_entries = []
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + self.codec)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._index_entries)
+
+    def mount(self, session):
+        "Makes session's requests go through the cassette, which hands them on to its adapters."
+        for prefix, adapter in list(session.adapters.items()):
+            session.mount(prefix, RecordingAdapter(adapter, self))
+
+    def record(self, request, response):
+        """
+        Params:
+            request (requests.PreparedRequest).
+            response (requests.Response).
+        """
+        frame = self._compress(json.dumps({
+            "method": request.method,
+            "url": request.url,
+            "body": encode_body(request.body),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "content": encode_body(response.content),
+            "elapsed_seconds": response.elapsed.total_seconds(),
+        }).encode("utf-8"))
+        key_digest = get_key_digest(request.method, request.url)
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(frame)
+            self._index_entries.append((key_digest, offset, len(frame)))
+
+    def close(self):
+        "Finishes the cassette by writing its index."
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            # a stable sort keeps repeated requests in the order they were made
+            self._index_entries.sort(key=lambda entry: entry[0])
+            temp_path = f"{get_index_path(self.path)}.tmp"
+            with open(temp_path, "wb") as f:
+                for entry in self._index_entries:
+                    f.write(struct.pack(INDEX_ENTRY_FORMAT, *entry))
+            os.replace(temp_path, get_index_path(self.path))
+
+    def _compress(self, data):
+        if self.codec == CODEC_ZSTD:
+            return self._compressor.compress(data)
+        return zlib.compress(data)
+
+
+class CassettePlayer:
+    """Serves the responses recorded in a cassette instead of going over the network.
+
+    The cassette and its index are memory-mapped, and a request's frame is found with a
+    binary search of the index, so even a cassette of several GB is ready at once.
+
+    A request that was made several times gets its responses in the order they were
+    recorded, then the last one again. Requests are matched by method and URL, not body,
+    see get_key_digest.
+    """
+
+    def __init__(self, path, latency_seconds=0.0, replay_recorded_latency=False, sleep=time.sleep):
+        """
+        Params:
+            path (str): of a cassette written by CassetteRecorder.
+            latency_seconds (float): to wait before each response, to simulate a network.
+            replay_recorded_latency (bool): whether to also wait as long as the recorded request took.
+            sleep (func): given (float) seconds, waits.
+        """
+        self.path = path
+        self.latency_seconds = latency_seconds
+        self.replay_recorded_latency = replay_recorded_latency
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._num_times_replayed = dict()
+        self._file = open(path, "rb")
+        self._cassette = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.codec = self._get_codec()
+        self._decompressor = zstandard.ZstdDecompressor() if self.codec == CODEC_ZSTD else None
+        self._index_file = open(get_index_path(path), "rb")
+        # mmap can't map an empty file
+        self._index = (
+            mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if os.path.getsize(get_index_path(path)) > 0 else b""
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._index) // INDEX_ENTRY_SIZE
+
+    def mount(self, session):
+        "Makes session's requests be served from the cassette."
+        adapter = ReplayAdapter(self)
+        for prefix in list(session.adapters.keys()):
+            session.mount(prefix, adapter)
+
+    def replay(self, request):
+        """
+        Params:
+            request (requests.PreparedRequest).
+
+        Returns:
+            (requests.Response).
+        """
+        # imported here, as it's slow to import and only needed once there are requests
+        import requests
+        from requests.structures import CaseInsensitiveDict
+
+        key_digest = get_key_digest(request.method, request.url)
+        first, last = self._find(key_digest)
+        if first == last:
+            raise KeyError(f"{request.method} {request.url} was not recorded in '{self.path}'")
+        with self._lock:
+            num_times_replayed = self._num_times_replayed.get(key_digest, 0)
+            self._num_times_replayed[key_digest] = num_times_replayed + 1
+        _, offset, length = self._get_index_entry(min(first + num_times_replayed, last - 1))
+        recorded = json.loads(self._decompress(self._cassette[offset:offset + length]))
+
+        latency_seconds = self.latency_seconds
+        if self.replay_recorded_latency:
+            latency_seconds += recorded["elapsed_seconds"]
+        if latency_seconds > 0:
+            self.sleep(latency_seconds)
+
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.reason = recorded["reason"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response._content = decode_body(recorded["content"])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        if isinstance(self._index, mmap.mmap):
+            self._index.close()
+        self._index_file.close()
+        self._cassette.close()
+        self._file.close()
+
+    def _find(self, key_digest):
+        "Returns (int, int): the range of index entries for key_digest."
+        keys = IndexKeys(self)
+        return bisect.bisect_left(keys, key_digest), bisect.bisect_right(keys, key_digest)
+
+    def _get_index_entry(self, position):
+        return struct.unpack_from(INDEX_ENTRY_FORMAT, self._index, position * INDEX_ENTRY_SIZE)
+
+    def _get_codec(self):
+        if self._cassette[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"'{self.path}' is not a cassette.")
+        codec = self._cassette[len(MAGIC):len(MAGIC) + 1]
+        if codec == CODEC_ZSTD and zstandard is None:
+            raise ValueError(f"'{self.path}' is compressed with zstd; install zstandard to replay it.")
+        return codec
+
+    def _decompress(self, frame):
+        if self.codec == CODEC_ZSTD:
+            return self._decompressor.decompress(frame)
+        return zlib.decompress(frame)
+
+
+class IndexKeys:
+    "The key digests of a CassettePlayer's index, as a sequence bisect can search."
+
+    def __init__(self, cassette_player):
+        self.cassette_player = cassette_player
+
+    def __len__(self):
+        return len(self.cassette_player)
+
+    def __getitem__(self, position):
+        start = position * INDEX_ENTRY_SIZE
+        return bytes(self.cassette_player._index[start:start + KEY_DIGEST_SIZE])
+
+
+# requests transport adapters, without subclassing requests' BaseAdapter, so requests
+# isn't imported until it's used
+class RecordingAdapter:
+    def __init__(self, adapter, cassette_recorder):
+        self.adapter = adapter
+        self.cassette_recorder = cassette_recorder
+
+    def send(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        self.cassette_recorder.record(request, response)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayAdapter:
+    def __init__(self, cassette_player):
+        self.cassette_player = cassette_player
+
+    def send(self, request, **kwargs):
+        return self.cassette_player.replay(request)
+
+    def close(self):
+        pass
+
+
+def get_index_path(path):
+    return f"{path}.index"
+
+
+def get_key_digest(method, url):
+    """Identifies a request by what it asks for, so the same request matches across runs.
+    Bodies are left out: writes to the same URL are matched in the order they were made,
+    as their bodies can differ between runs, e.g. a seed sync's shuffled tracks and random positions.
+
+    Returns:
+        (bytes): KEY_DIGEST_SIZE bytes.
+    """
+    scheme, netloc, path, query, _ = urlsplit(url)
+    # ignores the host, so a cassette recorded against Spotify replays against a local fake too
+    canonical_url = urlunsplit(("", "", path.rstrip("/"), urlencode(sorted(parse_qsl(query))), ""))
+    return hashlib.sha256(f"{method} {canonical_url}".encode("utf-8")).digest()[:KEY_DIGEST_SIZE]
+
+
+def encode_body(body):
+    """Returns (str|None): body as text, so it fits in JSON. Bytes that aren't UTF-8 are
+    kept as lone surrogates, so decode_body gets them back as they were.
+    """
+    if body is None or isinstance(body, str):
+        return body
+    return body.decode("utf-8", errors="surrogateescape")
+
+
+def decode_body(encoded_body):
+    if encoded_body is None:
+        return b""
+    return encoded_body.encode("utf-8", errors="surrogateescape")
@@ -0,0 +1,259 @@
+import json
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS genre_signatures (
+    signature_id INTEGER PRIMARY KEY,
+    -- JSON list of the genres, sorted
+    genres TEXT NOT NULL UNIQUE,
+    num_albums INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signature_genres (
+    genre TEXT NOT NULL,
+    signature_id INTEGER NOT NULL,
+    PRIMARY KEY (genre, signature_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS album_signatures (
+    album_id TEXT PRIMARY KEY,
+    signature_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS album_signatures_by_signature ON album_signatures (signature_id);
+CREATE TABLE IF NOT EXISTS genre_groups (
+    group_id INTEGER PRIMARY KEY,
+    genres TEXT NOT NULL UNIQUE,
+    num_genres INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS group_genres (
+    genre TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    PRIMARY KEY (genre, group_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS group_signatures (
+    group_id INTEGER NOT NULL,
+    signature_id INTEGER NOT NULL,
+    PRIMARY KEY (group_id, signature_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS group_signatures_by_signature ON group_signatures (signature_id);
+"""
+
+
+class GenreGroupView:
+    """Albums grouped by the genres they share, as MusicUtil.group_albums_by_genre groups them,
+    kept in SQLite and updated an album at a time.
+
+    Albums are grouped through their genre signature, i.e. the set of their artists' genres:
+    a group's genres are what two signatures, or two albums of the same signature, have in common.
+    So adding or removing an album only touches the groups of its signature, and only when the
+    signature is new, or its first or last album.
+
+    Groups are indexed by genre, so groups with given genres, or more, are found without grouping.
+    Not thread safe: see LibrarySnapshot, which it shares a database and transactions with.
+    """
+
+    def __init__(self, connection):
+        """
+        Params:
+            connection (sqlite3.Connection).
+        """
+        self._connection = connection
+        self._connection.executescript(SCHEMA)
+
+    def add_album(self, album_id, genres):
+        """
+        Params:
+            album_id (str): not already in the view.
+            genres ([str]): of all the album's artists.
+        """
+        signature = frozenset(genres)
+        signature_id, num_albums = self._get_or_create_signature(signature)
+        self._connection.execute("INSERT INTO album_signatures VALUES (?, ?)", (album_id, signature_id))
+        self._connection.execute(
+            "UPDATE genre_signatures SET num_albums = num_albums + 1 WHERE signature_id = ?", (signature_id,))
+        if num_albums == 0:
+            for other_signature_id, other_signature in self._get_signatures_with_any_genre(signature):
+                if other_signature_id == signature_id:
+                    continue
+                genres_in_common = signature & other_signature
+                self._add_to_group(genres_in_common, signature_id)
+                self._add_to_group(genres_in_common, other_signature_id)
+        elif num_albums == 1 and len(signature) > 0:
+            # albums with the same signature match on all of it
+            self._add_to_group(signature, signature_id)
+
+    def remove_album(self, album_id):
+        "Does nothing if the album isn't in the view."
+        row = self._connection.execute(
+            "SELECT signature_id FROM album_signatures WHERE album_id = ?", (album_id,)).fetchone()
+        if row is None:
+            return
+        signature_id = row[0]
+        self._connection.execute("DELETE FROM album_signatures WHERE album_id = ?", (album_id,))
+        self._connection.execute(
+            "UPDATE genre_signatures SET num_albums = num_albums - 1 WHERE signature_id = ?", (signature_id,))
+        signature, num_albums = self._connection.execute(
+            "SELECT genres, num_albums FROM genre_signatures WHERE signature_id = ?", (signature_id,)).fetchone()
+        if num_albums == 0:
+            # its groups may have lost the only signature others had those genres in common with
+            group_ids = [
+                group_id
+                for (group_id,) in self._connection.execute(
+                    "SELECT group_id FROM group_signatures WHERE signature_id = ?", (signature_id,))
+            ]
+            self._connection.execute("DELETE FROM group_signatures WHERE signature_id = ?", (signature_id,))
+            self._connection.execute("DELETE FROM signature_genres WHERE signature_id = ?", (signature_id,))
+            self._connection.execute("DELETE FROM genre_signatures WHERE signature_id = ?", (signature_id,))
+        elif num_albums == 1:
+            # its last album no longer has all of its genres in common with another album of it
+            group_ids = [
+                group_id
+                for (group_id,) in self._connection.execute(
+                    "SELECT group_id FROM genre_groups WHERE genres = ?", (signature,))
+            ]
+        else:
+            group_ids = []
+        for group_id in group_ids:
+            self._remove_unmatched_signatures(group_id)
+
+    def get_groups(self, min_genres_per_group):
+        """
+        Returns:
+            ([dict]): most albums first, e.g. [{"genres": ["dance rock", "rock"], "album_ids": [str]}].
+        """
+        return self._get_groups_by_ids(
+            "SELECT group_id FROM genre_groups WHERE num_genres >= ?", (min_genres_per_group,))
+
+    def find_groups(self, genres, superset=False):
+        """Looks groups up in the genre index.
+
+        Params:
+            genres ([str]).
+            superset (bool): whether groups may have other genres too.
+
+        Returns:
+            ([dict]): most albums first, see get_groups.
+        """
+        genres = set(genres)
+        if len(genres) == 0:
+            return self.get_groups(0) if superset else []
+        groups_with_all_genres = (
+            "SELECT group_id FROM group_genres WHERE genre IN (SELECT value FROM json_each(?)) "
+            "GROUP BY group_id HAVING COUNT(*) = ?"
+        )
+        if superset:
+            return self._get_groups_by_ids(groups_with_all_genres, (self._as_key(genres), len(genres)))
+        return self._get_groups_by_ids(
+            f"SELECT group_id FROM genre_groups WHERE num_genres = ? AND group_id IN ({groups_with_all_genres})",
+            (len(genres), self._as_key(genres), len(genres)),
+        )
+
+    def has_any_groups(self):
+        return self._connection.execute("SELECT 1 FROM genre_groups LIMIT 1").fetchone() is not None
+
+    def get_signature_of_each_album(self, min_genres_per_group):
+        """For when no albums share genres, like MusicUtil._group_each_album_by_itself.
+
+        Returns:
+            ([dict]): see get_groups.
+        """
+        return [
+            {"genres": json.loads(genres), "album_ids": [album_id]}
+            for album_id, genres in self._connection.execute(
+                "SELECT album_signatures.album_id, genre_signatures.genres FROM album_signatures "
+                "JOIN genre_signatures ON genre_signatures.signature_id = album_signatures.signature_id "
+                "WHERE json_array_length(genre_signatures.genres) >= ?",
+                (min_genres_per_group,),
+            )
+        ]
+
+    def _get_groups_by_ids(self, selected_group_ids, params):
+        album_ids_by_group_id, genres_by_group_id = dict(), dict()
+        for group_id, genres, album_id in self._connection.execute(
+            "SELECT genre_groups.group_id, genre_groups.genres, album_signatures.album_id FROM genre_groups "
+            "JOIN group_signatures ON group_signatures.group_id = genre_groups.group_id "
+            "JOIN album_signatures ON album_signatures.signature_id = group_signatures.signature_id "
+            f"WHERE genre_groups.group_id IN ({selected_group_ids}) "
+            "ORDER BY genre_groups.group_id",
+            params,
+        ):
+            genres_by_group_id[group_id] = genres
+            album_ids_by_group_id.setdefault(group_id, []).append(album_id)
+        return sorted(
+            [
+                {"genres": json.loads(genres_by_group_id[group_id]), "album_ids": album_ids}
+                for group_id, album_ids in album_ids_by_group_id.items()
+            ],
+            key=lambda group: len(group["album_ids"]),
+            reverse=True,
+        )
+
+    def _get_or_create_signature(self, signature):
+        "Returns (tuple): (int) signature ID, (int) number of its albums."
+        row = self._connection.execute(
+            "SELECT signature_id, num_albums FROM genre_signatures WHERE genres = ?",
+            (self._as_key(signature),),
+        ).fetchone()
+        if row is not None:
+            return row
+        signature_id = self._connection.execute(
+            "INSERT INTO genre_signatures (genres, num_albums) VALUES (?, 0)", (self._as_key(signature),)).lastrowid
+        self._connection.executemany(
+            "INSERT INTO signature_genres VALUES (?, ?)", [(genre, signature_id) for genre in signature])
+        return signature_id, 0
+
+    def _get_signatures_with_any_genre(self, genres):
+        "Returns ([tuple]): (int) ID and (frozenset) genres of each signature with any of the genres."
+        return [
+            (signature_id, frozenset(json.loads(signature)))
+            for signature_id, signature in self._connection.execute(
+                "SELECT signature_id, genres FROM genre_signatures WHERE signature_id IN "
+                "(SELECT signature_id FROM signature_genres WHERE genre IN (SELECT value FROM json_each(?)))",
+                (self._as_key(genres),),
+            )
+        ]
+
+    def _get_signatures_with_all_genres(self, genres):
+        "Returns ([tuple]): (int) ID, (frozenset) genres and (int) number of albums of each signature."
+        return [
+            (signature_id, frozenset(json.loads(signature)), num_albums)
+            for signature_id, signature, num_albums in self._connection.execute(
+                "SELECT signature_id, genres, num_albums FROM genre_signatures WHERE signature_id IN "
+                "(SELECT signature_id FROM signature_genres WHERE genre IN (SELECT value FROM json_each(?)) "
+                "GROUP BY signature_id HAVING COUNT(*) = ?)",
+                (self._as_key(genres), len(genres)),
+            )
+        ]
+
+    def _add_to_group(self, genres, signature_id):
+        "genres (frozenset): of the group, created if absent."
+        key = self._as_key(genres)
+        row = self._connection.execute("SELECT group_id FROM genre_groups WHERE genres = ?", (key,)).fetchone()
+        if row is None:
+            group_id = self._connection.execute(
+                "INSERT INTO genre_groups (genres, num_genres) VALUES (?, ?)", (key, len(genres))).lastrowid
+            self._connection.executemany(
+                "INSERT INTO group_genres VALUES (?, ?)", [(genre, group_id) for genre in genres])
+        else:
+            group_id = row[0]
+        self._connection.execute("INSERT OR IGNORE INTO group_signatures VALUES (?, ?)", (group_id, signature_id))
+
+    def _remove_unmatched_signatures(self, group_id):
+        "Removes signatures that no longer have the group's genres in common with any other, then the group if empty."
+        genres = frozenset(json.loads(self._connection.execute(
+            "SELECT genres FROM genre_groups WHERE group_id = ?", (group_id,)).fetchone()[0]))
+        signatures = self._get_signatures_with_all_genres(genres)
+        for signature_id, signature, num_albums in signatures:
+            is_matched = (signature == genres and num_albums > 1) or any(
+                signature & other_signature == genres
+                for other_signature_id, other_signature, _ in signatures
+                if other_signature_id != signature_id
+            )
+            if not is_matched:
+                self._connection.execute(
+                    "DELETE FROM group_signatures WHERE group_id = ? AND signature_id = ?", (group_id, signature_id))
+        if self._connection.execute(
+            "SELECT 1 FROM group_signatures WHERE group_id = ? LIMIT 1", (group_id,)).fetchone() is None:
+            self._connection.execute("DELETE FROM group_genres WHERE group_id = ?", (group_id,))
+            self._connection.execute("DELETE FROM genre_groups WHERE group_id = ?", (group_id,))
+
+    def _as_key(self, genres):
+        return json.dumps(sorted(set(genres)))
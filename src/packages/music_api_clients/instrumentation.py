@@ -0,0 +1,383 @@
+import contextvars
+import inspect
+import json
+import os
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+
+# upper bounds of the API call latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+OTEL_SCOPE_NAME = "packages.music_api_clients.instrumentation"
+OTEL_SPAN_KIND_INTERNAL = 1
+OTEL_SPAN_KIND_CLIENT = 3
+OTEL_STATUS_CODE_ERROR = 2
+
+
+class Span:
+    "One timed operation, e.g. a MusicUtil method or an API call, possibly inside another."
+
+    def __init__(self, name, trace_id, parent_span_id, is_api_call=False):
+        """
+        Params:
+            name (str): e.g. "MusicUtil.get_discography" or "spotify.artist_albums".
+            trace_id (str): 32 hex chars, shared by nested spans.
+            parent_span_id (str|None): 16 hex chars.
+            is_api_call (bool).
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.is_api_call = is_api_call
+        self.attributes = dict()
+        self.error = None
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns = None
+        self._start_seconds = time.perf_counter()
+        self.duration_seconds = None
+
+    def end(self):
+        self.end_time_ns = time.time_ns()
+        self.duration_seconds = time.perf_counter() - self._start_seconds
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "is_api_call": self.is_api_call,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": self.end_time_ns,
+            "duration_seconds": self.duration_seconds,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class EndpointStats:
+    def __init__(self):
+        self.num_calls = 0
+        self.num_errors = 0
+        self.total_seconds = 0.0
+        self.bytes_received = 0
+        # one count per bucket in LATENCY_BUCKETS_MS, plus one for slower calls
+        self.latency_bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add_call(self, seconds, error):
+        self.num_calls += 1
+        self.num_errors += 1 if error else 0
+        self.total_seconds += seconds
+        milliseconds = seconds * 1000
+        bucket = next(
+            (index for index, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= bound),
+            len(LATENCY_BUCKETS_MS),
+        )
+        self.latency_bucket_counts[bucket] += 1
+
+    def to_dict(self):
+        bucket_names = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.num_calls,
+            "errors": self.num_errors,
+            "total_seconds": self.total_seconds,
+            "bytes_received": self.bytes_received,
+            "latency_histogram": dict(zip(bucket_names, self.latency_bucket_counts)),
+        }
+
+
+class Instrumentation:
+    """Counts and times API calls per endpoint, and traces them in spans nested inside
+    the spans of the methods that made them. Exporters are handed what was recorded
+    each time export is called, e.g. once per bot action.
+
+    Spans nest per context: tasks handed to worker threads nest in the span they were
+    handed over from if wrapped with task_context.in_current_context, and start their
+    own traces otherwise.
+    """
+
+    def __init__(self, exporters=None):
+        """
+        Params:
+            exporters ([StdoutSummaryExporter|JsonLinesExporter|OpenTelemetryJsonExporter]).
+        """
+        self.exporters = exporters if exporters is not None else []
+        self._lock = threading.Lock()
+        # the spans being recorded, innermost last; a tuple, so that contexts copied
+        # for worker threads don't share one
+        self._span_stack = contextvars.ContextVar(f"span_stack_{id(self)}", default=())
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.endpoint_stats = defaultdict(EndpointStats)
+            self.cache_lookups = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    @contextmanager
+    def span(self, name, is_api_call=False, **attributes):
+        """
+        e.g.
+            with instrumentation.span("MusicLibBot.run_song_scrounger"):
+                ...
+
+        Returns:
+            (Span): ended and recorded on exit.
+        """
+        stack = self._span_stack.get()
+        parent = stack[-1] if len(stack) > 0 else None
+        span = Span(
+            name,
+            parent.trace_id if parent is not None else os.urandom(16).hex(),
+            parent.span_id if parent is not None else None,
+            is_api_call,
+        )
+        span.attributes.update(attributes)
+        self._span_stack.set(stack + (span,))
+        try:
+            yield span
+        except Exception as error:
+            span.error = repr(error)
+            raise
+        finally:
+            # not necessarily the last one, if coroutines or generators interleaved
+            self._span_stack.set(tuple(other for other in self._span_stack.get() if other is not span))
+            span.end()
+            with self._lock:
+                self.spans.append(span)
+
+    def trace_methods(self, obj, method_names):
+        """Wraps the given methods of obj in spans named after its class and the method,
+        so API calls are tied to the methods that made them.
+
+        Params:
+            obj (object).
+            method_names ([str]): e.g. ["get_discography"]. Best kept to methods called
+                a handful of times per action, as each call records a span.
+
+        Returns:
+            obj.
+        """
+        class_name = type(obj).__name__
+        for name in method_names:
+            setattr(obj, name, self._trace(f"{class_name}.{name}", getattr(obj, name)))
+        return obj
+
+    def instrument_client(self, client):
+        """
+        Params:
+            client (spotipy.Spotify).
+
+        Returns:
+            (InstrumentedClient): to use in place of client.
+        """
+        return InstrumentedClient(client, self)
+
+    def record_api_call(self, endpoint, seconds, error=False):
+        with self._lock:
+            self.endpoint_stats[endpoint].add_call(seconds, error)
+
+    def record_bytes_received(self, num_bytes):
+        "Attributes num_bytes to the API call being made in this context, if any."
+        stack = self._span_stack.get()
+        api_span = next((span for span in reversed(stack) if span.is_api_call), None)
+        if api_span is None:
+            return
+        api_span.attributes["bytes_received"] = api_span.attributes.get("bytes_received", 0) + num_bytes
+        with self._lock:
+            self.endpoint_stats[api_span.attributes["endpoint"]].bytes_received += num_bytes
+
+    def record_cache_lookup(self, cache_name, hit):
+        with self._lock:
+            self.cache_lookups[cache_name]["hits" if hit else "misses"] += 1
+
+    def get_summary(self):
+        """
+        Returns:
+            (dict): e.g. {
+                "api_calls": 12,
+                "bytes_received": 52000,
+                "endpoints": {"search": {"calls": 10, ...}},
+                "caches": {"search": {"hits": 3, "misses": 10, "hit_ratio": 0.23}},
+            }
+        """
+        with self._lock:
+            endpoints = {endpoint: stats.to_dict() for endpoint, stats in self.endpoint_stats.items()}
+            caches = {
+                cache_name: {
+                    **lookups,
+                    "hit_ratio": lookups["hits"] / max(1, lookups["hits"] + lookups["misses"]),
+                }
+                for cache_name, lookups in self.cache_lookups.items()
+            }
+        return {
+            "api_calls": sum(stats["calls"] for stats in endpoints.values()),
+            "bytes_received": sum(stats["bytes_received"] for stats in endpoints.values()),
+            "endpoints": endpoints,
+            "caches": caches,
+        }
+
+    def export(self):
+        "Hands what was recorded since the last export to each exporter, then starts over."
+        with self._lock:
+            spans = list(self.spans)
+        summary = self.get_summary()
+        for exporter in self.exporters:
+            exporter.export(spans, summary)
+        self.reset()
+
+    def _trace(self, name, method):
+        # so the span lasts as long as the work does, not just until it's started
+        if inspect.iscoroutinefunction(method):
+            @wraps(method)
+            async def traced_coroutine(*args, **kwargs):
+                with self.span(name):
+                    return await method(*args, **kwargs)
+            return traced_coroutine
+        if inspect.isgeneratorfunction(method):
+            @wraps(method)
+            def traced_generator(*args, **kwargs):
+                with self.span(name):
+                    yield from method(*args, **kwargs)
+            return traced_generator
+
+        @wraps(method)
+        def traced(*args, **kwargs):
+            with self.span(name):
+                return method(*args, **kwargs)
+        return traced
+
+
+class InstrumentedClient:
+    "Stands in for a spotipy.Spotify client, recording each call made through it."
+
+    def __init__(self, client, instrumentation):
+        self.client = client
+        self.instrumentation = instrumentation
+        session = getattr(client, "_session", None)
+        if session is not None and hasattr(session, "hooks"):
+            session.hooks["response"].append(self._on_response)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            error = False
+            try:
+                with self.instrumentation.span(f"spotify.{name}", is_api_call=True, endpoint=name):
+                    return attribute(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                self.instrumentation.record_api_call(name, time.perf_counter() - start, error)
+        return call
+
+    def _on_response(self, response, *args, **kwargs):
+        self.instrumentation.record_bytes_received(len(response.content))
+
+
+class StdoutSummaryExporter:
+    "Prints a cost report: time per top-level span, then calls, latency and bytes per endpoint."
+
+    def __init__(self, print_func=print):
+        self.print_func = print_func
+
+    def export(self, spans, summary):
+        for span in spans:
+            if span.parent_span_id is None and not span.is_api_call:
+                self.print_func(f"{span.name} took {span.duration_seconds:.2f}s")
+        self.print_func(
+            f"{summary['api_calls']} API call(s), {summary['bytes_received'] / 1024:.1f} KiB received")
+        for endpoint, stats in sorted(summary["endpoints"].items(), key=lambda item: -item[1]["calls"]):
+            average_ms = stats["total_seconds"] / stats["calls"] * 1000
+            errors = f", {stats['errors']} failed" if stats["errors"] > 0 else ""
+            self.print_func(
+                f"- {endpoint}: {stats['calls']} call(s), avg {average_ms:.0f}ms, "
+                f"{stats['bytes_received'] / 1024:.1f} KiB{errors}")
+        for cache_name, lookups in summary["caches"].items():
+            self.print_func(
+                f"- {cache_name} cache: {lookups['hits']} hit(s), {lookups['misses']} miss(es), "
+                f"{lookups['hit_ratio']:.0%} hit ratio")
+        for span_name, num_calls in self._get_api_calls_by_caller(spans).items():
+            self.print_func(f"- {span_name} made {num_calls} API call(s)")
+
+    def _get_api_calls_by_caller(self, spans):
+        "Returns (dict): key (str) name of the innermost method span, val (int) API calls it made."
+        spans_by_id = {span.span_id: span for span in spans}
+        api_calls_by_caller = defaultdict(int)
+        for span in spans:
+            if span.is_api_call and span.parent_span_id in spans_by_id:
+                api_calls_by_caller[spans_by_id[span.parent_span_id].name] += 1
+        return dict(sorted(api_calls_by_caller.items(), key=lambda item: -item[1]))
+
+
+class JsonLinesExporter:
+    "Appends one JSON object per span, then one for the summary, to a file."
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans, summary):
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps({"type": "span", **span.to_dict()}) + "\n")
+            f.write(json.dumps({"type": "summary", **summary}) + "\n")
+
+
+class OpenTelemetryJsonExporter:
+    """Appends spans to a file as OTLP/JSON trace requests, one per line, which is
+    what the OpenTelemetry Collector's file exporter writes and its receivers accept.
+    """
+
+    def __init__(self, path, service_name="music-lib-bot"):
+        self.path = path
+        self.service_name = service_name
+
+    def export(self, spans, summary):
+        if len(spans) == 0:
+            return
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._to_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": OTEL_SCOPE_NAME},
+                    "spans": [self._to_otel_span(span) for span in spans],
+                }],
+            }],
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(request) + "\n")
+
+    def _to_otel_span(self, span):
+        otel_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": OTEL_SPAN_KIND_CLIENT if span.is_api_call else OTEL_SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(span.end_time_ns),
+            "attributes": [self._to_attribute(key, value) for key, value in span.attributes.items()],
+        }
+        if span.parent_span_id is not None:
+            otel_span["parentSpanId"] = span.parent_span_id
+        if span.error is not None:
+            otel_span["status"] = {"code": OTEL_STATUS_CODE_ERROR, "message": span.error}
+        return otel_span
+
+    def _to_attribute(self, key, value):
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
@@ -0,0 +1,404 @@
+import json
+import sqlite3
+
+from datetime import datetime
+from threading import RLock
+
+from packages.music_api_clients.genre_group_view import GenreGroupView
+from packages.music_api_clients.models.album import Album
+from packages.music_api_clients.models.artist import Artist
+from packages.music_api_clients.models.track import Track
+
+
+LIBRARY_SNAPSHOT_PATH = "library_snapshot.sqlite"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS albums (
+    spotify_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    release_date TEXT,
+    num_tracks INTEGER,
+    popularity INTEGER,
+    spotify_uri TEXT,
+    added_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS albums_by_added_at ON albums (added_at DESC, spotify_id);
+CREATE TABLE IF NOT EXISTS artists (
+    spotify_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    spotify_uri TEXT,
+    -- JSON list; NULL until fetched
+    genres TEXT
+);
+CREATE TABLE IF NOT EXISTS album_artists (
+    album_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    artist_id TEXT NOT NULL,
+    PRIMARY KEY (album_id, position)
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    spotify_id TEXT PRIMARY KEY,
+    album_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    disc_number INTEGER,
+    duration_ms INTEGER,
+    track_number INTEGER,
+    spotify_uri TEXT
+);
+CREATE INDEX IF NOT EXISTS tracks_by_album ON tracks (album_id, position);
+CREATE TABLE IF NOT EXISTS track_artists (
+    track_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    artist_id TEXT NOT NULL,
+    PRIMARY KEY (track_id, position)
+);
+"""
+# the most recently saved albums, or all of them if the limit is -1
+MOST_RECENT_ALBUM_IDS = "SELECT spotify_id FROM albums ORDER BY added_at DESC, spotify_id LIMIT ?"
+# given a JSON list of IDs
+GIVEN_ALBUM_IDS = "SELECT value FROM json_each(?)"
+
+
+class LibrarySnapshot:
+    """Local copy of the user's saved albums, with their tracks, artists and the artists' genres,
+    so library-wide operations don't page through the whole library on every run.
+
+    sync relies on Spotify returning saved albums most recently saved first: it stops paging
+    at the first album it already has, saved at the same time. Albums removed from the library
+    only show up as a count mismatch, which is when the whole library is paged through again.
+    A mismatch left over once it has been, e.g. albums Spotify counts but doesn't list, is
+    expected from then on, so it doesn't set off paging through it again.
+
+    Albums are also kept grouped by genre, in a GenreGroupView that sync updates only with the
+    albums added or removed.
+
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, path=LIBRARY_SNAPSHOT_PATH):
+        """
+        Params:
+            path (str): SQLite database, created if absent; ":memory:" to keep nothing on disk.
+        """
+        self.path = path
+        self._lock = RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self.genre_groups = GenreGroupView(self._connection)
+        # Spotify's total minus the number of albums kept, as last found by paging through the whole library
+        self._unexplained_num_albums = 0
+        with self._connection:
+            # e.g. snapshots saved before there was a view
+            self._update_genre_groups([
+                album_id
+                for (album_id,) in self._connection.execute(
+                    "SELECT spotify_id FROM albums WHERE spotify_id NOT IN (SELECT album_id FROM album_signatures)")
+            ])
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM albums").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def sync(self, spotify):
+        """Fetches the albums saved since the last sync, and the genres of artists seen for the first time.
+
+        Params:
+            spotify (Spotify).
+
+        Returns:
+            (dict): with keys "added", "removed" and "total" (int) numbers of albums.
+        """
+        with self._lock:
+            added_at_by_album_id = dict(self._connection.execute("SELECT spotify_id, added_at FROM albums"))
+            new_albums, total = self._get_albums_saved_since(spotify, added_at_by_album_id)
+            with self._connection:
+                self._save_albums(new_albums)
+                artist_ids = self._save_artist_genres(spotify)
+                self._update_genre_groups({album.spotify_id for _, album in new_albums} | {
+                    album_id
+                    for (album_id,) in self._connection.execute(
+                        "SELECT album_id FROM album_artists WHERE artist_id IN (SELECT value FROM json_each(?))",
+                        (json.dumps(artist_ids),),
+                    )
+                })
+
+            num_removed = 0
+            if len(self) + self._unexplained_num_albums != total:
+                saved_album_ids = {
+                    album.spotify_id
+                    for page, _ in spotify.get_my_saved_album_pages()
+                    for _, album in page
+                }
+                with self._connection:
+                    num_removed = self._delete_albums(set(added_at_by_album_id) - saved_album_ids)
+                self._unexplained_num_albums = total - len(self)
+            num_added = len([
+                album for _, album in new_albums
+                if album.spotify_id not in added_at_by_album_id
+            ])
+            return {"added": num_added, "removed": num_removed, "total": len(self)}
+
+    def get_albums(self, max_albums=None):
+        """
+        Params:
+            max_albums (int|None): the most recently saved ones; all of them if None.
+
+        Returns:
+            ([Album]): most recently saved first, with their tracks, and genres of
+                all their artists, as set by MusicUtil.group_albums_by_genre.
+        """
+        return self._get_albums(MOST_RECENT_ALBUM_IDS, -1 if max_albums is None else max_albums)
+
+    def get_albums_by_ids(self, album_ids):
+        """
+        Returns:
+            ([Album]): those in the snapshot, most recently saved first, as in get_albums.
+        """
+        return self._get_albums(GIVEN_ALBUM_IDS, json.dumps(list(album_ids)))
+
+    def get_genre_groups(self, min_genres_per_group):
+        """Albums grouped by the genres they share, from the genre group view, i.e. without grouping them.
+
+        Returns:
+            ([dict]): most albums first, as from GenreSignatureGrouper.get_groups,
+                e.g. [{"genres": ["dance rock", "rock"], "album_ids": [str], "artist_ids": [str], "artist_names": [str]}].
+        """
+        with self._lock:
+            if self.genre_groups.has_any_groups():
+                album_groups = self.genre_groups.get_groups(min_genres_per_group)
+            else:
+                album_groups = self.genre_groups.get_signature_of_each_album(min_genres_per_group)
+            return self._add_artists(album_groups)
+
+    def find_genre_groups(self, genres, superset=False):
+        """Looks groups up in the genre group view's genre index.
+
+        Params:
+            genres ([str]).
+            superset (bool): whether groups may have other genres too.
+
+        Returns:
+            ([dict]): see get_genre_groups.
+        """
+        with self._lock:
+            return self._add_artists(self.genre_groups.find_groups(genres, superset))
+
+    def _get_albums(self, selected_album_ids, param):
+        """
+        Params:
+            selected_album_ids (str): SQL query of the IDs of the albums to get.
+            param (int|str): its sole parameter.
+        """
+        with self._lock:
+            artists_by_album_id = self._get_artists_by_album_id(selected_album_ids, param)
+            tracks_by_album_id = self._get_tracks_by_album_id(selected_album_ids, param)
+            rows = self._connection.execute(
+                "SELECT spotify_id, name, release_date, num_tracks, popularity, spotify_uri "
+                f"FROM albums WHERE spotify_id IN ({selected_album_ids}) ORDER BY added_at DESC, spotify_id",
+                (param,),
+            ).fetchall()
+        albums = []
+        for spotify_id, name, release_date, num_tracks, popularity, spotify_uri in rows:
+            artists = artists_by_album_id.get(spotify_id, [])
+            albums.append(Album(
+                name,
+                tracks_by_album_id.get(spotify_id, []),
+                artists,
+                datetime.fromisoformat(release_date) if release_date is not None else None,
+                num_tracks,
+                spotify_id=spotify_id,
+                genres=list({genre for artist in artists for genre in artist.genres or []}),
+                popularity=popularity,
+                spotify_uri=spotify_uri,
+            ))
+        return albums
+
+    def _get_albums_saved_since(self, spotify, added_at_by_album_id):
+        """
+        Returns:
+            (tuple): ([tuple]) (str) added_at and (Album) of each album saved since the last sync,
+                and (int) how many albums are saved in total.
+        """
+        new_albums, total = [], 0
+        for page, total in spotify.get_my_saved_album_pages():
+            for added_at, album in page:
+                if added_at_by_album_id.get(album.spotify_id) == added_at:
+                    return new_albums, total
+                new_albums.append((added_at, album))
+        return new_albums, total
+
+    def _save_albums(self, albums_with_added_at):
+        "albums_with_added_at ([tuple]): (str) added_at and (Album)."
+        for added_at, album in albums_with_added_at:
+            self._delete_albums([album.spotify_id])
+            self._connection.execute(
+                "INSERT INTO albums VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    album.spotify_id,
+                    album.name,
+                    album.release_date.isoformat() if album.release_date is not None else None,
+                    album.num_tracks,
+                    album.popularity,
+                    album.spotify_uri,
+                    added_at,
+                ),
+            )
+            self._save_artists(album.artists)
+            self._connection.executemany(
+                "INSERT INTO album_artists VALUES (?, ?, ?)",
+                [(album.spotify_id, position, artist.spotify_id) for position, artist in enumerate(album.artists)],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        track.spotify_id, album.spotify_id, position, track.name,
+                        track.disc_number, track.duration_ms, track.track_number, track.spotify_uri,
+                    )
+                    for position, track in enumerate(album.tracks or [])
+                ],
+            )
+            for track in album.tracks or []:
+                self._save_artists(track.artists)
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO track_artists VALUES (?, ?, ?)",
+                    [(track.spotify_id, position, artist.spotify_id) for position, artist in enumerate(track.artists)],
+                )
+
+    def _update_genre_groups(self, album_ids):
+        "album_ids (iter(str)): that were added, saved again, or whose artists' genres were fetched."
+        for album_id in album_ids:
+            self.genre_groups.remove_album(album_id)
+            self.genre_groups.add_album(album_id, self._get_album_genres(album_id))
+
+    def _get_album_genres(self, album_id):
+        "Returns ([str]): of all the album's artists."
+        return list({
+            genre
+            for (genres,) in self._connection.execute(
+                "SELECT artists.genres FROM album_artists JOIN artists ON artists.spotify_id = album_artists.artist_id "
+                "WHERE album_artists.album_id = ?",
+                (album_id,),
+            )
+            for genre in json.loads(genres or "[]")
+        })
+
+    def _add_artists(self, album_groups):
+        "Adds the IDs and names of the artists of each group's albums."
+        artists_by_album_id = dict()
+        for album_id, artist_id, name in self._connection.execute(
+            "SELECT album_artists.album_id, artists.spotify_id, artists.name "
+            "FROM album_artists JOIN artists ON artists.spotify_id = album_artists.artist_id "
+            "ORDER BY album_artists.album_id, album_artists.position"
+        ):
+            artists_by_album_id.setdefault(album_id, []).append((artist_id, name))
+        for album_group in album_groups:
+            artist_names_by_id = dict()
+            for album_id in album_group["album_ids"]:
+                artist_names_by_id.update(artists_by_album_id.get(album_id, []))
+            album_group["artist_ids"] = list(artist_names_by_id)
+            album_group["artist_names"] = list(artist_names_by_id.values())
+        return album_groups
+
+    def _save_artists(self, artists):
+        "Keeps genres already fetched."
+        self._connection.executemany(
+            "INSERT INTO artists (spotify_id, name, spotify_uri) VALUES (?, ?, ?) "
+            "ON CONFLICT (spotify_id) DO UPDATE SET name = excluded.name, spotify_uri = excluded.spotify_uri",
+            [(artist.spotify_id, artist.name, artist.spotify_uri) for artist in artists],
+        )
+
+    def _save_artist_genres(self, spotify):
+        """Fetches genres of album artists whose genres haven't been fetched yet.
+
+        Returns:
+            ([str]): IDs of those artists.
+        """
+        artist_ids = [
+            artist_id
+            for (artist_id,) in self._connection.execute(
+                "SELECT DISTINCT artists.spotify_id FROM artists "
+                "JOIN album_artists ON album_artists.artist_id = artists.spotify_id "
+                "WHERE artists.genres IS NULL"
+            )
+        ]
+        if len(artist_ids) == 0:
+            return []
+        genres_by_artist_id = spotify.get_genres_by_artist_id(artist_ids)
+        # artists the API has no genres for get none, rather than being fetched again on every sync
+        self._connection.executemany(
+            "UPDATE artists SET genres = ? WHERE spotify_id = ?",
+            [(json.dumps(genres_by_artist_id.get(artist_id, [])), artist_id) for artist_id in artist_ids],
+        )
+        return artist_ids
+
+    def _delete_albums(self, album_ids):
+        "Returns (int): how many albums were deleted."
+        num_deleted = 0
+        for album_id in album_ids:
+            self._connection.execute(
+                "DELETE FROM track_artists WHERE track_id IN (SELECT spotify_id FROM tracks WHERE album_id = ?)",
+                (album_id,),
+            )
+            self._connection.execute("DELETE FROM tracks WHERE album_id = ?", (album_id,))
+            self._connection.execute("DELETE FROM album_artists WHERE album_id = ?", (album_id,))
+            self.genre_groups.remove_album(album_id)
+            num_deleted += self._connection.execute("DELETE FROM albums WHERE spotify_id = ?", (album_id,)).rowcount
+        return num_deleted
+
+    def _get_artists_by_album_id(self, selected_album_ids, param):
+        artists_by_album_id = dict()
+        rows = self._connection.execute(
+            "SELECT album_artists.album_id, artists.spotify_id, artists.name, artists.spotify_uri, artists.genres "
+            "FROM album_artists JOIN artists ON artists.spotify_id = album_artists.artist_id "
+            f"WHERE album_artists.album_id IN ({selected_album_ids}) "
+            "ORDER BY album_artists.album_id, album_artists.position",
+            (param,),
+        )
+        for album_id, spotify_id, name, spotify_uri, genres in rows:
+            artists_by_album_id.setdefault(album_id, []).append(Artist(
+                name,
+                spotify_id=spotify_id,
+                spotify_uri=spotify_uri,
+                genres=json.loads(genres) if genres is not None else None,
+            ))
+        return artists_by_album_id
+
+    def _get_tracks_by_album_id(self, selected_album_ids, param):
+        artists_by_track_id = dict()
+        rows = self._connection.execute(
+            "SELECT track_artists.track_id, artists.spotify_id, artists.name, artists.spotify_uri "
+            "FROM track_artists "
+            "JOIN tracks ON tracks.spotify_id = track_artists.track_id "
+            "JOIN artists ON artists.spotify_id = track_artists.artist_id "
+            f"WHERE tracks.album_id IN ({selected_album_ids}) "
+            "ORDER BY track_artists.track_id, track_artists.position",
+            (param,),
+        )
+        for track_id, spotify_id, name, spotify_uri in rows:
+            artists_by_track_id.setdefault(track_id, []).append(
+                Artist(name, spotify_id=spotify_id, spotify_uri=spotify_uri))
+
+        tracks_by_album_id = dict()
+        rows = self._connection.execute(
+            "SELECT spotify_id, album_id, name, disc_number, duration_ms, track_number, spotify_uri "
+            f"FROM tracks WHERE album_id IN ({selected_album_ids}) ORDER BY album_id, position",
+            (param,),
+        )
+        for spotify_id, album_id, name, disc_number, duration_ms, track_number, spotify_uri in rows:
+            tracks_by_album_id.setdefault(album_id, []).append(Track(
+                name,
+                artists_by_track_id.get(spotify_id, []),
+                disc_number,
+                duration_ms,
+                None,
+                track_number,
+                spotify_album_id=album_id,
+                spotify_id=spotify_id,
+                spotify_uri=spotify_uri,
+            ))
+        return tracks_by_album_id
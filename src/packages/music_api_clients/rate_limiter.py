@@ -0,0 +1,50 @@
+import time
+
+from threading import Lock
+
+
+class RateLimiter:
+    "Spaces out calls so that at most max_calls_per_second start each second, across threads."
+
+    def __init__(self, max_calls_per_second, clock=time.monotonic, sleep=time.sleep):
+        self.interval_seconds = 1 / max_calls_per_second
+        self.clock = clock
+        self.sleep = sleep
+        self._next_start = None
+        self._lock = Lock()
+
+    def wait(self):
+        "Blocks until the next call may start."
+        with self._lock:
+            now = self.clock()
+            start = now if self._next_start is None else max(now, self._next_start)
+            self._next_start = start + self.interval_seconds
+        if start > now:
+            self.sleep(start - now)
+
+    def limit(self, func):
+        "Returns (func): same as func, but waits its turn before each call."
+        def rate_limited_func(*args, **kwargs):
+            self.wait()
+            return func(*args, **kwargs)
+        return rate_limited_func
+
+    def mount(self, session):
+        "Makes each request sent through session (requests.Session) wait its turn."
+        for prefix, adapter in list(session.adapters.items()):
+            session.mount(prefix, RateLimitedAdapter(adapter, self))
+
+
+class RateLimitedAdapter:
+    "A requests transport adapter, without subclassing one, so requests isn't imported until it's used."
+
+    def __init__(self, adapter, rate_limiter):
+        self.adapter = adapter
+        self.rate_limiter = rate_limiter
+
+    def send(self, request, **kwargs):
+        self.rate_limiter.wait()
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
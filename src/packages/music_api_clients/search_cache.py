@@ -0,0 +1,103 @@
+import os
+import pickle
+import time
+
+from threading import Lock
+
+
+SEARCH_CACHE_PATH = "search_cache.pickle"
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+# searches that found nothing are retried sooner, in case of new releases
+DEFAULT_NEGATIVE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+class SearchCache:
+    """Remembers search results (e.g. [Track]) by query, on disk, until they expire.
+
+    Empty results are remembered too, for a shorter time.
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, path=SEARCH_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, negative_ttl_seconds=DEFAULT_NEGATIVE_TTL_SECONDS, clock=time.time):
+        """
+        Params:
+            path (str|None): where to save to; not saved if None.
+            ttl_seconds (int): how long non-empty results are kept.
+            negative_ttl_seconds (int): how long empty results are kept.
+            clock (func): returns current time in seconds.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.clock = clock
+        self.entries = dict()
+        self._lock = Lock()
+        # so saves from different threads don't write the same temp file at once
+        self._save_lock = Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_key(self, kind, query):
+        """
+        Params:
+            kind (str): e.g. "track".
+            query (str): as searched for, e.g. "  Sorry - Remastered 2011".
+
+        Returns:
+            (str): e.g. "track:sorry - remastered 2011", the same for queries that only
+                differ in case and whitespace, which search ignores.
+        """
+        return f"{kind}:{' '.join(query.lower().split())}"
+
+    def get(self, key):
+        "Returns (list|None): cached results, or None if absent or expired."
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return None
+        stored_at, results = entry
+        if self.clock() - stored_at > self._get_ttl(results):
+            return None
+        return results
+
+    def set(self, key, results):
+        with self._lock:
+            self.entries[key] = (self.clock(), list(results))
+
+    def remove_expired(self):
+        "Returns (int): number of entries removed."
+        now = self.clock()
+        with self._lock:
+            expired_keys = [
+                key
+                for key, (stored_at, results) in self.entries.items()
+                if now - stored_at > self._get_ttl(results)
+            ]
+            for key in expired_keys:
+                del self.entries[key]
+        return len(expired_keys)
+
+    def save(self):
+        if self.path is None:
+            return
+        self.remove_expired()
+        with self._lock:
+            entries = dict(self.entries)
+        # write then rename, so an interrupted save doesn't lose the cache
+        temp_path = f"{self.path}.tmp"
+        with self._save_lock:
+            with open(temp_path, "wb") as f:
+                pickle.dump(entries, f)
+            os.replace(temp_path, self.path)
+
+    def load(path=SEARCH_CACHE_PATH, **kwargs):
+        "Returns (SearchCache): empty if there's nothing at path yet."
+        search_cache = SearchCache(path, **kwargs)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                search_cache.entries = pickle.load(f)
+        return search_cache
+
+    def _get_ttl(self, results):
+        return self.ttl_seconds if len(results) > 0 else self.negative_ttl_seconds
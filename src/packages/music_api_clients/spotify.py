@@ -1,16 +1,20 @@
-from spotipy.oauth2 import SpotifyOAuth
-import spotipy
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 
 from packages.music_api_clients.models.album import Album
 from packages.music_api_clients.models.audio_features import AudioFeatures
 from packages.music_api_clients.models.artist import Artist
 from packages.music_api_clients.models.playlist import Playlist
 from packages.music_api_clients.models.track import Track
+from packages.music_api_clients.task_context import in_current_context
 
 
 API_BATCH_SIZE = 20
 API_FETCH_LIMIT = 100
 SPOTIFY_ALBUMS_API_LIMIT = 50
+SPOTIFY_SEARCH_API_LIMIT = 50
+SPOTIFY_ARTISTS_API_LIMIT = 50
+MAX_SEARCH_PAGES = 3
 SPOTIFY_ADD_TRACKS_TO_PLAYLIST_API_LIMIT = 100
 SPOTIFY_SCOPES = "user-library-read,playlist-modify-public,playlist-modify-private,playlist-read-private,playlist-read-collaborative"
 RECOMMENDATION_SEED_LIMIT = 5
@@ -18,9 +22,59 @@ RECOMMENDATIONS_LIMIT = 100
 
 
 class Spotify:
-    def __init__(self):
-        auth = SpotifyOAuth(scope=SPOTIFY_SCOPES)
-        self.client = spotipy.Spotify(auth_manager=auth)
+    def __init__(self, search_cache=None, base_url=None, access_token=None, instrumentation=None, cassette=None, rate_limiter=None):
+        """
+        Params:
+            search_cache (SearchCache|None): to reuse results of track and album name searches.
+            base_url (str|None): of the Web API, e.g. "http://127.0.0.1:8080/v1/" for a local fake.
+                Defaults to Spotify's.
+            access_token (str|None): used as is, instead of going through OAuth.
+            instrumentation (Instrumentation|None): to count, time and trace every API call.
+            cassette (CassetteRecorder|CassettePlayer|None): to record every API call to, or
+                replay them from instead of calling the API.
+            rate_limiter (RateLimiter|None): to space out API requests, e.g. shared by many jobs.
+        """
+        self.base_url = base_url
+        self.access_token = access_token
+        self.cassette = cassette
+        self.rate_limiter = rate_limiter
+        self.search_cache = search_cache
+        self.instrumentation = instrumentation
+        self._client = None
+        self._client_lock = Lock()
+
+    @property
+    def client(self):
+        """The spotipy client, created on first use, so that starting up doesn't wait on
+        importing spotipy or on OAuth, which only gets a token on the first request.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def _create_client(self):
+        import spotipy
+        from spotipy.oauth2 import SpotifyOAuth
+
+        if self.access_token is None:
+            client = spotipy.Spotify(auth_manager=SpotifyOAuth(scope=SPOTIFY_SCOPES))
+        else:
+            client = spotipy.Spotify(auth=self.access_token)
+        if self.base_url is not None:
+            client.prefix = self.base_url
+        if self.cassette is not None:
+            self.cassette.mount(client._session)
+        if self.rate_limiter is not None:
+            self.rate_limiter.mount(client._session)
+        if self.instrumentation is not None:
+            client = self.instrumentation.instrument_client(client)
+        return client
 
     def get_matching_artists(self, artist_name):
         results = self.client.search(q=f"artist:{artist_name}", type="artist")
@@ -29,31 +83,64 @@ class Spotify:
             for item in results["artists"]["items"]
         ]
 
-    def get_matching_tracks(self, track_name):
+    def get_matching_tracks(self, track_name, max_pages=MAX_SEARCH_PAGES, max_results=None, stop_when=None):
         """Finds the given track, ignoring case.
+
+        Searches at most max_pages pages of results, fetching the next page
+        while the current one is being filtered.
+
         Params:
             track_name (str).
+            max_pages (int): bounds the number of search requests.
+            max_results (int|None): stop searching once this many tracks are found.
+            stop_when (func|None): given (set(Track)) the tracks found so far,
+                returns (bool) whether to stop searching, e.g. once one of them is by
+                an artist mentioned alongside the track name.
         Returns:
             (set(music_api_clients.models.track.Track)): resulting Spotify tracks.
         """
         if len(track_name) == 0:
             raise ValueError("Track name cannot be empty.")
 
-        def track_searcher(batch_size=API_BATCH_SIZE, offset=0):
-            results = self.client.search(
+        def get_matching(tracks):
+            return {
+                track
+                for track in tracks
+                if self._is_matching_name(track.name, track_name, self._strip_song_metadata)
+            }
+
+        def should_stop(tracks):
+            matching_tracks = get_matching(tracks)
+            return (
+                (max_results is not None and len(matching_tracks) >= max_results) or
+                (stop_when is not None and stop_when(matching_tracks))
+            )
+
+        def track_page_searcher(offset):
+            return self.client.search(
                 q=f"track:{track_name}",
                 type="track",
                 offset=offset,
-                limit=batch_size,
-            )
-            matching_tracks = {
-                Track.from_spotify_track(track)
-                for track in results['tracks']['items']
-                if track['name'].lower() == track_name.lower() or
-                    self._strip_song_metadata(track['name']).lower() == track_name.lower()
-            }
-            return matching_tracks, len(results['tracks']['items']) == 0 or offset > API_FETCH_LIMIT
-        return self._fetch_until_all_items_returned(track_searcher)
+                limit=SPOTIFY_SEARCH_API_LIMIT,
+            )['tracks']
+
+        def track_searcher():
+            tracks = set()
+            for results, is_last_page in self._search_pages(track_page_searcher, max_pages):
+                tracks |= {
+                    Track.from_spotify_track(track)
+                    for track in results['items']
+                    if self._is_same_name(track['name'], track_name, self._strip_song_metadata)
+                }
+                # nothing was left to search, so the tracks are complete either way
+                if is_last_page:
+                    break
+                if should_stop(tracks):
+                    return tracks, False
+            return tracks, True
+
+        tracks = self._search_with_cache("track", track_name, track_searcher)
+        return get_matching(tracks)
 
     def get_matching_albums(self, album_name):
         """Finds the given album, ignoring case.
@@ -65,15 +152,21 @@ class Spotify:
         if len(album_name) == 0:
             raise ValueError("Album name cannot be empty.")
 
-        results = self.client.search(q=f"album:{album_name}", type="album")
-        matching_album_ids = [
-            album['id']
-            for album in results['albums']['items']
-            if album['name'].lower() == album_name.lower() or
-                self._strip_album_metadata(album['name']).lower() == album_name.lower()
-        ]
-        albums = self._get_albums_from_ids(matching_album_ids)
-        return set(albums)
+        def album_searcher():
+            results = self.client.search(q=f"album:{album_name}", type="album")
+            matching_album_ids = [
+                album['id']
+                for album in results['albums']['items']
+                if self._is_same_name(album['name'], album_name, self._strip_album_metadata)
+            ]
+            return self._get_albums_from_ids(matching_album_ids), True
+
+        albums = self._search_with_cache("album", album_name, album_searcher)
+        return {
+            album
+            for album in albums
+            if self._is_matching_name(album.name, album_name, self._strip_album_metadata)
+        }
 
     def get_all_user_playlists(self, user_id):
         def get_playlist_tracks(spotify_playlist_id):
@@ -158,16 +251,58 @@ class Spotify:
             results = self.client.current_user_saved_albums(
                 offset=offset, limit=batch_size)
             num_results = len(results['items'])
-            items = results['items'][:min(num_results, max_albums_to_fetch)]
+            items = results['items'][:max(0, max_albums_to_fetch - offset)]
             albums = [
                 Album.from_spotify_album(item['album'])
                 for item in items
             ]
-            finished = num_results + offset >= max_albums_to_fetch
+            finished = num_results == 0 or num_results + offset >= min(results['total'], max_albums_to_fetch)
             return albums, finished
         albums = self._fetch_until_all_items_returned(my_album_fetcher)
         return self.get_albums(albums)
 
+    def get_my_saved_album_pages(self, page_size=SPOTIFY_ALBUMS_API_LIMIT):
+        """Fetches the user's saved albums one page at a time, most recently saved first,
+        so callers can stop as soon as they reach albums they already know about.
+
+        Params:
+            page_size (int): max 50.
+
+        Returns:
+            (generator): yielding a 2-tuple per page:
+                - ([tuple]): (str) when the album was saved, e.g. "2020-01-01T00:00:00Z", and (Album)
+                - (int): how many albums are saved in total
+        """
+        offset = 0
+        while True:
+            results = self.client.current_user_saved_albums(offset=offset, limit=page_size)
+            if len(results['items']) == 0:
+                return
+            yield [
+                (item['added_at'], Album.from_spotify_album(item['album']))
+                for item in results['items']
+            ], results['total']
+            offset += len(results['items'])
+            if offset >= results['total']:
+                return
+
+    def get_genres_by_artist_id(self, artist_ids):
+        """
+        Params:
+            artist_ids ([str]).
+
+        Returns:
+            (dict): key (str) artist ID, val ([str]) its genres.
+        """
+        def artist_fetcher(artist_ids):
+            return self.client.artists(artist_ids)['artists']
+        genres_by_artist_id = dict()
+        for batch_start in range(0, len(artist_ids), SPOTIFY_ARTISTS_API_LIMIT):
+            for artist in artist_fetcher(artist_ids[batch_start:batch_start + SPOTIFY_ARTISTS_API_LIMIT]):
+                if artist is not None:
+                    genres_by_artist_id[artist['id']] = artist['genres']
+        return genres_by_artist_id
+
     def get_tracks(self, tracks):
         def track_fetcher(tracks):
             track_ids = [
@@ -185,6 +320,9 @@ class Spotify:
     def get_albums(self, albums):
         return self._get_albums_from_ids([album.spotify_id for album in albums])
 
+    def get_albums_by_ids(self, album_ids):
+        return self._get_albums_from_ids(album_ids)
+
     def _get_albums_from_ids(self, album_ids):
         def album_fetcher(album_ids):
             results = self.client.albums([
@@ -304,6 +442,31 @@ class Spotify:
     def get_recommendation_seed_limit(self):
         return RECOMMENDATION_SEED_LIMIT
 
+    def get_playlist_track_pages(self, playlist, page_size=API_FETCH_LIMIT):
+        """Fetches the playlist's tracks one page at a time, so callers can
+        start working on the first tracks before all of them are fetched.
+
+        Params:
+            playlist (Playlist).
+            page_size (int): max 100.
+
+        Returns:
+            (generator): yielding ([Track]) one page of tracks at a time.
+        """
+        offset = 0
+        while True:
+            results = self.client.playlist_tracks(
+                playlist.spotify_id, offset=offset, limit=page_size)
+            if len(results['items']) == 0:
+                return
+            yield [
+                Track.from_spotify_playlist_track(track)
+                for track in results['items']
+            ]
+            offset += len(results['items'])
+            if offset >= results['total']:
+                return
+
     def _get_playlist_tracks(self, playlist_id):
         def track_fetcher(batch_size=API_BATCH_SIZE, offset=0):
             results = self.client.playlist_tracks(
@@ -358,6 +521,84 @@ class Spotify:
                 fetch_items(items_to_fetch[batch_start_index:batch_end_index]))
         return fetched_items
 
+    def _search_with_cache(self, kind, name, search):
+        """
+        Params:
+            kind (str): e.g. "track".
+            name (str): what to search for, exactly as search searches for it.
+            search (func): returns a 2-tuple where:
+                - (iter) results of searching for name
+                - (bool) whether the results are complete, so can be cached
+
+        Returns:
+            (list): cached results, if there are any, else results of search.
+        """
+        if self.search_cache is None:
+            results, _ = search()
+            return list(results)
+
+        key = self.search_cache.get_key(kind, name)
+        results = self.search_cache.get(key)
+        if self.instrumentation is not None:
+            self.instrumentation.record_cache_lookup(f"{kind} search", results is not None)
+        if results is None:
+            results, is_complete = search()
+            results = list(results)
+            if is_complete:
+                self.search_cache.set(key, results)
+        return results
+
+    def _search_pages(self, page_searcher, max_pages):
+        """Fetches the next page in the background while the caller handles the current one.
+
+        Params:
+            page_searcher (func): given (int) offset, returns (dict) one page of search results.
+            max_pages (int).
+
+        Returns:
+            (generator): yielding 2-tuples, until the last page, or until max_pages pages, where:
+                - (dict) a page of search results
+                - (bool) whether it's the last one
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        page_searcher = in_current_context(page_searcher)
+        next_page = None
+        try:
+            next_page = executor.submit(page_searcher, 0)
+            for page_number in range(max_pages):
+                page = next_page.result()
+                is_last_page = (
+                    page_number + 1 == max_pages or
+                    len(page['items']) < SPOTIFY_SEARCH_API_LIMIT or
+                    page.get('next') is None
+                )
+                if not is_last_page:
+                    next_page = executor.submit(
+                        page_searcher, (page_number + 1) * SPOTIFY_SEARCH_API_LIMIT)
+                yield page, is_last_page
+                if is_last_page:
+                    return
+        finally:
+            # don't wait for a prefetched page that the caller stopped before needing;
+            # cancelled by hand, as shutdown's cancel_futures needs Python 3.9
+            if next_page is not None:
+                next_page.cancel()
+            executor.shutdown(wait=False)
+
+    def _is_matching_name(self, name, searched_name, strip_metadata):
+        "True iff name is searched_name, ignoring case, with or without metadata."
+        return (
+            name.lower() == searched_name.lower() or
+            strip_metadata(name).lower() == searched_name.lower()
+        )
+
+    def _is_same_name(self, name, other_name, strip_metadata):
+        "True iff names are equal after stripping metadata, ignoring case and whitespace."
+        return (
+            " ".join(strip_metadata(name).lower().split()) ==
+            " ".join(strip_metadata(other_name).lower().split())
+        )
+
     def _get_current_user_id(self):
         return self.client.me()['id']
 
@@ -0,0 +1,19 @@
+import contextvars
+
+from functools import wraps
+
+
+def in_current_context(func):
+    """Hands the caller's context to func wherever it ends up running, e.g. in a
+    worker thread, so that spans it records nest in the caller's.
+
+    Returns:
+        (func): same as func, but runs in a copy of the context it was wrapped in.
+    """
+    context = contextvars.copy_context()
+
+    @wraps(func)
+    def func_in_context(*args, **kwargs):
+        # a context can only be entered by one thread at a time, so each call gets its own copy
+        return context.copy().run(func, *args, **kwargs)
+    return func_in_context
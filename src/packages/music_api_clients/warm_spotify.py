@@ -0,0 +1,108 @@
+import time
+
+from threading import RLock
+
+from packages.music_api_clients.models.playlist import Playlist
+
+
+DEFAULT_TTL_SECONDS = 15 * 60
+
+
+class WarmSpotify:
+    """Stands in for a Spotify client in a long-running process, keeping what rarely
+    changes in memory so back-to-back jobs don't fetch it again:
+        - the index of the user's playlists, by name,
+        - the genres of each artist.
+    Saved albums aren't kept here, as MyMusicLib reads them from its LibrarySnapshot.
+
+    Playlists created or deleted through it are kept in the index. Anything changed
+    elsewhere, e.g. in the Spotify app, shows up once the caches expire after ttl_seconds.
+    Playlists' tracks are always fetched, since they're what jobs change.
+
+    Everything else is passed on to the Spotify client as is.
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, spotify, ttl_seconds=DEFAULT_TTL_SECONDS, clock=time.monotonic):
+        """
+        Params:
+            spotify (Spotify).
+            ttl_seconds (float): how long to keep what was fetched.
+            clock (func): returns current time in seconds.
+        """
+        self.spotify = spotify
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = RLock()
+        self.clear()
+
+    def __getattr__(self, name):
+        return getattr(self.spotify, name)
+
+    def clear(self):
+        with self._lock:
+            self._loaded_at = self.clock()
+            self._playlists_by_id = None
+            self._genres_by_artist_id = dict()
+
+    def get_current_user_playlist_by_name(self, name):
+        playlist_id = self.find_current_user_playlist(name)
+        if playlist_id is None:
+            return None
+        return self.spotify.get_playlist(self._get_playlists_by_id()[playlist_id])
+
+    def find_current_user_playlist(self, playlist_name):
+        "Returns playlist ID or None if not found."
+        for playlist in self._get_playlists_by_id().values():
+            if playlist.name == playlist_name:
+                return playlist.spotify_id
+        return None
+
+    def find_current_user_matching_playlists(self, keyword):
+        return [
+            # a new one each time, so tracks are fetched afresh
+            Playlist(playlist.name, playlist.description, playlist.tracks_fetcher, spotify_id=playlist.spotify_id)
+            for playlist in self._get_playlists_by_id().values()
+            if keyword in playlist.name
+        ]
+
+    def create_playlist(self, name, description):
+        playlist = self.spotify.create_playlist(name, description)
+        with self._lock:
+            if self._playlists_by_id is not None:
+                self._playlists_by_id[playlist.spotify_id] = Playlist(
+                    playlist.name,
+                    playlist.description,
+                    lambda: self.spotify.get_playlist(playlist).tracks,
+                    spotify_id=playlist.spotify_id,
+                )
+        return playlist
+
+    def delete_playlist(self, playlist_id):
+        self.spotify.delete_playlist(playlist_id)
+        with self._lock:
+            if self._playlists_by_id is not None:
+                self._playlists_by_id.pop(playlist_id, None)
+
+    def get_artist_genres(self, artist):
+        self._clear_if_expired()
+        genres = self._genres_by_artist_id.get(artist.spotify_id)
+        if genres is None:
+            genres = self.spotify.get_artist_genres(artist)
+            self._genres_by_artist_id[artist.spotify_id] = genres
+        return list(genres)
+
+    def _get_playlists_by_id(self):
+        with self._lock:
+            self._clear_if_expired()
+            if self._playlists_by_id is None:
+                self._playlists_by_id = {
+                    playlist.spotify_id: playlist
+                    for playlist in self.spotify.find_current_user_matching_playlists("")
+                }
+            return self._playlists_by_id
+
+    def _clear_if_expired(self):
+        with self._lock:
+            if self.clock() - self._loaded_at > self.ttl_seconds:
+                self.clear()
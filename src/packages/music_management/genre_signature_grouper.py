@@ -0,0 +1,191 @@
+import json
+import sqlite3
+
+from collections import defaultdict
+
+
+# (group, genre signature) pairs kept in memory before they're spilled to disk
+MAX_MEMBERSHIPS_IN_MEMORY = 500000
+
+
+class GenreSignatureGrouper:
+    """Groups albums by the genres they share, as MusicUtil.group_albums_by_genre does,
+    for libraries too big to hold as Albums.
+
+    It keeps only each album's ID, its artists' IDs and names, and its genre signature:
+    the set of its artists' genres, which many albums share. Albums are then matched a
+    signature at a time rather than an album at a time, so grouping grows with the number
+    of distinct signatures, not with the number of albums.
+
+    Once more than max_memberships_in_memory (group, signature) pairs are found, they're
+    spilled to a temporary SQLite database, deleted once grouping is done.
+    """
+
+    def __init__(self, max_memberships_in_memory=MAX_MEMBERSHIPS_IN_MEMORY):
+        self.max_memberships_in_memory = max_memberships_in_memory
+        self.num_albums = 0
+        self.artist_names_by_id = dict()
+        self._signatures = []
+        self._signature_indexes = dict()
+        # by signature index: ([tuple]) (str) album ID and (tuple) its artists' IDs
+        self._albums_by_signature = []
+
+    def add(self, album_id, genres, artists):
+        """
+        Params:
+            album_id (str).
+            genres ([str]): of all the album's artists.
+            artists ([tuple]): (str) ID and (str) name of each of the album's artists.
+        """
+        signature = frozenset(genres)
+        index = self._signature_indexes.get(signature)
+        if index is None:
+            index = len(self._signatures)
+            self._signature_indexes[signature] = index
+            self._signatures.append(signature)
+            self._albums_by_signature.append([])
+        for artist_id, artist_name in artists:
+            self.artist_names_by_id.setdefault(artist_id, artist_name)
+        self._albums_by_signature[index].append((album_id, tuple(artist_id for artist_id, _ in artists)))
+        self.num_albums += 1
+
+    def get_groups(self, min_genres_per_group):
+        """
+        Returns:
+            ([dict]): one per set of genres that some albums have in common, most albums first,
+                e.g. [{
+                    "genres": ["dance rock", "rock"],
+                    "album_ids": [str],
+                    "artist_ids": [str],
+                    "artist_names": [str],
+                }].
+        """
+        memberships, has_matches = GroupMemberships(self.max_memberships_in_memory), False
+        try:
+            signature_indexes_by_genre = defaultdict(list)
+            for index, signature in enumerate(self._signatures):
+                # albums with the same signature match on all of it
+                if len(self._albums_by_signature[index]) > 1 and len(signature) > 0:
+                    has_matches = True
+                    if len(signature) >= min_genres_per_group:
+                        memberships.add(signature, index)
+                matching_indexes = {
+                    matching_index
+                    for genre in signature
+                    for matching_index in signature_indexes_by_genre[genre]
+                }
+                for matching_index in matching_indexes:
+                    has_matches = True
+                    genres = signature & self._signatures[matching_index]
+                    if len(genres) >= min_genres_per_group:
+                        memberships.add(genres, index)
+                        memberships.add(genres, matching_index)
+                for genre in signature:
+                    signature_indexes_by_genre[genre].append(index)
+
+            groups = [
+                self._get_group(genres, signature_indexes)
+                for genres, signature_indexes in memberships.get_all()
+            ]
+        finally:
+            memberships.close()
+        if not has_matches:
+            groups = self._get_group_of_each_album(min_genres_per_group)
+        return sorted(groups, key=lambda group: len(group["album_ids"]), reverse=True)
+
+    def _get_group(self, genres, signature_indexes):
+        album_ids, artist_ids = [], dict()
+        for index in signature_indexes:
+            for album_id, album_artist_ids in self._albums_by_signature[index]:
+                album_ids.append(album_id)
+                artist_ids.update(dict.fromkeys(album_artist_ids))
+        return {
+            "genres": sorted(genres),
+            "album_ids": album_ids,
+            "artist_ids": list(artist_ids),
+            "artist_names": [self.artist_names_by_id[artist_id] for artist_id in artist_ids],
+        }
+
+    def _get_group_of_each_album(self, min_genres_per_group):
+        "When no albums share genres, like MusicUtil._group_each_album_by_itself."
+        return [
+            {
+                "genres": sorted(signature),
+                "album_ids": [album_id],
+                "artist_ids": list(artist_ids),
+                "artist_names": [self.artist_names_by_id[artist_id] for artist_id in artist_ids],
+            }
+            for signature, albums in zip(self._signatures, self._albums_by_signature)
+            if len(signature) >= min_genres_per_group
+            for album_id, artist_ids in albums
+        ]
+
+
+class GroupMemberships:
+    "Which genre signatures belong to which group, in memory until there are too many."
+
+    def __init__(self, max_memberships_in_memory):
+        self.max_memberships_in_memory = max_memberships_in_memory
+        self._signature_indexes_by_genres = defaultdict(set)
+        self._num_memberships = 0
+        self._spilled = None
+
+    def add(self, genres, signature_index):
+        """
+        Params:
+            genres (frozenset): of the group.
+            signature_index (int).
+        """
+        signature_indexes = self._signature_indexes_by_genres[genres]
+        if signature_index in signature_indexes:
+            return
+        signature_indexes.add(signature_index)
+        self._num_memberships += 1
+        if self._num_memberships > self.max_memberships_in_memory:
+            self._spill()
+
+    def get_all(self):
+        """
+        Returns:
+            (generator): yielding (frozenset) genres of a group and ([int]) its signature indexes.
+        """
+        if self._spilled is None:
+            yield from self._signature_indexes_by_genres.items()
+            return
+        self._spill()
+        genres_key, signature_indexes = None, []
+        for key, signature_index in self._spilled.execute(
+            "SELECT genres, signature_index FROM memberships ORDER BY genres"
+        ):
+            if key != genres_key and genres_key is not None:
+                yield frozenset(json.loads(genres_key)), signature_indexes
+                signature_indexes = []
+            genres_key = key
+            signature_indexes.append(signature_index)
+        if genres_key is not None:
+            yield frozenset(json.loads(genres_key)), signature_indexes
+
+    def close(self):
+        if self._spilled is not None:
+            self._spilled.close()
+            self._spilled = None
+
+    def _spill(self):
+        if self._spilled is None:
+            # "" is a temporary database on disk, deleted once closed
+            self._spilled = sqlite3.connect("")
+            self._spilled.execute(
+                "CREATE TABLE memberships (genres TEXT, signature_index INTEGER, "
+                "PRIMARY KEY (genres, signature_index)) WITHOUT ROWID"
+            )
+        with self._spilled:
+            self._spilled.executemany(
+                "INSERT OR IGNORE INTO memberships VALUES (?, ?)",
+                [
+                    (json.dumps(sorted(genres)), signature_index)
+                    for genres, signature_indexes in self._signature_indexes_by_genres.items()
+                    for signature_index in signature_indexes
+                ],
+            )
+        self._signature_indexes_by_genres.clear()
+        self._num_memberships = 0
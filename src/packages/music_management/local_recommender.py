@@ -0,0 +1,87 @@
+import os
+
+from packages.music_management.song_attribute_range_index import SongAttributeRangeIndex
+from packages.music_management.track_feature_matrix import TrackFeatureMatrix
+
+
+LOCAL_RECOMMENDER_INDEX_PATH = "local_recommender_index.pickle"
+DEFAULT_NUM_RECOMMENDATIONS = 100
+
+
+class LocalRecommender:
+    """Recommends tracks out of every track it has been shown, without calling any API.
+
+    Tracks are kept in a TrackFeatureMatrix and indexed with a SongAttributeRangeIndex,
+    so that "which known tracks fall within these SongAttributeRanges" doesn't require
+    scanning all of them.
+    """
+
+    def __init__(self, feature_matrix=None):
+        self.feature_matrix = TrackFeatureMatrix() if feature_matrix is None else feature_matrix
+        self.range_index = SongAttributeRangeIndex(self.feature_matrix)
+
+    def get_num_tracks(self):
+        return len(self.feature_matrix)
+
+    def index_tracks(self, tracks):
+        """Skips tracks without audio features.
+
+        Returns:
+            (int): number of tracks indexed.
+        """
+        return self.feature_matrix.add_tracks(tracks)
+
+    def index_tracks_with_audio_features(self, music_api_client, tracks):
+        "Fetches audio features for tracks that are missing them, then indexes all of them."
+        tracks_without_audio_features = [
+            track
+            for track in tracks
+            if track.audio_features is None and track.on_spotify()
+        ]
+        if len(tracks_without_audio_features) > 0:
+            music_api_client.set_track_audio_features(tracks_without_audio_features)
+        return self.index_tracks(tracks)
+
+    def get_tracks_in_ranges(self, song_attribute_ranges, limit=None):
+        """
+        Params:
+            song_attribute_ranges (SongAttributeRanges).
+            limit (int|None): max number of tracks to return.
+
+        Returns:
+            ([Track]): known tracks within all of the ranges, closest to the centre of the ranges first.
+        """
+        return self.range_index.query(song_attribute_ranges, limit)
+
+    def get_recommendations_based_on_tracks(self, tracks, song_attribute_ranges, limit=DEFAULT_NUM_RECOMMENDATIONS):
+        """Finds known tracks within the ranges that are closest to the centroid of the given tracks.
+
+        Params:
+            tracks ([Track]): with audio_features populated; never recommended themselves.
+            song_attribute_ranges (SongAttributeRanges).
+            limit (int): max number of tracks to return.
+
+        Returns:
+            ([Track]): closest first.
+        """
+        centroid = self.feature_matrix.get_centroid(tracks)
+        if centroid is None:
+            return []
+
+        seed_track_ids = {track.spotify_id for track in tracks}
+        rows = [
+            row
+            for row in self.range_index.get_rows_in_ranges(song_attribute_ranges)
+            if self.feature_matrix.get_track(row).spotify_id not in seed_track_ids
+        ]
+        rows.sort(key=lambda row: self.feature_matrix.get_distance(row, centroid))
+        return [self.feature_matrix.get_track(row) for row in rows[:limit]]
+
+    def save(self, path=LOCAL_RECOMMENDER_INDEX_PATH):
+        self.feature_matrix.save(path)
+
+    def load(path=LOCAL_RECOMMENDER_INDEX_PATH):
+        "Returns (LocalRecommender) with no tracks if there is nothing saved at path yet."
+        if not os.path.isfile(path):
+            return LocalRecommender()
+        return LocalRecommender(TrackFeatureMatrix.load(path))
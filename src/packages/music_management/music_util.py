@@ -1,11 +1,19 @@
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from random import sample
 from re import match
 from packages.music_api_clients.models.audio_features import AudioFeatures
 from packages.music_api_clients.models.song_attribute_ranges import SongAttributeRanges
 from packages.music_api_clients.models.artist import Artist
+from packages.music_api_clients.task_context import in_current_context
 from typing import List
 
 
+MAX_RECOMMENDATION_WORKERS = 8
+# recommendation requests per playlist, however big; a random sample of its seed batches is used
+MAX_RECOMMENDATION_SEED_BATCHES = 40
+
+
 class MusicUtil:
     def __init__(self, music_api_client, info_logger):
         self.music_api_client = music_api_client
@@ -26,7 +34,16 @@ class MusicUtil:
             albums_by_genre ([dict]):
                 e.g. [{genres: ['rock', 'dance rock'], albums: [Album]}]
         """
-        albums = self._add_artist_genres(albums)
+        return self.group_albums_with_genres(self._add_artist_genres(albums).values(), min_genres_per_group)
+
+    def group_albums_with_genres(self, albums, min_genres_per_group):
+        """Like group_albums_by_genre, for albums whose genres are already set, e.g. from a LibrarySnapshot.
+
+        Returns:
+            albums_by_genre ([dict]):
+                e.g. [{genres: ['rock', 'dance rock'], albums: [Album]}]
+        """
+        albums = {album: album for album in albums}
         genre_matches = self._detect_genre_matches(albums)
         album_groups = self._group_albums(albums, genre_matches)
         return [
@@ -272,30 +289,58 @@ class MusicUtil:
     def get_albums_of_tracks(self, tracks):
         return self.music_api_client.get_albums_of_tracks(tracks)
 
+    def get_album_ids_of_tracks(self, tracks):
+        """Collects album IDs straight from the tracks, without fetching any albums.
+
+        Returns:
+            ([str]): Spotify album IDs in order of first appearance. Duplicates excluded.
+        """
+        album_ids = dict()
+        for track in tracks:
+            if track.spotify_album_id is not None:
+                album_ids[track.spotify_album_id] = None
+        return list(album_ids.keys())
+
+    def get_albums_by_ids(self, album_ids):
+        if len(album_ids) == 0:
+            return []
+        return self.music_api_client.get_albums_by_ids(album_ids)
+
     def populate_track_audio_features(self, playlist):
         """Fetches and sets track.audio_features for each track in the playlist.
 
         Params:
             playlist (Playlist).
         """
-        self.music_api_client.set_track_audio_features([
+        self.populate_audio_features_if_absent(playlist.get_tracks())
+
+    def populate_audio_features_if_absent(self, tracks):
+        "tracks ([Track]): fetches and sets track.audio_features where it isn't set."
+        tracks_without_audio_features = [
             track
-            for track in playlist.get_tracks()
+            for track in tracks
             if track.audio_features is None
-        ])
+        ]
+        if len(tracks_without_audio_features) > 0:
+            self.music_api_client.set_track_audio_features(tracks_without_audio_features)
+
+    def get_playlist_track_pages(self, playlist):
+        "Returns (generator): yielding ([Track]) one page of the playlist's tracks at a time."
+        return self.music_api_client.get_playlist_track_pages(playlist)
 
-    def get_recommendations_based_on_tracks(self, tracks, song_attribute_ranges):
+    def get_recommendations_based_on_tracks(self, tracks, song_attribute_ranges, max_seed_batches=MAX_RECOMMENDATION_SEED_BATCHES):
         """
         Params:
-            tracks ([Track]): max length is 5.
+            tracks ([Track]).
             song_attribute_ranges (SongAttributeRanges).
+            max_seed_batches (int|None): caps the number of recommendation requests; None for no cap.
 
         Returns:
             recommended_tracks_by_percentage (dict): key (float) percentage, in [0,1],
                 value ([Track]) recommended tracks.
         """
         recommendations_by_percent = self._get_recommendations_based_on_tracks_in_batches(
-            tracks, song_attribute_ranges)
+            tracks, song_attribute_ranges, max_seed_batches)
         recommended_tracks_by_percentage = defaultdict(list)
         for track, percentage_recommended in recommendations_by_percent.items():
             recommended_tracks_by_percentage[percentage_recommended].append(track)
@@ -307,8 +352,9 @@ class MusicUtil:
             playlist (Playlist).
             playlist_analyzer (PlaylistAnalyzer).
         """
-        audio_features_min, audio_features_max = playlist_analyzer.get_audio_feature_representative_range(playlist)
-        popularity_min, popularity_max = playlist_analyzer.get_popularity_representative_range(playlist)
+        sketch = playlist_analyzer.sketch_playlist(playlist)
+        audio_features_min, audio_features_max = sketch.get_audio_feature_representative_range()
+        popularity_min, popularity_max = sketch.get_popularity_representative_range()
         song_attribute_ranges = SongAttributeRanges.from_audio_features_min_max_ranges(
             audio_features_min, audio_features_max)
         song_attribute_ranges.set_popularity_min_max_range(
@@ -424,6 +470,9 @@ class MusicUtil:
 
     def _group_each_album_by_itself(self, albums):
         """
+        Params:
+            albums (iter(Album)): with their genres set.
+
         Returns:
             ([dict]):
                 e.g. [{
@@ -431,13 +480,12 @@ class MusicUtil:
                     'genres': {'rock', 'punk'}
                 }].
         """
-        genres_by_album = self.get_genres_by_album(list(albums))
         return [
             {
                 "albums": {album},
-                "genres": set(genres)
+                "genres": set(album.genres or [])
             }
-            for album, genres in genres_by_album.items()
+            for album in albums
         ]
 
     def _group_albums(self, albums, genre_matches):
@@ -491,27 +539,48 @@ class MusicUtil:
         return self._strip_metadata_in_parentheses_or_brackets(
                 album_name.strip().lower())
 
-    def _get_recommendations_based_on_tracks_in_batches(self, tracks, song_attribute_ranges):
-        """
+    def _get_recommendations_based_on_tracks_in_batches(self, tracks, song_attribute_ranges, max_seed_batches=MAX_RECOMMENDATION_SEED_BATCHES):
+        """Requests recommendations for each batch of seed tracks concurrently.
+
         Params:
-            tracks_ids ([str]): max length is 5.
+            tracks ([Track]).
             song_attribute_ranges (SongAttributeRanges).
+            max_seed_batches (int|None): if set, only a random sample of this many
+                seed batches is used, which keeps huge playlists fast.
 
         Returns:
             (dict): key (Track), value (float) in [0,1].
         """
         recommendation_limit = self.music_api_client.get_recommendation_seed_limit()
-        recommendations_with_count, num_batches = defaultdict(int), 0
-        for min_index in range(0, len(tracks), recommendation_limit):
-            num_batches += 1
-            max_index = min(min_index+recommendation_limit, len(tracks))
-            recommendations = self.music_api_client.get_recommendations_based_on_tracks(
-                tracks[min_index:max_index], song_attribute_ranges)
-            for track in recommendations:
-                if track not in tracks:
-                    recommendations_with_count[track] += 1
+        seed_batches = [
+            tracks[min_index:min_index+recommendation_limit]
+            for min_index in range(0, len(tracks), recommendation_limit)
+        ]
+        if max_seed_batches is not None and len(seed_batches) > max_seed_batches:
+            seed_batches = sample(seed_batches, max_seed_batches)
+        if len(seed_batches) == 0:
+            return {}
+
+        seed_tracks = set(tracks)
+        recommendations_with_count = Counter()
+        num_workers = min(MAX_RECOMMENDATION_WORKERS, len(seed_batches))
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(
+                    in_current_context(self.music_api_client.get_recommendations_based_on_tracks),
+                    seed_batch,
+                    song_attribute_ranges,
+                )
+                for seed_batch in seed_batches
+            ]
+            for future in as_completed(futures):
+                recommendations_with_count.update(
+                    track
+                    for track in future.result()
+                    if track not in seed_tracks
+                )
         return {
-            track: float(count)/num_batches
+            track: float(count)/len(seed_batches)
             for track, count in recommendations_with_count.items()
         }
 
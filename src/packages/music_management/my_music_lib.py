@@ -1,15 +1,36 @@
+import time
+
 from random import randint, shuffle
+from threading import Lock
+
+from packages.music_management.genre_signature_grouper import GenreSignatureGrouper
 
 
-# To prevent fetching a copious amount of albums and overwhelming memory
-MAX_ALBUMS_TO_FETCH = 1000
+# Most tracks that can be added to a playlist in one request
+TRACKS_PER_PLAYLIST_CHUNK = 100
+# Least time between syncs of the library snapshot, so that an action, or the jobs
+# queued in a row, read the library as synced once rather than syncing on every lookup
+MIN_SECONDS_BETWEEN_SYNCS = 60
 
 
 class MyMusicLib:
-    def __init__(self, music_api_client, music_util, info_logger):
+    def __init__(self, music_api_client, music_util, info_logger, library_snapshot=None, clock=time.monotonic):
+        """
+        Params:
+            music_api_client (Spotify).
+            music_util (MusicUtil).
+            info_logger (func).
+            library_snapshot (LibrarySnapshot|None): to read saved albums from, synced first,
+                at most once every MIN_SECONDS_BETWEEN_SYNCS, instead of fetching them all.
+            clock (func): returns (float) seconds.
+        """
         self.music_api_client = music_api_client
         self.music_util = music_util
         self.info_logger = info_logger
+        self.library_snapshot = library_snapshot
+        self.clock = clock
+        self._last_synced_at = None
+        self._sync_lock = Lock()
 
     def get_playlist_by_name(self, name):
         return self.music_api_client.get_current_user_playlist_by_name(name)
@@ -41,27 +62,214 @@ class MyMusicLib:
             albums_by_genre ([dict]):
                 e.g. [{genres: ['rock', 'dance rock'], albums: [Album]}]
         """
-        albums = self.music_api_client.get_my_albums(albums_to_fetch)
+        albums = self.get_my_albums(albums_to_fetch)
         if len(albums) == 0:
             return []
 
         self.info_logger(f"Grouping {len(albums)} albums...")
-        albums_by_genre = self.music_util.group_albums_by_genre(albums, min_genres_per_group)
+        if self.library_snapshot is not None:
+            albums_by_genre = self.music_util.group_albums_with_genres(albums, min_genres_per_group)
+        else:
+            albums_by_genre = self.music_util.group_albums_by_genre(albums, min_genres_per_group)
 
         self.info_logger(f"Matched into {len(albums_by_genre)} groups...")
         return albums_by_genre
 
-    def get_all_my_albums_grouped_by_genre(self, min_genres_per_group):
+    def get_my_albums(self, albums_to_fetch):
+        "Returns ([Album]): the most recently saved ones; with genres if read from the library snapshot."
+        if self.library_snapshot is None:
+            return self.music_api_client.get_my_albums(albums_to_fetch)
+        self._sync_library_snapshot()
+        return self.library_snapshot.get_albums(albums_to_fetch)
+
+    def get_all_my_album_groups_by_genre(self, min_genres_per_group):
+        """Groups the whole library, however big: read from the library snapshot's genre
+        group view if there's a snapshot; otherwise by streaming the library a page at a time
+        and keeping only album and artist IDs and genres, see GenreSignatureGrouper.
+
+        Returns:
+            album_groups ([dict]): most albums first, see get_albums_of_group for their albums.
+                e.g. [{genres: ['dance rock', 'rock'], album_ids: [str], artist_ids: [str], artist_names: [str]}]
+        """
+        if self.library_snapshot is not None:
+            self._sync_library_snapshot()
+            return self.library_snapshot.get_genre_groups(min_genres_per_group)
+
+        grouper = GenreSignatureGrouper()
+        for album_id, genres, artists in self._get_my_album_genre_signatures():
+            grouper.add(album_id, genres, artists)
+        if grouper.num_albums == 0:
+            return []
+
+        self.info_logger(f"Grouping {grouper.num_albums} albums...")
+        album_groups = grouper.get_groups(min_genres_per_group)
+
+        self.info_logger(f"Matched into {len(album_groups)} groups...")
+        return album_groups
+
+    def get_albums_of_group(self, album_group):
+        """
+        Params:
+            album_group (dict): from get_all_my_album_groups_by_genre.
+
+        Returns:
+            ([Album]).
+        """
+        if self.library_snapshot is not None:
+            return self.library_snapshot.get_albums_by_ids(album_group["album_ids"])
+        return self.music_util.get_albums_by_ids(album_group["album_ids"])
+
+    def get_suggested_album_groups(self, album_groups, min_albums_per_group, min_artists_per_group):
+        """
+        Params:
+            album_groups ([dict]): from get_my_albums_grouped_by_genre,
+                or get_all_my_album_groups_by_genre.
+            min_albums_per_group (int).
+            min_artists_per_group (int).
+
+        Returns:
+            ([dict]): the album groups with enough albums and artists, most albums first,
+                each with key "description" (str) in place of "genres".
+        """
+        return sorted(
+            [
+                dict(
+                    {key: value for key, value in album_group.items() if key != "genres"},
+                    description=", ".join(album_group["genres"]),
+                )
+                for album_group in album_groups
+                if self.get_num_albums(album_group) >= min_albums_per_group and
+                    self.get_num_artists(album_group) >= min_artists_per_group
+            ],
+            key=self.get_num_albums,
+            reverse=True,
+        )
+
+    def get_num_albums(self, album_group):
+        if "album_ids" in album_group:
+            return len(album_group["album_ids"])
+        return len(album_group["albums"])
+
+    def get_num_artists(self, album_group):
+        if "artist_ids" in album_group:
+            return len(album_group["artist_ids"])
+        return self.music_util.get_num_diff_artists(album_group["albums"])
+
+    def find_my_albums_with_genres(self, genres, albums_to_fetch, superset=False):
+        """Finds a group of albums that have the genres in common: looked up in the library
+        snapshot's genre group view, over the whole library, if there's a snapshot; otherwise
+        found by grouping the albums_to_fetch most recently saved albums.
+
+        Params:
+            genres ([str]).
+            albums_to_fetch (int).
+            superset (bool): whether the albums may have other genres in common too.
+
+        Returns:
+            ([Album]): of the group with the most albums if from the snapshot, else of the first
+                group found; empty if none.
         """
+        if self.library_snapshot is not None:
+            self._sync_library_snapshot()
+            album_groups = self.library_snapshot.find_genre_groups(genres, superset)
+            return self.get_albums_of_group(album_groups[0]) if len(album_groups) > 0 else []
+
+        for album_group in self.get_my_albums_grouped_by_genre(albums_to_fetch, len(genres)):
+            if set(genres) == set(album_group["genres"]) or (superset and set(genres) <= set(album_group["genres"])):
+                return album_group["albums"]
+        return []
+
+    def get_all_my_albums_grouped_by_genre(self, min_genres_per_group):
+        """Fetches every album of every group; get_all_my_album_groups_by_genre then
+        get_albums_of_group fetches only those of the groups needed.
+
         Returns:
             albums_by_genre ([dict]):
                 e.g. [{genres: ['rock', 'dance rock'], albums: [Album]}]
         """
-        return self.get_my_albums_grouped_by_genre(MAX_ALBUMS_TO_FETCH, min_genres_per_group)
+        album_groups = self.get_all_my_album_groups_by_genre(min_genres_per_group)
+        albums_by_id = {
+            album.spotify_id: album
+            for album in self.get_albums_of_group(
+                {"album_ids": list({album_id for group in album_groups for album_id in group["album_ids"]})})
+        }
+        return [
+            {
+                "genres": album_group["genres"],
+                "albums": [albums_by_id[album_id] for album_id in album_group["album_ids"] if album_id in albums_by_id],
+            }
+            for album_group in album_groups
+        ]
+
+    def _get_my_album_genre_signatures(self):
+        """
+        Returns:
+            (generator): yielding (str) album ID, ([str]) genres of its artists,
+                and ([tuple]) (str) ID and (str) name of each of its artists.
+        """
+        genres_by_artist_id = dict()
+        for page, _ in self.music_api_client.get_my_saved_album_pages():
+            new_artist_ids = list({
+                artist.spotify_id
+                for _, album in page
+                for artist in album.artists
+                if artist.spotify_id not in genres_by_artist_id
+            })
+            if len(new_artist_ids) > 0:
+                genres_by_artist_id.update(self.music_api_client.get_genres_by_artist_id(new_artist_ids))
+            for _, album in page:
+                yield (
+                    album.spotify_id,
+                    list({genre for artist in album.artists for genre in genres_by_artist_id.get(artist.spotify_id, [])}),
+                    [(artist.spotify_id, artist.name) for artist in album.artists],
+                )
+
+    def _sync_library_snapshot(self):
+        # so that concurrent jobs wait for one sync rather than each making their own
+        with self._sync_lock:
+            if self._last_synced_at is not None and self.clock() - self._last_synced_at < MIN_SECONDS_BETWEEN_SYNCS:
+                return
+            changes = self.library_snapshot.sync(self.music_api_client)
+            self._last_synced_at = self.clock()
+        if changes["added"] > 0 or changes["removed"] > 0:
+            self.info_logger(
+                f"Synced your library: {changes['added']} album(s) added, {changes['removed']} removed.")
 
     def add_tracks_to_playlist(self, playlist, tracks):
         self.music_api_client.add_tracks(playlist, tracks)
 
+    def add_tracks_to_playlist_in_chunks(self, playlist, tracks, on_chunk_added=None):
+        """Adds tracks as they come, TRACKS_PER_PLAYLIST_CHUNK at a time, in order,
+        skipping duplicates, so tracks can be added while they're still being found.
+
+        Params:
+            playlist (Playlist).
+            tracks (iter(Track)): e.g. a generator.
+            on_chunk_added (func|None): given the number of tracks added so far (int).
+
+        Returns:
+            (int): number of tracks added.
+        """
+        added_track_ids, chunk, num_tracks_added = set(), [], 0
+        def add_chunk():
+            nonlocal chunk, num_tracks_added
+            self.music_api_client.add_tracks(playlist, chunk)
+            num_tracks_added += len(chunk)
+            chunk = []
+            if on_chunk_added is not None:
+                on_chunk_added(num_tracks_added)
+
+        for track in tracks:
+            if track.spotify_id in added_track_ids:
+                continue
+            added_track_ids.add(track.spotify_id)
+            chunk.append(track)
+            if len(chunk) == TRACKS_PER_PLAYLIST_CHUNK:
+                add_chunk()
+        if len(chunk) > 0:
+            add_chunk()
+        return num_tracks_added
+
     def add_track_to_playlist_at_position(self, playlist, track, position):
         self.music_api_client.add_track_at_position(playlist, track, position)
 
@@ -76,12 +284,33 @@ class MyMusicLib:
             shuffle(shuffled_tracks)
             self.add_tracks_to_playlist(playlist, shuffled_tracks)
         else:
-            num_tracks_in_playlist = playlist.get_num_tracks()
-            for track in tracks:
-                random_position = randint(1, num_tracks_in_playlist)
-                self.add_track_to_playlist_at_position(
-                    playlist, track, random_position)
-                num_tracks_in_playlist += 1
+            self.add_tracks_at_positions(
+                playlist,
+                tracks,
+                self.get_random_positions(playlist.get_num_tracks(), len(tracks)),
+            )
+
+    def get_random_positions(self, num_tracks_in_playlist, num_tracks_to_add):
+        """Picks a random position for each track to add, accounting for the
+        tracks inserted before it.
+
+        Returns:
+            ([int]): positions, to be applied in order.
+        """
+        positions = []
+        for _ in range(num_tracks_to_add):
+            positions.append(randint(1, num_tracks_in_playlist))
+            num_tracks_in_playlist += 1
+        return positions
+
+    def add_tracks_at_positions(self, playlist, tracks, positions):
+        """
+        Params:
+            tracks ([Track]).
+            positions ([int]): position of each track, applied in order.
+        """
+        for track, position in zip(tracks, positions):
+            self.add_track_to_playlist_at_position(playlist, track, position)
 
     def remove_tracks_from_playlist(self, playlist, tracks):
         self.music_api_client.remove_tracks_from_playlist(playlist, tracks)
\ No newline at end of file
@@ -22,6 +22,22 @@ class PlaylistCreator:
         )
         self.info_logger(f"Playlist created!")
 
+    def create_playlist_from_songs(self, playlist_name, songs_by_name, on_chunk_added=None):
+        """Adds the songs as they come, so a playlist can be filled while they're still being found.
+
+        Params:
+            playlist_name (str).
+            songs_by_name (iter(tuple)): each (str) name and ([Song]) its matching songs,
+                e.g. SongScrounger.generate_songs_in_text_file, or find_songs_in_text_file(...).items().
+            on_chunk_added (func|None): see MyMusicLib.add_tracks_to_playlist_in_chunks.
+
+        Returns:
+            (int): number of songs added.
+        """
+        playlist = self.my_music_lib.create_playlist(playlist_name, [])
+        songs = (song for _, matching_songs in songs_by_name for song in matching_songs)
+        return self.my_music_lib.add_tracks_to_playlist_in_chunks(playlist, songs, on_chunk_added)
+
     def create_playlist_based_on_existing_playlist(self, get_playlist, get_new_playlist_name, get_num_tracks_per_album):
         self.duplicate_and_reduce_num_tracks_per_album(
             get_playlist, get_new_playlist_name, get_num_tracks_per_album)
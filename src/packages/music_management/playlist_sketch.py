@@ -0,0 +1,91 @@
+from packages.music_api_clients.models.audio_features import AudioFeatures
+from packages.music_management.quantile_sketch import DEFAULT_SKETCH_SIZE, QuantileSketch
+
+
+# (name, min, max) of each sketched audio feature
+SKETCHED_AUDIO_FEATURES = [
+    ("danceability", AudioFeatures.MIN_DANCEABILITY, AudioFeatures.MAX_DANCEABILITY),
+    ("energy", AudioFeatures.MIN_ENERGY, AudioFeatures.MAX_ENERGY),
+    ("loudness", AudioFeatures.MIN_LOUDNESS, AudioFeatures.MAX_LOUDNESS),
+    ("speechiness", AudioFeatures.MIN_SPEECHINESS, AudioFeatures.MAX_SPEECHINESS),
+    ("acousticness", AudioFeatures.MIN_ACOUSTICNESS, AudioFeatures.MAX_ACOUSTICNESS),
+    ("instrumentalness", AudioFeatures.MIN_INSTRUMENTALNESS, AudioFeatures.MAX_INSTRUMENTALNESS),
+    ("liveness", AudioFeatures.MIN_LIVENESS, AudioFeatures.MAX_LIVENESS),
+    ("valence", AudioFeatures.MIN_VALENCE, AudioFeatures.MAX_VALENCE),
+    ("tempo", AudioFeatures.MIN_TEMPO, AudioFeatures.MAX_TEMPO),
+    ("duration_ms", AudioFeatures.MIN_DURATION_MS, AudioFeatures.MAX_DURATION_MS),
+]
+
+
+class PlaylistSketch:
+    """Streaming summary of the audio features and popularity of any number of tracks.
+
+    Tracks can be added a page at a time and sketches of different playlists can be
+    merged, while memory stays bounded. Representative ranges are the middle quantiles,
+    as in PlaylistAnalyzer, and are available at any point.
+    """
+
+    def __init__(self, sketch_size=DEFAULT_SKETCH_SIZE):
+        self.audio_feature_sketches = {
+            name: QuantileSketch(sketch_size)
+            for name, _, _ in SKETCHED_AUDIO_FEATURES
+        }
+        self.popularity_sketch = QuantileSketch(sketch_size)
+        self.num_tracks = 0
+
+    def add_tracks(self, tracks):
+        "Skips audio features of tracks that don't have them set, and unknown popularities."
+        for track in tracks:
+            self.num_tracks += 1
+            if track.audio_features is not None:
+                for name, sketch in self.audio_feature_sketches.items():
+                    sketch.add(getattr(track.audio_features, name))
+            if track.popularity is not None:
+                self.popularity_sketch.add(track.popularity)
+
+    def merge(self, other):
+        "other (PlaylistSketch) -> (PlaylistSketch) self, now also summarizing other's tracks"
+        for name, sketch in self.audio_feature_sketches.items():
+            sketch.merge(other.audio_feature_sketches[name])
+        self.popularity_sketch.merge(other.popularity_sketch)
+        self.num_tracks += other.num_tracks
+        return self
+
+    def get_num_tracks(self):
+        return self.num_tracks
+
+    def get_popularity_representative_range(self):
+        "Returns (2-tuple): (int, int) min, max; full range if no popularity is known."
+        if len(self.popularity_sketch) == 0:
+            return AudioFeatures.MIN_POPULARITY, AudioFeatures.MAX_POPULARITY
+        min, max = self._get_middle_quantile_min_and_max(
+            self.popularity_sketch,
+            AudioFeatures.MIN_POPULARITY,
+            AudioFeatures.MAX_POPULARITY,
+        )
+        return int(min), int(max)
+
+    def get_audio_feature_representative_range(self):
+        """Same as PlaylistAnalyzer.get_audio_feature_representative_range
+        but for all tracks added so far.
+
+        Returns:
+            (2-tuple): (AudioFeatures, AudioFeatures) min, max.
+        """
+        mins, maxes = AudioFeatures.with_minimum_values(), AudioFeatures.with_maximum_values()
+        if len(self.audio_feature_sketches["danceability"]) <= 1:
+            return mins, maxes
+
+        for name, min, max in SKETCHED_AUDIO_FEATURES:
+            lower_bound, upper_bound = self._get_middle_quantile_min_and_max(
+                self.audio_feature_sketches[name], min, max)
+            setattr(mins, name, lower_bound)
+            setattr(maxes, name, upper_bound)
+        return mins, maxes
+
+    def _get_middle_quantile_min_and_max(self, sketch, min, max):
+        quantiles = sketch.get_quantiles()
+        lower_bound, upper_bound = quantiles[0], quantiles[-1]
+        lower_bound = lower_bound if min <= lower_bound <= max else min
+        upper_bound = upper_bound if min <= upper_bound <= max else max
+        return lower_bound, upper_bound
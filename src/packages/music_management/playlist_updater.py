@@ -1,10 +1,24 @@
+from random import shuffle
+
+from packages.music_management.seed_sync_plan import SeedSyncPlan
+
+
 class PlaylistUpdater:
-    def __init__(self, my_music_lib, music_util, music_api_client, info_logger, playlist_analyzer):
+    def __init__(self, my_music_lib, music_util, music_api_client, info_logger, playlist_analyzer, local_recommender=None, prefer_local_recommendations=False):
+        """
+        Params:
+            local_recommender (LocalRecommender|None): used when the music API has no
+                recommendations to offer.
+            prefer_local_recommendations (bool): if True, only use local_recommender
+                e.g. to work offline.
+        """
         self.my_music_lib = my_music_lib
         self.music_util = music_util
         self.music_api_client = music_api_client
         self.info_logger = info_logger
         self.playlist_analyzer = playlist_analyzer
+        self.local_recommender = local_recommender
+        self.prefer_local_recommendations = prefer_local_recommendations
 
     def create_or_update_all_targets_from_seeds(self, seed_playlists, num_tracks_per_album, get_target_playlist_name):
         """Creates or updates 'target' playlists with songs in source playlists, avoiding uplicates.
@@ -38,23 +52,64 @@ class PlaylistUpdater:
         """
         target_playlist_name = get_target_playlist_name(seed_playlist)
         target_playlist = self.my_music_lib.get_or_create_playlist(target_playlist_name)
-        if target_playlist.get_num_tracks() > 0:
-            current_albums = self.music_util.get_albums_of_tracks(
-                target_playlist.get_tracks())
-        else:
-            current_albums = []
+        plan = self.plan_target_update_from_seed(
+            seed_playlist, target_playlist, num_tracks_per_album)
+        self.apply_seed_sync_plan(plan)
+        return target_playlist, plan.get_num_tracks_to_add()
 
-        seed_albums = self.music_util.get_albums_of_tracks(seed_playlist.get_tracks())
-        albums_to_add = set(seed_albums) - set(current_albums)
+    def plan_target_update_from_seed(self, seed_playlist, target_playlist, num_tracks_per_album):
+        """Diffs seed and target by album ID, using only the tracks already in each
+        playlist. Only albums that are new to the target get fetched.
 
-        if len(albums_to_add) == 0:
-            return target_playlist, 0
+        Params:
+            seed_playlist (Playlist).
+            target_playlist (Playlist).
+            num_tracks_per_album (int).
+
+        Returns:
+            (SeedSyncPlan).
+        """
+        current_album_ids = set(self.music_util.get_album_ids_of_tracks(
+            target_playlist.get_tracks()))
+        album_ids_to_add = [
+            album_id
+            for album_id in self.music_util.get_album_ids_of_tracks(seed_playlist.get_tracks())
+            if album_id not in current_album_ids
+        ]
+        if len(album_ids_to_add) == 0:
+            return SeedSyncPlan(seed_playlist, target_playlist, [], [], [], None)
 
+        albums_to_add = self.music_util.get_albums_by_ids(album_ids_to_add)
         tracks_to_add = self.music_util.get_most_popular_tracks_from_each(
             albums_to_add, num_tracks_per_album)
-        self.my_music_lib.add_tracks_in_random_positions(
-            target_playlist, [track for track in tracks_to_add])
-        return target_playlist, len(tracks_to_add)
+        if target_playlist.get_num_tracks() == 0:
+            shuffle(tracks_to_add)
+            positions = None
+        else:
+            positions = self.my_music_lib.get_random_positions(
+                target_playlist.get_num_tracks(), len(tracks_to_add))
+        return SeedSyncPlan(
+            seed_playlist,
+            target_playlist,
+            album_ids_to_add,
+            albums_to_add,
+            tracks_to_add,
+            positions,
+        )
+
+    def apply_seed_sync_plan(self, plan):
+        "plan (SeedSyncPlan) -> (int) number of tracks added to the target playlist"
+        if plan.is_empty():
+            return 0
+
+        self.info_logger(f"Adding {plan.get_num_tracks_to_add()} tracks from {len(plan.albums_to_add)} new album(s) to '{plan.target_playlist.name}'")
+        if plan.positions is None:
+            self.my_music_lib.add_tracks_to_playlist(
+                plan.target_playlist, plan.tracks_to_add)
+        else:
+            self.my_music_lib.add_tracks_at_positions(
+                plan.target_playlist, plan.tracks_to_add, plan.positions)
+        return plan.get_num_tracks_to_add()
 
     def add_tracks_from_my_saved_albums_with_same_genres(self, playlist, get_num_tracks_per_album, get_num_albums_to_fetch):
         "Returns (int) number of tracks added to playlist"
@@ -94,6 +149,19 @@ class PlaylistUpdater:
         self._add_recommended_songs_that_match_lenient_criteria(
             playlist, get_num_songs_to_add)
 
+    def get_recommended_tracks_with_similar_attributes(self, playlist):
+        """
+        Params:
+            playlist (Playlist).
+
+        Returns:
+            recommended_tracks_by_percentage (dict): see MusicUtil.get_recommendations_based_on_tracks.
+        """
+        self.music_util.populate_track_audio_features(playlist)
+        song_attribute_ranges = self.music_util.get_lenient_song_attribute_ranges(playlist)
+        return self.music_util.get_recommendations_based_on_tracks(
+            playlist.get_tracks(), song_attribute_ranges)
+
     def add_recommended_songs(self, playlist, song_attribute_ranges, get_num_songs_to_add):
         """
         Params:
@@ -102,16 +170,15 @@ class PlaylistUpdater:
         Returns:
             (int): number of recommended songs added.
         """
-        self.info_logger("Getting recommendations..")
-        recommended_tracks_by_percentage = self.music_util.get_recommendations_based_on_tracks(
-            playlist.get_tracks(), song_attribute_ranges)
-
-        highly_recommended_tracks = []
-        for recommended_percentage, recommended_tracks in recommended_tracks_by_percentage.items():
-            if recommended_percentage < 0.5:
-                self.info_logger(f"Ignoring {len(recommended_tracks)} recommendations because they're not highly recommended.")
-            else:
-                highly_recommended_tracks.extend(recommended_tracks)
+        highly_recommended_tracks, other_recommended_tracks = [], []
+        if not self.prefer_local_recommendations:
+            highly_recommended_tracks, other_recommended_tracks = self._get_highly_recommended_tracks(
+                playlist, song_attribute_ranges)
+        if self.local_recommender is not None:
+            self.local_recommender.index_tracks(playlist.get_tracks())
+        if len(highly_recommended_tracks) == 0 and self.local_recommender is not None:
+            highly_recommended_tracks = self._get_local_recommendations(
+                playlist, song_attribute_ranges, other_recommended_tracks)
 
         if len(highly_recommended_tracks) == 0:
             self.info_logger("Sorry, couldn't find recommendations to add :(")
@@ -124,6 +191,31 @@ class PlaylistUpdater:
         self.music_api_client.add_tracks(playlist, highly_recommended_tracks)
         return num_tracks_to_add
 
+    def _get_highly_recommended_tracks(self, playlist, song_attribute_ranges):
+        """
+        Returns:
+            (tuple): ([Track]) highly recommended tracks, and ([Track]) the other recommended ones.
+        """
+        self.info_logger("Getting recommendations..")
+        recommended_tracks_by_percentage = self.music_util.get_recommendations_based_on_tracks(
+            playlist.get_tracks(), song_attribute_ranges)
+
+        highly_recommended_tracks, other_recommended_tracks = [], []
+        for recommended_percentage, recommended_tracks in recommended_tracks_by_percentage.items():
+            if recommended_percentage < 0.5:
+                self.info_logger(f"Ignoring {len(recommended_tracks)} recommendations because they're not highly recommended.")
+                other_recommended_tracks.extend(recommended_tracks)
+            else:
+                highly_recommended_tracks.extend(recommended_tracks)
+        return highly_recommended_tracks, other_recommended_tracks
+
+    def _get_local_recommendations(self, playlist, song_attribute_ranges, other_recommended_tracks):
+        # only worth their audio features now that they may be recommended after all
+        self.local_recommender.index_tracks_with_audio_features(self.music_api_client, other_recommended_tracks)
+        self.info_logger(f"Looking for recommendations among {self.local_recommender.get_num_tracks()} tracks I've seen before..")
+        return self.local_recommender.get_recommendations_based_on_tracks(
+            playlist.get_tracks(), song_attribute_ranges)
+
     def _add_recommended_songs_that_match_strict_criteria(self, playlist, get_num_songs_to_add):
         song_attribute_ranges = self.music_util.get_strict_song_attribute_ranges(
             playlist, self.playlist_analyzer)
@@ -175,20 +267,16 @@ class PlaylistUpdater:
         return tracks
 
     def _get_my_albums_with_same_genres(self, genres, get_num_albums_to_fetch):
-        genre_matching_criteria = lambda playlist_genres, candidate_genres: set(playlist_genres) == set(candidate_genres)
-        return self._get_my_matching_albums(genres, get_num_albums_to_fetch, genre_matching_criteria)
+        return self._get_my_matching_albums(genres, get_num_albums_to_fetch, superset=False)
 
     def _get_my_albums_with_superset_genres(self, genres, get_num_albums_to_fetch):
-        genre_matching_criteria = lambda playlist_genres, candidate_genres: set(playlist_genres) <= set(candidate_genres)
-        return self._get_my_matching_albums(genres, get_num_albums_to_fetch, genre_matching_criteria)
-
-    def _get_my_matching_albums(self, genres, get_num_albums_to_fetch, genre_matching_criteria):
-        album_groups = self.my_music_lib.get_my_albums_grouped_by_genre(
-            get_num_albums_to_fetch(), len(genres))
-        for group in album_groups:
-            if genre_matching_criteria(genres, group['genres']):
-                self.info_logger(f"Good news! I found {len(group['albums'])} album(s) matching your playlist's genres:")
-                self.info_logger(self.music_util.get_albums_as_readable_list(group['albums']))
-                return group['albums']
+        return self._get_my_matching_albums(genres, get_num_albums_to_fetch, superset=True)
+
+    def _get_my_matching_albums(self, genres, get_num_albums_to_fetch, superset):
+        albums = self.my_music_lib.find_my_albums_with_genres(genres, get_num_albums_to_fetch(), superset)
+        if len(albums) > 0:
+            self.info_logger(f"Good news! I found {len(albums)} album(s) matching your playlist's genres:")
+            self.info_logger(self.music_util.get_albums_as_readable_list(albums))
+            return albums
         self.info_logger("Sorry, I couldn't find any albums matching your playlist's genres :(")
         return []
\ No newline at end of file
@@ -0,0 +1,119 @@
+from random import Random
+
+
+DEFAULT_SKETCH_SIZE = 200
+# capacity of each lower level shrinks by this factor, as in the KLL paper
+LEVEL_CAPACITY_DECAY = 2 / 3
+MIN_LEVEL_CAPACITY = 2
+
+
+class QuantileSketch:
+    """KLL sketch: keeps an approximate, mergeable summary of a stream of numbers in
+    bounded memory, no matter how many numbers are added.
+
+    Values are kept in levels. An item at level h stands for 2**h of the original values.
+    When a level fills up, it is sorted and every other item is promoted to the next level.
+    Until the first level fills up, no values are dropped and quantiles are exact.
+    """
+
+    def __init__(self, size=DEFAULT_SKETCH_SIZE, seed=None):
+        """
+        Params:
+            size (int): larger sizes are more accurate and use more memory.
+            seed (int|None): for reproducible compaction.
+        """
+        self.size = size
+        self.levels = [[]]
+        self.num_values = 0
+        self._random = Random(seed)
+
+    def __len__(self):
+        return self.num_values
+
+    def add(self, value):
+        self.levels[0].append(value)
+        self.num_values += 1
+        if len(self.levels[0]) >= self._get_level_capacity(0):
+            self._compact()
+
+    def add_all(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        "Adds all values summarized by other (QuantileSketch) to this sketch."
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.num_values += other.num_values
+        self._compact()
+        return self
+
+    def get_quantiles(self, n=4):
+        """Cut points dividing the values into n intervals of equal probability.
+
+        Uses the same method as statistics.quantiles, so the results are identical
+        while the sketch is still exact.
+
+        Returns:
+            ([float]): n-1 cut points; empty if no values were added.
+        """
+        items = self._get_weighted_items()
+        if len(items) == 0:
+            return []
+        if self.num_values == 1:
+            return [items[0][0]] * (n - 1)
+
+        value_at_rank = self._get_rank_lookup(items)
+        num_values, cut_points = self.num_values, []
+        for i in range(1, n):
+            j = i * (num_values + 1) // n
+            j = 1 if j < 1 else num_values - 1 if j > num_values - 1 else j
+            delta = i * (num_values + 1) - j * n
+            cut_points.append(
+                (value_at_rank(j) * (n - delta) + value_at_rank(j + 1) * delta) / n)
+        return cut_points
+
+    def _get_rank_lookup(self, items):
+        "Returns a function of (int) 1-based rank, returning the value at that rank."
+        cumulative_weights, total_weight = [], 0
+        for _, weight in items:
+            total_weight += weight
+            cumulative_weights.append(total_weight)
+
+        def value_at_rank(rank):
+            low, high = 0, len(cumulative_weights) - 1
+            while low < high:
+                middle = (low + high) // 2
+                if cumulative_weights[middle] < rank:
+                    low = middle + 1
+                else:
+                    high = middle
+            return items[low][0]
+        return value_at_rank
+
+    def _get_weighted_items(self):
+        return sorted(
+            (value, 2 ** level)
+            for level, items in enumerate(self.levels)
+            for value in items
+        )
+
+    def _get_level_capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(MIN_LEVEL_CAPACITY, int(self.size * LEVEL_CAPACITY_DECAY ** depth))
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) >= self._get_level_capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items = sorted(self.levels[level])
+                # an odd item out stays behind so no weight is lost
+                leftover = [items.pop()] if len(items) % 2 == 1 else []
+                offset = self._random.randint(0, 1)
+                self.levels[level + 1].extend(items[offset::2])
+                self.levels[level] = leftover
+            level += 1
@@ -0,0 +1,25 @@
+class SeedSyncPlan:
+    def __init__(self, seed_playlist, target_playlist, album_ids_to_add, albums_to_add, tracks_to_add, positions):
+        """Describes the changes needed to bring a target playlist up to date with its seed.
+
+        Params:
+            seed_playlist (Playlist).
+            target_playlist (Playlist).
+            album_ids_to_add ([str]): Spotify IDs of albums in the seed but not in the target.
+            albums_to_add ([Album]): hydrated albums, one per ID in album_ids_to_add.
+            tracks_to_add ([Track]): tracks to insert, in insertion order.
+            positions ([int]|None): position of each track in tracks_to_add, applied in order;
+                None if the tracks should simply be appended e.g. because the target is empty.
+        """
+        self.seed_playlist = seed_playlist
+        self.target_playlist = target_playlist
+        self.album_ids_to_add = album_ids_to_add
+        self.albums_to_add = albums_to_add
+        self.tracks_to_add = tracks_to_add
+        self.positions = positions
+
+    def is_empty(self):
+        return len(self.tracks_to_add) == 0
+
+    def get_num_tracks_to_add(self):
+        return len(self.tracks_to_add)
@@ -0,0 +1,126 @@
+import math
+import re
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from packages.music_management.track_feature_matrix import NUM_DIMENSIONS
+
+
+DEFAULT_NUM_BUCKETS = 64
+NON_ZERO_BYTE = re.compile(b"[^\x00]")
+
+
+class SongAttributeRangeIndex:
+    """Answers "which known tracks fall within these SongAttributeRanges" from memory.
+
+    Each dimension of the TrackFeatureMatrix is kept as a sorted column, cut into
+    buckets. For every bucket boundary there is a bitmap (a Python int) of all rows
+    in the buckets before it, so the rows of any run of buckets is the XOR of two
+    bitmaps. A query intersects one such bitmap per dimension, then checks only the
+    surviving rows against the exact ranges.
+
+    The index is rebuilt on the next query after tracks are added to the matrix, or their values change.
+    """
+
+    def __init__(self, feature_matrix, num_buckets=DEFAULT_NUM_BUCKETS):
+        self.feature_matrix = feature_matrix
+        self.num_buckets = num_buckets
+        self._version_indexed = None
+        self._columns = []
+
+    def query(self, song_attribute_ranges, limit=None):
+        """
+        Params:
+            song_attribute_ranges (SongAttributeRanges).
+            limit (int|None): max number of tracks to return.
+
+        Returns:
+            ([Track]): tracks within all of the ranges, closest to the centre of the ranges first.
+        """
+        bounds = self.feature_matrix.get_bounds(song_attribute_ranges)
+        centre = [(min_value + max_value) / 2 for min_value, max_value in bounds]
+        rows = self._get_rows_in_bounds(bounds)
+        rows.sort(key=lambda row: self.feature_matrix.get_distance(row, centre))
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.feature_matrix.get_track(row) for row in rows]
+
+    def get_rows_in_ranges(self, song_attribute_ranges):
+        "Returns ([int]) matrix rows within all of the ranges, in row order."
+        return self._get_rows_in_bounds(
+            self.feature_matrix.get_bounds(song_attribute_ranges))
+
+    def _get_rows_in_bounds(self, bounds):
+        self._build_if_stale()
+        if len(self.feature_matrix) == 0:
+            return []
+
+        candidates = -1
+        for dimension, (min_value, max_value) in enumerate(bounds):
+            candidates &= self._columns[dimension].get_candidate_bitmap(min_value, max_value)
+            if candidates == 0:
+                return []
+        return [
+            row
+            for row in self._get_set_bits(candidates)
+            if self.feature_matrix.is_in_bounds(row, bounds)
+        ]
+
+    def _get_set_bits(self, bitmap):
+        bitmap_bytes = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+        for match in NON_ZERO_BYTE.finditer(bitmap_bytes):
+            byte_index, byte = match.start(), bitmap_bytes[match.start()]
+            for bit in range(8):
+                if byte & (1 << bit):
+                    yield byte_index * 8 + bit
+
+    def _build_if_stale(self):
+        if self._version_indexed == self.feature_matrix.version:
+            return
+        self._columns = [
+            _SortedColumn(self.feature_matrix, dimension, self.num_buckets)
+            for dimension in range(NUM_DIMENSIONS)
+        ]
+        self._version_indexed = self.feature_matrix.version
+
+
+class _SortedColumn:
+    def __init__(self, feature_matrix, dimension, num_buckets):
+        num_rows = len(feature_matrix)
+        rows_with_values, unknown_rows = [], []
+        for row in range(num_rows):
+            value = feature_matrix.get_value(row, dimension)
+            if math.isnan(value):
+                unknown_rows.append(row)
+            else:
+                rows_with_values.append((value, row))
+        rows_with_values.sort()
+
+        self.values = array('f', [value for value, _ in rows_with_values])
+        # rows with unknown values are always candidates
+        self.unknown_rows_bitmap = self._to_bitmap(unknown_rows, num_rows)
+        self.bucket_size = max(1, math.ceil(len(rows_with_values) / num_buckets))
+        self.bitmaps_before_bucket = [0]
+        for bucket_start in range(0, len(rows_with_values), self.bucket_size):
+            bucket_bitmap = self._to_bitmap(
+                [row for _, row in rows_with_values[bucket_start:bucket_start+self.bucket_size]],
+                num_rows,
+            )
+            self.bitmaps_before_bucket.append(self.bitmaps_before_bucket[-1] | bucket_bitmap)
+
+    def _to_bitmap(self, rows, num_rows):
+        bitmap_bytes = bytearray((num_rows + 7) // 8)
+        for row in rows:
+            bitmap_bytes[row // 8] |= 1 << (row % 8)
+        return int.from_bytes(bitmap_bytes, "little")
+
+    def get_candidate_bitmap(self, min_value, max_value):
+        "Returns (int) bitmap of a superset of the rows with values within [min_value, max_value]."
+        start, end = bisect_left(self.values, min_value), bisect_right(self.values, max_value)
+        if start >= end:
+            return self.unknown_rows_bitmap
+        first_bucket, last_bucket = start // self.bucket_size, (end - 1) // self.bucket_size
+        return (
+            self.bitmaps_before_bucket[last_bucket + 1] ^ self.bitmaps_before_bucket[first_bucket]
+        ) | self.unknown_rows_bitmap
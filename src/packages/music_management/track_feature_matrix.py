@@ -0,0 +1,192 @@
+import math
+import pickle
+
+from array import array
+
+from packages.music_api_clients.models.audio_features import AudioFeatures
+
+
+# (name, min, max) of every dimension, in column order.
+# Values are scaled to [0,1] using min and max so that no dimension dominates distances.
+FEATURE_DIMENSIONS = [
+    ("danceability", AudioFeatures.MIN_DANCEABILITY, AudioFeatures.MAX_DANCEABILITY),
+    ("energy", AudioFeatures.MIN_ENERGY, AudioFeatures.MAX_ENERGY),
+    ("loudness", AudioFeatures.MIN_LOUDNESS, AudioFeatures.MAX_LOUDNESS),
+    ("speechiness", AudioFeatures.MIN_SPEECHINESS, AudioFeatures.MAX_SPEECHINESS),
+    ("acousticness", AudioFeatures.MIN_ACOUSTICNESS, AudioFeatures.MAX_ACOUSTICNESS),
+    ("instrumentalness", AudioFeatures.MIN_INSTRUMENTALNESS, AudioFeatures.MAX_INSTRUMENTALNESS),
+    ("liveness", AudioFeatures.MIN_LIVENESS, AudioFeatures.MAX_LIVENESS),
+    ("valence", AudioFeatures.MIN_VALENCE, AudioFeatures.MAX_VALENCE),
+    ("tempo", AudioFeatures.MIN_TEMPO, AudioFeatures.MAX_TEMPO),
+    ("duration_ms", AudioFeatures.MIN_DURATION_MS, AudioFeatures.MAX_DURATION_MS),
+    ("popularity", AudioFeatures.MIN_POPULARITY, AudioFeatures.MAX_POPULARITY),
+]
+NUM_DIMENSIONS = len(FEATURE_DIMENSIONS)
+POPULARITY_DIMENSION = NUM_DIMENSIONS - 1
+
+
+class TrackFeatureMatrix:
+    """Keeps the audio features and popularity of tracks in one compact float32
+    array, one row per track. Rows are scaled to [0,1] per dimension.
+
+    A track with unknown popularity gets NaN in that column.
+    """
+
+    def __init__(self):
+        self.values = array('f')
+        self.tracks = []
+        self.row_by_track_id = dict()
+        # bumped whenever a row is added or its values change, so indexes over the rows know they're stale
+        self.version = 0
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def add_tracks(self, tracks):
+        """Skips tracks without audio features.
+
+        Returns:
+            (int): number of tracks added or updated.
+        """
+        num_added = 0
+        for track in tracks:
+            if self.add_track(track):
+                num_added += 1
+        return num_added
+
+    def add_track(self, track):
+        "Returns (bool) whether the track was added or updated."
+        vector = self.get_vector(track)
+        if vector is None:
+            return False
+
+        row = self.row_by_track_id.get(track.spotify_id)
+        if row is None:
+            self.row_by_track_id[track.spotify_id] = len(self.tracks)
+            self.tracks.append(track)
+            self.values.extend(vector)
+            self.version += 1
+            return True
+
+        self.tracks[row] = track
+        start, values = row * NUM_DIMENSIONS, array('f', vector)
+        # compared as bytes, as NaN popularity never equals itself
+        if self.values[start:start+NUM_DIMENSIONS].tobytes() != values.tobytes():
+            self.values[start:start+NUM_DIMENSIONS] = values
+            self.version += 1
+        return True
+
+    def contains(self, track):
+        return track.spotify_id in self.row_by_track_id
+
+    def get_track(self, row):
+        return self.tracks[row]
+
+    def get_value(self, row, dimension):
+        return self.values[row * NUM_DIMENSIONS + dimension]
+
+    def get_row(self, row):
+        start = row * NUM_DIMENSIONS
+        return self.values[start:start+NUM_DIMENSIONS]
+
+    def get_vector(self, track):
+        """
+        Returns:
+            ([float]|None): scaled values in column order, or None if the track
+                has no audio features.
+        """
+        if track.audio_features is None:
+            return None
+
+        vector = [
+            self.scale(dimension, getattr(track.audio_features, name))
+            for dimension, (name, _, _) in enumerate(FEATURE_DIMENSIONS[:POPULARITY_DIMENSION])
+        ]
+        vector.append(
+            math.nan
+            if track.popularity is None
+            else self.scale(POPULARITY_DIMENSION, track.popularity)
+        )
+        return vector
+
+    def get_centroid(self, tracks):
+        """Averages the scaled vectors of the given tracks, ignoring unknown values.
+
+        Returns:
+            ([float]|None): None if none of the tracks have audio features.
+        """
+        sums, counts = [0.0] * NUM_DIMENSIONS, [0] * NUM_DIMENSIONS
+        for track in tracks:
+            vector = self.get_vector(track)
+            if vector is None:
+                continue
+            for dimension, value in enumerate(vector):
+                if not math.isnan(value):
+                    sums[dimension] += value
+                    counts[dimension] += 1
+        if counts[0] == 0:
+            return None
+        return [
+            sums[dimension] / counts[dimension] if counts[dimension] > 0 else math.nan
+            for dimension in range(NUM_DIMENSIONS)
+        ]
+
+    def get_bounds(self, song_attribute_ranges):
+        """
+        Params:
+            song_attribute_ranges (SongAttributeRanges).
+
+        Returns:
+            ([(float, float)]): scaled (min, max) of every dimension, in column order.
+                Rounded to float32 like the rows so that values on the bounds still match.
+        """
+        bounds = array('f')
+        for dimension, (name, _, _) in enumerate(FEATURE_DIMENSIONS):
+            min_value, max_value = getattr(song_attribute_ranges, f"{name}_range")
+            bounds.append(self.scale(dimension, min_value))
+            bounds.append(self.scale(dimension, max_value))
+        return [
+            (bounds[2 * dimension], bounds[2 * dimension + 1])
+            for dimension in range(NUM_DIMENSIONS)
+        ]
+
+    def scale(self, dimension, value):
+        _, min_value, max_value = FEATURE_DIMENSIONS[dimension]
+        return (value - min_value) / (max_value - min_value)
+
+    def get_distance(self, row, vector):
+        "Euclidean distance between a row and a scaled vector, skipping unknown values."
+        start, squared_distance = row * NUM_DIMENSIONS, 0.0
+        for dimension in range(NUM_DIMENSIONS):
+            difference = self.values[start + dimension] - vector[dimension]
+            if not math.isnan(difference):
+                squared_distance += difference * difference
+        return math.sqrt(squared_distance)
+
+    def is_in_bounds(self, row, bounds):
+        "Unknown values are considered in bounds."
+        start = row * NUM_DIMENSIONS
+        for dimension, (min_value, max_value) in enumerate(bounds):
+            value = self.values[start + dimension]
+            if value < min_value or value > max_value:
+                return False
+        return True
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(
+                {"tracks": self.tracks, "values": self.values.tobytes()},
+                f,
+            )
+
+    def load(path):
+        with open(path, "rb") as f:
+            contents = pickle.load(f)
+        matrix = TrackFeatureMatrix()
+        matrix.tracks = contents["tracks"]
+        matrix.values.frombytes(contents["values"])
+        matrix.row_by_track_id = {
+            track.spotify_id: row
+            for row, track in enumerate(matrix.tracks)
+        }
+        return matrix
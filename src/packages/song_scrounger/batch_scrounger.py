@@ -0,0 +1,103 @@
+import glob
+import os
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from .song_scrounger import SongScrounger
+from .util import read_file_contents
+
+
+# for the RateLimiter of the Spotify client that looks names up
+MAX_API_CALLS_PER_SECOND = 10
+
+
+class BatchScrounger:
+    """Scrounges many text files at once.
+
+    Parsing the files and disambiguating their names are pure CPU work, so they run
+    on a pool of processes. In between, the distinct names of all files are looked up
+    once, in this process. To limit the rate of those lookups, give the Spotify client
+    a RateLimiter: then only requests that reach the API wait, not cached searches.
+    """
+
+    def __init__(self, song_scrounger, max_processes=None):
+        """
+        Params:
+            song_scrounger (SongScrounger): used for the lookups.
+            max_processes (int|None): defaults to the number of CPUs.
+        """
+        self.song_scrounger = song_scrounger
+        self.max_processes = max_processes
+
+    def find_songs_in_text_files(self, path_or_glob):
+        "Same as SongScrounger.find_songs_in_text_file, but for every file matching path_or_glob."
+        return self.find_media_items_in_text_files(
+            get_file_paths(path_or_glob), self.song_scrounger.spotify_client.get_matching_tracks)
+
+    def find_albums_in_text_files(self, path_or_glob):
+        "Same as SongScrounger.find_albums_in_text_file, but for every file matching path_or_glob."
+        return self.find_media_items_in_text_files(
+            get_file_paths(path_or_glob), self.song_scrounger.spotify_client.get_matching_albums)
+
+    def find_media_items_in_text_files(self, file_paths, name_lookup):
+        """
+        Params:
+            file_paths ([str]).
+            name_lookup (func): given a name (str), returns matching media items.
+
+        Returns:
+            (dict): key (str) is name; val (list(Song|Album)) of matching media items,
+                from all files, without duplicates.
+        """
+        if len(file_paths) == 0:
+            return dict()
+
+        with ProcessPoolExecutor(max_workers=self.max_processes) as executor:
+            names_by_file = list(executor.map(find_names_in_file, file_paths))
+            media_items_by_name = self.song_scrounger.look_up_names(
+                [name for names in names_by_file for name in names], name_lookup)
+            results_by_file = executor.map(
+                find_media_items_in_file,
+                file_paths,
+                [
+                    {name: media_items_by_name[name] for name in names}
+                    for names in names_by_file
+                ],
+            )
+            return merge_results(results_by_file)
+
+
+def get_file_paths(path_or_glob):
+    "Returns ([str]): the text files in the directory, or the files matching the glob, sorted."
+    if os.path.isdir(path_or_glob):
+        path_or_glob = os.path.join(path_or_glob, "*.txt")
+    return sorted(path for path in glob.glob(path_or_glob) if os.path.isfile(path))
+
+def merge_results(results_by_file):
+    "Returns (dict): key (str) is name; val (list) of the media items found for it in any file."
+    merged = defaultdict(set)
+    for results in results_by_file:
+        for name, media_items in results.items():
+            merged[name] |= set(media_items)
+    return {name: list(media_items) for name, media_items in merged.items()}
+
+def find_names_in_file(file_path):
+    "Runs in a worker process. Returns ([str]): distinct names in the file, in order."
+    song_scrounger = SongScrounger(None)
+    text = read_file_contents(file_path)
+    return list(dict.fromkeys(
+        name
+        for paragraph in song_scrounger._get_paragraphs(text)
+        for name in song_scrounger.find_names(paragraph)
+    ))
+
+def find_media_items_in_file(file_path, media_items_by_name):
+    """Runs in a worker process.
+
+    Params:
+        file_path (str).
+        media_items_by_name (dict): key (str) is name; val is what name lookup returned for it.
+    """
+    text = read_file_contents(file_path)
+    return dict(SongScrounger(None).find_media_items(text, media_items_by_name.__getitem__))
@@ -0,0 +1,99 @@
+from collections import deque
+from string import ascii_letters
+
+
+LETTERS = frozenset(ascii_letters)
+
+
+class MentionMatcher:
+    """Aho-Corasick automaton over a fixed set of lowercase words.
+
+    Scanning a text finds every one of the words that occurs in it, but not as a
+    substring of another word, in a single pass over the text, no matter how many
+    words there are. Same notion of occurrence as SongScrounger.find_occurrences.
+    """
+
+    def __init__(self, words):
+        """
+        Params:
+            words (iter(str)): lowercase. Empty words are left out.
+        """
+        self.words = set()
+        self._transitions = [dict()]
+        self._words_ending_at = [[]]
+        for word in words:
+            if len(word) > 0:
+                self._add_word(word)
+        self._add_failure_transitions()
+
+    def scan(self, text):
+        """
+        Params:
+            text (str): e.g. "Hello, how are you?".
+
+        Returns:
+            (MentionScan): of the words found in text.lower().
+        """
+        lowered_text = text.lower()
+        found_words, state, text_length = set(), 0, len(lowered_text)
+        for end, char in enumerate(lowered_text):
+            state = self._next_state(state, char)
+            for word in self._words_ending_at[state]:
+                start = end - len(word) + 1
+                if (
+                    (start == 0 or lowered_text[start-1] not in LETTERS) and
+                    (end + 1 == text_length or lowered_text[end+1] not in LETTERS)
+                ):
+                    found_words.add(word)
+        return MentionScan(text, lowered_text, self.words, found_words)
+
+    def _add_word(self, word):
+        state = 0
+        for char in word:
+            next_state = self._transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self._transitions)
+                self._transitions[state][char] = next_state
+                self._transitions.append(dict())
+                self._words_ending_at.append([])
+            state = next_state
+        if word not in self.words:
+            self._words_ending_at[state].append(word)
+            self.words.add(word)
+
+    def _add_failure_transitions(self):
+        self._failure = [0] * len(self._transitions)
+        states = deque(self._transitions[0].values())
+        while len(states) > 0:
+            state = states.popleft()
+            for char, next_state in self._transitions[state].items():
+                states.append(next_state)
+                failure = self._next_state(self._failure[state], char)
+                self._failure[next_state] = failure
+                # a word ending here also ends every word that is a suffix of it
+                self._words_ending_at[next_state] = (
+                    self._words_ending_at[next_state] + self._words_ending_at[failure])
+
+    def _next_state(self, state, char):
+        while True:
+            next_state = self._transitions[state].get(char)
+            if next_state is not None:
+                return next_state
+            if state == 0:
+                return 0
+            state = self._failure[state]
+
+
+class MentionScan:
+    def __init__(self, text, lowered_text, scanned_words, found_words):
+        self.text = text
+        self.lowered_text = lowered_text
+        self.scanned_words = scanned_words
+        self.found_words = found_words
+
+    def has_answer(self, word, lowered_text):
+        "True iff this scan can tell whether word occurs in lowered_text."
+        return lowered_text is self.lowered_text and word in self.scanned_words
+
+    def contains(self, word):
+        return word in self.found_words
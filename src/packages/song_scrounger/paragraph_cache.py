@@ -0,0 +1,103 @@
+import hashlib
+import os
+import pickle
+
+
+class ParagraphCache:
+    """Remembers what was scrounged from each paragraph of a text file, by a hash of the
+    paragraph's content, on disk next to the file. Re-scrounging the file after an edit
+    then only redoes the paragraphs that changed.
+
+    What is found in a paragraph also depends on which artists are mentioned in the rest of
+    the text. So each entry remembers the artists of the media items its names matched, and
+    which of them were mentioned in the text; it is only reused if the same ones still are.
+    """
+
+    def __init__(self, path=None):
+        """
+        Params:
+            path (str|None): where to save to; not saved if None.
+        """
+        self.path = path
+        self.entries = dict()
+        self.num_reused = 0
+        self.num_recomputed = 0
+        self._used_keys = set()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_path(input_file_path, kind):
+        """
+        Params:
+            input_file_path (str): e.g. "newsletter.txt".
+            kind (str): e.g. "songs".
+
+        Returns:
+            (str): e.g. "newsletter.txt.scrounged_songs.pickle".
+        """
+        return f"{input_file_path}.scrounged_{kind}.pickle"
+
+    def get_key(self, paragraph):
+        return hashlib.sha256(paragraph.encode("utf-8")).hexdigest()
+
+    def get(self, paragraph, is_mentioned):
+        """
+        Params:
+            paragraph (str).
+            is_mentioned (func): given an artist name (str), whether it is mentioned in the text.
+
+        Returns:
+            (dict|None): key (str) is name; val (list(Song|Album)) of matching media items.
+                None if the paragraph is new, or if the artists mentioned in the text changed.
+        """
+        key = self.get_key(paragraph)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        media_items_by_name, artist_names, mentioned_artist_names = entry
+        if self._get_mentioned(artist_names, is_mentioned) != mentioned_artist_names:
+            return None
+        self._used_keys.add(key)
+        self.num_reused += 1
+        return media_items_by_name
+
+    def set(self, paragraph, media_items_by_name, artist_names, is_mentioned):
+        """
+        Params:
+            paragraph (str).
+            media_items_by_name (dict): key (str) is name; val (list(Song|Album)) found for it.
+            artist_names (set(str)): of all media items the names matched, before disambiguation.
+            is_mentioned (func): given an artist name (str), whether it is mentioned in the text.
+        """
+        key = self.get_key(paragraph)
+        artist_names = frozenset(artist_names)
+        self.entries[key] = (
+            dict(media_items_by_name),
+            artist_names,
+            self._get_mentioned(artist_names, is_mentioned),
+        )
+        self._used_keys.add(key)
+        self.num_recomputed += 1
+
+    def save(self):
+        "Saves only the paragraphs used since loading, so removed paragraphs don't pile up."
+        if self.path is None:
+            return
+        entries = {key: self.entries[key] for key in self._used_keys}
+        # write then rename, so an interrupted save doesn't lose the cache
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(entries, f)
+        os.replace(temp_path, self.path)
+
+    def load(path):
+        "Returns (ParagraphCache): empty if there's nothing at path yet."
+        paragraph_cache = ParagraphCache(path)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                paragraph_cache.entries = pickle.load(f)
+        return paragraph_cache
+
+    def _get_mentioned(self, artist_names, is_mentioned):
+        return frozenset(artist_name for artist_name in artist_names if is_mentioned(artist_name))
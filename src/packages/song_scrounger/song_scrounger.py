@@ -1,24 +1,118 @@
-import re
+import contextvars
+import os
 
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
+from itertools import islice
 
-from .util import read_file_contents
+from .mention_matcher import MentionMatcher
+from .paragraph_cache import ParagraphCache
+from .text_token_index import TextTokenIndex
+from .tokenizer import find_occurrences, find_quoted_tokens, to_name
+from .util import MAX_CHARS, get_paragraphs_in_context, read_file_contents, read_paragraphs
+
+
+MAX_CONCURRENT_LOOKUPS = 8
+LOOKUP_CACHE_SIZE = 1000
+# paragraphs before and after each paragraph to look for artists in, when streaming
+DOCUMENT_CONTEXT_SIZE = 20
+PARAGRAPHS_PER_LOOKUP_BATCH = 100
+SYNONYMS = [{"and", "&"}]
+PARTIAL_MENTION_SEPARATORS = ["and", "&", "band"]
 
 
 class SongScrounger:
-    def __init__(self, spotify_client):
+    def __init__(self, spotify_client, stop_searching_once_artist_mentioned=False):
+        """
+        Params:
+            spotify_client (Spotify).
+            stop_searching_once_artist_mentioned (bool): whether to stop paging through
+                song search results once a song by an artist mentioned in the text is found.
+                Faster, but may miss versions by other mentioned artists.
+        """
         self.spotify_client = spotify_client
+        self.stop_searching_once_artist_mentioned = stop_searching_once_artist_mentioned
+        self._mention_scan = None
+        self._text_index = None
+        self._lookup_cache = OrderedDict()
 
-    def find_songs_in_text_file(self, input_file_path):
-        text = read_file_contents(input_file_path)
-        songs = self.find_media_items(text, self.spotify_client.get_matching_tracks)
-        return songs
+    def find_songs_in_text_file(self, input_file_path, incremental=False):
+        """
+        Params:
+            input_file_path (str).
+            incremental (bool): whether to remember what was found in each paragraph,
+                in a file next to the input, and only redo changed paragraphs next time.
+        """
+        return self._find_media_items_in_text_file(
+            input_file_path,
+            self.spotify_client.get_matching_tracks,
+            "songs",
+            incremental,
+            stop_when_artist_mentioned=self.stop_searching_once_artist_mentioned,
+        )
+
+    def find_albums_in_text_file(self, input_file_path, incremental=False):
+        "Same as find_songs_in_text_file, but for albums."
+        return self._find_media_items_in_text_file(
+            input_file_path,
+            self.spotify_client.get_matching_albums,
+            "albums",
+            incremental,
+        )
 
-    def find_albums_in_text_file(self, input_file_path):
+    def _find_media_items_in_text_file(self, input_file_path, name_lookup, kind, incremental, stop_when_artist_mentioned=False):
         text = read_file_contents(input_file_path)
-        albums = self.find_media_items(text, self.spotify_client.get_matching_albums)
-        return albums
+        if not incremental:
+            return self.find_media_items(text, name_lookup, stop_when_artist_mentioned)
+
+        paragraph_cache = ParagraphCache.load(ParagraphCache.get_path(input_file_path, kind))
+        media_items = self.find_media_items(text, name_lookup, stop_when_artist_mentioned, paragraph_cache)
+        paragraph_cache.save()
+        return media_items
+
+    def find_songs_in_large_text_file(self, input_file_path, context_size=DOCUMENT_CONTEXT_SIZE):
+        """Same as find_songs_in_text_file, but reads the file lazily, so it can be any size.
+        Artists are looked for in the context_size paragraphs around each song name,
+        rather than in the whole text.
+        """
+        return self.find_media_items_in_paragraphs(
+            read_paragraphs(input_file_path),
+            self.spotify_client.get_matching_tracks,
+            context_size,
+        )
+
+    def find_albums_in_large_text_file(self, input_file_path, context_size=DOCUMENT_CONTEXT_SIZE):
+        "Same as find_songs_in_large_text_file, but for albums."
+        return self.find_media_items_in_paragraphs(
+            read_paragraphs(input_file_path),
+            self.spotify_client.get_matching_albums,
+            context_size,
+        )
+
+    def generate_songs_in_text_file(self, input_file_path, context_size=DOCUMENT_CONTEXT_SIZE):
+        """Same as find_songs_in_large_text_file, but yields songs as they're found,
+        in the order their names occur in the text.
+
+        If the file fits in memory (util.MAX_CHARS), artists are looked for in the whole text,
+        so the songs picked are the same as find_songs_in_text_file's.
+
+        Returns:
+            (generator): yielding 2-tuples where:
+                - (str) name, once per time it is mentioned
+                - (list(Song)) of matching songs
+        """
+        # a char is at least a byte
+        if os.path.getsize(input_file_path) <= MAX_CHARS:
+            return self.generate_media_items(
+                read_file_contents(input_file_path),
+                self.spotify_client.get_matching_tracks,
+            )
+        return self.generate_media_items_in_paragraphs(
+            read_paragraphs(input_file_path),
+            self.spotify_client.get_matching_tracks,
+            context_size,
+        )
 
     def find_songs(self, text):
         """Given text (string), return songs mentioned in it.
@@ -26,7 +120,11 @@ class SongScrounger:
         Returns:
             (dict): key (str) is name; val (list(Song)) of matching media items.
         """
-        songs = self.find_media_items(text, self.spotify_client.get_matching_tracks)
+        songs = self.find_media_items(
+            text,
+            self.spotify_client.get_matching_tracks,
+            stop_when_artist_mentioned=self.stop_searching_once_artist_mentioned,
+        )
         return songs
 
     def find_albums(self, text):
@@ -38,32 +136,195 @@ class SongScrounger:
         albums = self.find_media_items(text, self.spotify_client.get_matching_albums)
         return albums
 
-    def find_media_items(self, text, name_lookup):
+    def find_media_items(self, text, name_lookup, stop_when_artist_mentioned=False, paragraph_cache=None):
         """Parses given text for names of media items (songs or albums),
         matching with artists if mentioned.
 
-        Each name is searched using the given name_lookup function.
-        The artists in the search results are searched for in the text as well.
-        Any matches are used for media item disambiguation.
+        Each name is searched using the given name_lookup function, once, no matter
+        how many times it is mentioned. The artists in the search results are searched
+        for in the text as well. Any matches are used for media item disambiguation.
 
         Params:
             text (str): containing 1 or more paragraphs containing
                 song or album names, and, optionally, their artists.
             name_lookup (asyn func): given a name (str), returns an object (e.g. Song, Album).
+            stop_when_artist_mentioned (bool): whether to pass name_lookup a stop_when
+                function, telling it to stop once it finds an item by an artist mentioned in the text.
+            paragraph_cache (ParagraphCache|None): results of paragraphs scrounged before.
+                Only paragraphs it has no valid results for are scrounged, and their results are added to it,
+                unless a name's search was stopped early.
 
         Returns:
             (dict): key (str) is name; val (list(Song|Album)) of matching media items.
         """
         results = defaultdict(list)
         paragraphs = self._get_paragraphs(text)
+        # artists are looked up in the whole text for many names, so it is indexed once
+        self._text_index = TextTokenIndex(text, self.find_occurrences)
+        try:
+            is_mentioned = lambda artist_name: self.is_mentioned(artist_name, text)
+            if paragraph_cache is not None:
+                paragraphs = self._add_cached_media_items(results, paragraphs, paragraph_cache, is_mentioned)
+            names_by_paragraph = [list(self.find_names(paragraph)) for paragraph in paragraphs]
+            stop_when = None
+            if stop_when_artist_mentioned:
+                stop_when = lambda media_items: len(self.filter_by_mentioned_artist(media_items, text)) > 0
+            names_stopped_early = set()
+            media_items_by_name = self.look_up_names(
+                [name for names in names_by_paragraph for name in names], name_lookup, stop_when, names_stopped_early)
+            for paragraph, names in zip(paragraphs, names_by_paragraph):
+                found_by_name = dict()
+                for name in names:
+                    found_by_name[name] = self._add_media_items(
+                        results, name, media_items_by_name[name], paragraph, text)
+                # the artists of results cut short aren't all the ones that could be mentioned later
+                if paragraph_cache is not None and names_stopped_early.isdisjoint(names):
+                    artist_names = {
+                        artist.name
+                        for name in names
+                        for media_item in media_items_by_name[name]
+                        for artist in media_item.artists
+                    }
+                    paragraph_cache.set(paragraph, found_by_name, artist_names, is_mentioned)
+        finally:
+            self._text_index = None
+        return results
+
+    def _add_cached_media_items(self, results, paragraphs, paragraph_cache, is_mentioned):
+        """Adds what paragraph_cache has for each paragraph to results.
+
+        Returns:
+            ([str]): paragraphs paragraph_cache has no valid results for.
+        """
+        paragraphs_to_scrounge = []
         for paragraph in paragraphs:
-            names = self.find_names(paragraph)
-            for name in names:
-                media_items = name_lookup(name)
-                media_items = self.filter_if_any_artists_mentioned_greedy(media_items, paragraph, text)
-                media_items = self.reduce_by_popularity_per_artist(media_items)
-                union = set(results[name]) | media_items
-                results[name] = list(union)
+            media_items_by_name = paragraph_cache.get(paragraph, is_mentioned)
+            if media_items_by_name is None:
+                paragraphs_to_scrounge.append(paragraph)
+                continue
+            for name, media_items in media_items_by_name.items():
+                self._merge_media_items(results, name, media_items)
+        return paragraphs_to_scrounge
+
+    def find_media_items_in_paragraphs(self, paragraphs, name_lookup, context_size=DOCUMENT_CONTEXT_SIZE):
+        """Same as find_media_items, but consumes paragraphs lazily, keeping only
+        a bounded window of them in memory.
+
+        Params:
+            paragraphs (iter(str)): e.g. from util.read_paragraphs.
+            name_lookup (func): given a name (str), returns matching media items.
+            context_size (int): number of paragraphs before and after each paragraph to
+                look for artists in, in place of the whole text.
+
+        Returns:
+            (dict): key (str) is name; val (list(Song|Album)) of matching media items.
+        """
+        results = defaultdict(list)
+        for name, media_items in self.generate_media_items_in_paragraphs(paragraphs, name_lookup, context_size):
+            self._merge_media_items(results, name, media_items)
+        return results
+
+    def generate_media_items_in_paragraphs(self, paragraphs, name_lookup, context_size=DOCUMENT_CONTEXT_SIZE):
+        """Same as find_media_items_in_paragraphs, but yields media items as they're found,
+        a batch of paragraphs at a time, in the order their names occur in the text.
+
+        Returns:
+            (generator): yielding 2-tuples where:
+                - (str) name, once per time it is mentioned
+                - (list(Song|Album)) of matching media items
+        """
+        return self._generate_media_items(get_paragraphs_in_context(paragraphs, context_size), name_lookup)
+
+    def generate_media_items(self, text, name_lookup):
+        """Same as generate_media_items_in_paragraphs, but looks for artists in the whole text,
+        like find_media_items does.
+
+        Returns:
+            (generator): yielding 2-tuples where:
+                - (str) name, once per time it is mentioned
+                - (list(Song|Album)) of matching media items
+        """
+        self._text_index = TextTokenIndex(text, self.find_occurrences)
+        try:
+            yield from self._generate_media_items(
+                ((paragraph, text) for paragraph in self._get_paragraphs(text)), name_lookup)
+        finally:
+            self._text_index = None
+
+    def _generate_media_items(self, paragraphs_in_context, name_lookup):
+        while len(batch := list(islice(paragraphs_in_context, PARAGRAPHS_PER_LOOKUP_BATCH))) > 0:
+            names_by_paragraph = [list(self.find_names(paragraph)) for paragraph, _ in batch]
+            media_items_by_name = self.look_up_names(
+                [name for names in names_by_paragraph for name in names], name_lookup)
+            for (paragraph, context), names in zip(batch, names_by_paragraph):
+                for name in names:
+                    yield name, self._disambiguate(media_items_by_name[name], paragraph, context)
+
+    def _add_media_items(self, results, name, media_items, paragraph, whole_text):
+        "Returns (list(Song|Album)): media items added, after disambiguation."
+        media_items = self._disambiguate(media_items, paragraph, whole_text)
+        self._merge_media_items(results, name, media_items)
+        return media_items
+
+    def _disambiguate(self, media_items, paragraph, whole_text):
+        media_items = self.filter_if_any_artists_mentioned_greedy(media_items, paragraph, whole_text)
+        return list(self.reduce_by_popularity_per_artist(media_items))
+
+    def _merge_media_items(self, results, name, media_items):
+        union = set(results[name]) | set(media_items)
+        results[name] = list(union)
+
+    def look_up_names(self, names, name_lookup, stop_when=None, names_stopped_early=None):
+        """Looks up each distinct name once, concurrently, reusing the results
+        of recent lookups.
+
+        Params:
+            names ([str]): may contain duplicates.
+            name_lookup (func): given a name (str), returns matching media items.
+            stop_when (func|None): passed on to name_lookup. Its results then
+                depend on stop_when, so they aren't reused.
+            names_stopped_early (set|None): names whose lookups stop_when stopped are added to it.
+
+        Returns:
+            (dict): key (str) is name; val is what name_lookup returned for it.
+        """
+        if stop_when is not None:
+            use_cache = False
+
+            def lookup(name):
+                def stop_when_for_name(media_items):
+                    should_stop = stop_when(media_items)
+                    if should_stop and names_stopped_early is not None:
+                        names_stopped_early.add(name)
+                    return should_stop
+                return name_lookup(name, stop_when=stop_when_for_name)
+        else:
+            use_cache = True
+            lookup = name_lookup
+
+        results, names_to_look_up = dict(), []
+        for name in dict.fromkeys(names):
+            cache_key = (name_lookup, name)
+            if use_cache and cache_key in self._lookup_cache:
+                self._lookup_cache.move_to_end(cache_key)
+                results[name] = self._lookup_cache[cache_key]
+            else:
+                names_to_look_up.append(name)
+        if len(names_to_look_up) == 0:
+            return results
+
+        num_workers = min(MAX_CONCURRENT_LOOKUPS, len(names_to_look_up))
+        # lookups run in copies of this context, so that whatever the callers keep in it,
+        # e.g. the span being traced, carries over to the worker threads
+        context = contextvars.copy_context()
+        lookup_in_context = lambda name: context.copy().run(lookup, name)
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            for name, media_items in zip(names_to_look_up, executor.map(lookup_in_context, names_to_look_up)):
+                results[name] = media_items
+                if use_cache:
+                    self._lookup_cache[(name_lookup, name)] = media_items
+                    if len(self._lookup_cache) > LOOKUP_CACHE_SIZE:
+                        self._lookup_cache.popitem(last=False)
         return results
 
     def filter_if_any_artists_mentioned_greedy(self, songs_or_albums, subset_text, whole_text):
@@ -95,6 +356,21 @@ class SongScrounger:
         Return:
             (set(Song|Album)).
         """
+        if self._get_text_mentions(text) is not None:
+            return self._filter_by_mentioned_artist(songs_or_albums, text)
+
+        artist_names = [
+            artist.name
+            for song_or_album in songs_or_albums
+            for artist in song_or_album.artists
+        ]
+        self._mention_scan = self.get_mention_matcher(artist_names).scan(text)
+        try:
+            return self._filter_by_mentioned_artist(songs_or_albums, text)
+        finally:
+            self._mention_scan = None
+
+    def _filter_by_mentioned_artist(self, songs_or_albums, text):
         with_mentioned_artists = set()
         for song_or_album in songs_or_albums:
             for artist in song_or_album.artists:
@@ -102,6 +378,27 @@ class SongScrounger:
                     with_mentioned_artists.add(song_or_album)
         return with_mentioned_artists
 
+    def get_mention_matcher(self, artist_names):
+        """Builds a matcher for every word that is_mentioned may look for
+        when given any of the artist names.
+
+        Params:
+            artist_names ([str]).
+
+        Returns:
+            (MentionMatcher).
+        """
+        words = set()
+        for synonym_set in SYNONYMS:
+            words |= synonym_set
+        for artist_name in artist_names:
+            artist_name = artist_name.lower()
+            words.add(artist_name)
+            words.update(artist_name.split(" "))
+            for separator in PARTIAL_MENTION_SEPARATORS:
+                words.add(artist_name.split(separator)[0].strip())
+        return MentionMatcher(words)
+
     def is_mentioned(self, artist_name, text):
         return (
             self.is_mentioned_verbatim(artist_name, text) or
@@ -138,7 +435,7 @@ class SongScrounger:
             word (str): e.g. "Hello".
             text (str): e.g. "Hello dear".
         """
-        word, text = word.lower(), text.lower()
+        word, text = word.lower(), self._lower(text)
         return self.is_mentioned_as_full_str(word, text)
 
     def is_partially_mentioned(self, word, text):
@@ -152,15 +449,14 @@ class SongScrounger:
             text (str): e.g. "The artist Lonnie Donnegan".
         """
         word = word.lower()
-        separators = ["and", "&", "band"]
-        for separator in separators:
+        for separator in PARTIAL_MENTION_SEPARATORS:
             trimmed_word = word.split(separator)[0].strip()
             if self.is_mentioned_verbatim(trimmed_word, text):
                 return True
         return False
 
     def is_mentioned_in_parts(self, word, text):
-        word, text = word.lower(), text.lower()
+        word, text = word.lower(), self._lower(text)
         word_tokens = word.split(" ")
         for token in word_tokens:
             if not self.is_mentioned_as_full_str(token, text):
@@ -168,17 +464,40 @@ class SongScrounger:
         return True
 
     def is_mentioned_as_full_str(self, word, text):
-        return len(self.find_occurrences(word, text)) > 0 or self.is_mentioned_as_synonym(word, text)
+        return self._occurs(word, text) or self.is_mentioned_as_synonym(word, text)
 
     def is_mentioned_as_synonym(self, word, text):
-        synonyms = [{"and", "&"}]
-        for synonym_set in synonyms:
+        for synonym_set in SYNONYMS:
             if word in synonym_set:
                 for synonym in synonym_set:
-                    if len(self.find_occurrences(synonym, text)) > 0:
+                    if self._occurs(synonym, text):
                         return True
         return False
 
+    def _occurs(self, word, text):
+        "Answers from the text index or mention scan if either covers the word and text, else searches text."
+        mentions = self._get_text_mentions(text)
+        if mentions is not None and mentions.has_answer(word, text):
+            return mentions.contains(word)
+        return len(self.find_occurrences(word, text)) > 0
+
+    def _lower(self, text):
+        "Reuses the lowercased text of the text index or mention scan, so that they can answer for it."
+        mentions = self._get_text_mentions(text)
+        if mentions is not None:
+            return mentions.lowered_text
+        return text.lower()
+
+    def _get_text_mentions(self, text):
+        """
+        Returns:
+            (TextTokenIndex|MentionScan|None): of the text, or of the text it is the lowercase of.
+        """
+        for mentions in (self._text_index, self._mention_scan):
+            if mentions is not None and (text is mentions.text or text is mentions.lowered_text):
+                return mentions
+        return None
+
     def find_occurrences(self, word, text):
         """Returns list of occurrences iff 'word' occurs in 'text' but not as a substring of another word.
 
@@ -191,7 +510,7 @@ class SongScrounger:
         Returns:
             ([string]): e.g. ["Hello"]
         """
-        return re.findall(f"(^|[^a-zA-Z]){word}([^a-zA-Z]|$)", text)
+        return find_occurrences(word, text)
 
     def _get_paragraphs(self, text):
         "Returns non-empty paragraphs with one or more non-whitespace characters."
@@ -206,9 +525,8 @@ class SongScrounger:
         Params:
             text (str): e.g. "I keep using the example \"Sorry\" by Justin Bieber"
         """
-        tokens = self.find_quoted_tokens(text)
-        tokens = map(lambda token: token.strip(" "), tokens)
-        return map(lambda token: token.rstrip(",."), tokens)
+        names = [to_name(token) for token in self.find_quoted_tokens(text)]
+        return [name for name in names if len(name) > 0]
 
     def find_quoted_tokens(self, text):
         """Retrieves all quoted strings in the order they occur in the given text.
@@ -222,5 +540,4 @@ class SongScrounger:
             - Ignores trailing quote if quotes are unbalanced
             - Skips empty tokens
         """
-        tokens = re.findall("\"([^\"]*)\"", text)
-        return [token for token in tokens if len(token.strip(" ")) > 0]
\ No newline at end of file
+        return find_quoted_tokens(text)
\ No newline at end of file
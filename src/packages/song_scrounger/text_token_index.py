@@ -0,0 +1,90 @@
+import re
+
+
+TOKEN = re.compile("[a-zA-Z]+")
+
+
+class TextTokenIndex:
+    """Index of where each word-boundary token (run of letters) occurs in the lowercased text.
+
+    Built once in O(len(text)); answers whether a word occurs in the text, but not as a
+    substring of another word, by looking up the positions of its tokens and checking
+    that they are adjacent. Same notion of occurrence as SongScrounger.find_occurrences.
+    """
+
+    def __init__(self, text, find_occurrences):
+        """
+        Params:
+            text (str).
+            find_occurrences (func): same as SongScrounger.find_occurrences, used for
+                words without any letters.
+        """
+        self.text = text
+        self.lowered_text = text.lower()
+        self.find_occurrences = find_occurrences
+        self.token_starts, self.token_ends = [], []
+        self.positions_by_token = dict()
+        for position, match in enumerate(TOKEN.finditer(self.lowered_text)):
+            self.token_starts.append(match.start())
+            self.token_ends.append(match.end())
+            self.positions_by_token.setdefault(match.group(), []).append(position)
+        self._is_contained = dict()
+
+    def has_answer(self, word, lowered_text):
+        "True iff this index can tell whether word occurs in lowered_text."
+        return lowered_text is self.lowered_text
+
+    def contains(self, word):
+        is_contained = self._is_contained.get(word)
+        if is_contained is None:
+            is_contained = self._find(word)
+            self._is_contained[word] = is_contained
+        return is_contained
+
+    def _find(self, word):
+        tokens = TOKEN.findall(word)
+        if len(tokens) == 0:
+            return len(self.find_occurrences(word, self.lowered_text)) > 0
+
+        # what comes before, between and after the tokens of the word, e.g. ["", " & ", ""]
+        separators = TOKEN.split(word)
+        # start from the rarest token to check as few positions as possible
+        anchor = min(
+            range(len(tokens)),
+            key=lambda index: len(self.positions_by_token.get(tokens[index], [])),
+        )
+        for anchor_position in self.positions_by_token.get(tokens[anchor], []):
+            first_position = anchor_position - anchor
+            if self._is_at(tokens, separators, first_position):
+                return True
+        return False
+
+    def _is_at(self, tokens, separators, first_position):
+        last_position = first_position + len(tokens) - 1
+        if first_position < 0 or last_position >= len(self.token_starts):
+            return False
+
+        for index, token in enumerate(tokens):
+            position = first_position + index
+            start, end = self.token_starts[position], self.token_ends[position]
+            if self.lowered_text[start:end] != token:
+                return False
+            if index > 0 and self.lowered_text[self.token_ends[position-1]:start] != separators[index]:
+                return False
+
+        # leading and trailing separators must not reach into the neighbouring tokens
+        gap_start = self.token_ends[first_position-1] if first_position > 0 else 0
+        gap_before = self.lowered_text[gap_start:self.token_starts[first_position]]
+        if not gap_before.endswith(separators[0]) or (
+                first_position > 0 and len(separators[0]) == len(gap_before) > 0):
+            return False
+        gap_end = (
+            self.token_starts[last_position+1]
+            if last_position + 1 < len(self.token_starts)
+            else len(self.lowered_text)
+        )
+        gap_after = self.lowered_text[self.token_ends[last_position]:gap_end]
+        if not gap_after.startswith(separators[-1]) or (
+                last_position + 1 < len(self.token_starts) and len(separators[-1]) == len(gap_after) > 0):
+            return False
+        return True
@@ -0,0 +1,44 @@
+import re
+
+from functools import lru_cache
+
+
+OCCURRENCE_PATTERN_CACHE_SIZE = 4096
+# straight quotes pair with straight quotes, smart quotes with smart quotes
+QUOTED_TOKEN = re.compile("\"([^\"]*)\"|“([^“”]*)”")
+
+
+@lru_cache(maxsize=OCCURRENCE_PATTERN_CACHE_SIZE)
+def get_occurrence_pattern(word):
+    "Returns (re.Pattern): matching word, escaped, but not as a substring of another word."
+    return re.compile(f"(^|[^a-zA-Z]){re.escape(word)}([^a-zA-Z]|$)")
+
+def find_occurrences(word, text):
+    """Returns list of occurrences iff 'word' occurs in 'text' but not as a substring of another word.
+
+    Case-sensitive. Can be made case-insensitive by lowering args before calling.
+
+    Params:
+        word (str): e.g. "AC/DC (Live)", matched literally.
+        text (str): e.g. "Hello, how are you?".
+    """
+    return get_occurrence_pattern(word).findall(text)
+
+def find_quoted_tokens(text):
+    """Retrieves all strings between "straight" or “smart” quotes,
+    in the order they occur in the given text, in one pass.
+
+    Notes:
+        - Ignores trailing quote if quotes are unbalanced
+        - Skips empty tokens
+    """
+    tokens = []
+    for match in QUOTED_TOKEN.finditer(text):
+        token = match.group(1) if match.group(1) is not None else match.group(2)
+        if len(token.strip(" ")) > 0:
+            tokens.append(token)
+    return tokens
+
+def to_name(token):
+    "Removes whitespace at start and end, and punctuation at the end."
+    return token.strip(" ").rstrip(",.")
@@ -1,16 +1,69 @@
+import mmap
 import os
 
+from collections import deque
+
 
 MAX_CHARS = 100000000
 
 def read_file_contents(filename):
     with open(filename, "r") as f:
         file_contents = f.read(MAX_CHARS)
-        file_too_large = f.read() != ''
+        file_too_large = f.read(1) != ''
     if file_too_large:
         raise Exception(f"File is too large. Exceeded character count: {MAX_CHARS}")
     return file_contents
 
+def read_paragraphs(filename, encoding="utf-8"):
+    """Reads the file one paragraph (line) at a time, from a memory map,
+    so files of any size can be read in constant memory.
+
+    Returns:
+        (generator): yielding (str) non-empty paragraphs with one or more non-whitespace characters.
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as file_map:
+            start = 0
+            while start < len(file_map):
+                end = file_map.find(b"\n", start)
+                if end == -1:
+                    end = len(file_map)
+                paragraph = file_map[start:end].decode(encoding)
+                start = end + 1
+                if paragraph.endswith("\r"):
+                    paragraph = paragraph[:-1]
+                if len(paragraph.strip(" ")) > 0:
+                    yield paragraph
+
+def get_paragraphs_in_context(paragraphs, context_size):
+    """Pairs each paragraph with the paragraphs around it, keeping at most
+    2*context_size+1 paragraphs in memory at a time.
+
+    Params:
+        paragraphs (iter(str)).
+        context_size (int): number of paragraphs before and after each paragraph to include.
+
+    Returns:
+        (generator): yielding 2-tuples where:
+            - (str) paragraph
+            - (str) paragraph with the paragraphs around it, joined by newlines
+    """
+    window = deque(maxlen=2 * context_size + 1)
+    num_pending = 0
+    for paragraph in paragraphs:
+        window.append(paragraph)
+        num_pending += 1
+        if num_pending > context_size:
+            yield window[-context_size-1], "\n".join(window)
+            num_pending -= 1
+
+    window = list(window)
+    while num_pending > 0:
+        yield window[-num_pending], "\n".join(window[max(0, len(window)-num_pending-context_size):])
+        num_pending -= 1
+
 def get_spotify_creds():
     client_id = os.environ.get("SPOTIFY_CLIENT_ID")
     secret_key = os.environ.get("SPOTIFY_SECRET_KEY")
@@ -19,4 +72,4 @@ def get_spotify_creds():
     return client_id, secret_key
 
 def get_spotify_bearer_token():
-    return os.environ.get("SPOTIFY_BEARER_TOKEN")
\ No newline at end of file
+    return os.environ.get("SPOTIFY_BEARER_TOKEN")
@@ -2,9 +2,30 @@ import unittest
 from tests.test_music_util import TestMusicUtil
 from tests.test_my_music_lib import TestMyMusicLib
 from tests.test_spotify import TestSpotify
+from tests.test_paragraph_cache import TestParagraphCache
 from tests.test_playlist_analyzer import TestPlaylistAnalyzer
+from tests.test_playlist_updater import TestPlaylistUpdater
+from tests.test_batch_scrounger import TestBatchScrounger, TestRateLimiter
+from tests.test_benchmark_baseline import TestBenchmarkBaseline
+from tests.test_cassette import TestCassette
+from tests.test_cli import TestJobRunner
+from tests.test_daemon import TestDaemonServer, TestJobQueue
+from tests.test_fake_spotify_server import TestFakeSpotifyServer
+from tests.test_genre_group_view import TestGenreGroupView
+from tests.test_genre_signature_grouper import TestGenreSignatureGrouper, TestMyMusicLibEntireLibrary
+from tests.test_instrumentation import TestInstrumentation, TestInstrumentationExporters
+from tests.test_library_snapshot import TestLibrarySnapshot
+from tests.test_local_recommender import TestLocalRecommender
+from tests.test_quantile_sketch import TestPlaylistSketch, TestQuantileSketch
+from tests.test_search_cache import TestSearchCache
+from tests.test_song_attribute_range_index import TestSongAttributeRangeIndex
+from tests.test_spotify_search import TestSpotifySearch
+from tests.test_mention_matcher import TestMentionMatcher
 from tests.test_song_scrounger import TestSongScrounger
+from tests.test_text_token_index import TestTextTokenIndex
+from tests.test_tokenizer import TestTokenizer
 from tests.test_util import TestUtil
+from tests.test_warm_spotify import TestWarmSpotify
 
 
 if __name__ == '__main__':
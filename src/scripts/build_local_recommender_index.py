@@ -0,0 +1,32 @@
+# allows me to run:
+# $ python scripts/build_local_recommender_index.py
+import sys
+sys.path.extend(['.', '../'])
+
+from packages.music_api_clients.spotify import Spotify
+from packages.music_management.local_recommender import LOCAL_RECOMMENDER_INDEX_PATH, LocalRecommender
+
+PLAYLIST_KEYWORD = ""
+
+
+def main():
+    spotify = Spotify()
+    local_recommender = LocalRecommender.load(LOCAL_RECOMMENDER_INDEX_PATH)
+    print(f"Starting with {local_recommender.get_num_tracks()} indexed tracks.")
+
+    print("Indexing tracks from your saved albums...")
+    # a page at a time, so the whole library is indexed without holding all of it
+    for page, _ in spotify.get_my_saved_album_pages():
+        tracks = spotify.get_tracks([track for _, album in page for track in album.tracks])
+        local_recommender.index_tracks_with_audio_features(spotify, tracks)
+
+    print("Indexing tracks from your playlists...")
+    for playlist in spotify.find_current_user_matching_playlists(PLAYLIST_KEYWORD):
+        local_recommender.index_tracks_with_audio_features(spotify, playlist.get_tracks())
+
+    local_recommender.save(LOCAL_RECOMMENDER_INDEX_PATH)
+    print(f"Saved {local_recommender.get_num_tracks()} indexed tracks to '{LOCAL_RECOMMENDER_INDEX_PATH}'.")
+
+
+if __name__ == "__main__":
+    main()
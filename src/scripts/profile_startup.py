@@ -0,0 +1,107 @@
+# allows me to run:
+# $ python scripts/profile_startup.py
+# $ python scripts/profile_startup.py app.music_lib_bot --top 20
+import argparse
+import os
+import subprocess
+import sys
+import time
+sys.path.extend(['.', '../'])
+
+from collections import defaultdict
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = [
+    "app.music_lib_bot",
+    "app.cli",
+    "app.daemon",
+    "scripts.update_seed_playlists",
+    "scripts.scrounge_songs_from_file",
+]
+DEFAULT_TOP = 10
+DEFAULT_RUNS = 3
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Summarizes `python -X importtime` for the app and scripts, i.e. what their cold start waits on.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="e.g. app.music_lib_bot")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="how many of the slowest imports to list")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="keeps the fastest run, to skip a cold disk cache")
+    return parser.parse_args()
+
+
+def parse_importtime(stderr):
+    """
+    Params:
+        stderr (str): of `python -X importtime`, e.g. lines like
+            "import time:       334 |       6310 |   packages.song_scrounger.song_scrounger"
+
+    Returns:
+        ([tuple]): one per imported module, in the order they finished importing:
+            (str) name, (int) self microseconds, (int) cumulative microseconds, (int) nesting depth.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def profile_import(module):
+    """
+    Returns:
+        (float, list): seconds the whole interpreter took to start and import module,
+            and its imports, see parse_importtime.
+    """
+    # scripts import their helpers as top-level modules
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([SRC_DIR, os.path.join(SRC_DIR, "scripts")])}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"Couldn't import {module}:\n{completed.stderr[-2000:]}")
+    return seconds, parse_importtime(completed.stderr)
+
+
+def get_seconds_by_package(imports):
+    "Returns (dict): key (str) top-level package, e.g. 'spotipy'; val (float) seconds spent importing it."
+    seconds_by_package = defaultdict(float)
+    for name, self_us, _, _ in imports:
+        seconds_by_package[name.split(".")[0]] += self_us / 1e6
+    return seconds_by_package
+
+
+def print_profile(module, seconds, imports, top):
+    own_import = next((cumulative_us for name, _, cumulative_us, _ in imports if name == module), 0)
+    print(f"\n{module}: {seconds * 1000:.0f}ms cold start, {own_import / 1000:.0f}ms of it importing {module}")
+    print(f"  slowest packages:")
+    seconds_by_package = sorted(get_seconds_by_package(imports).items(), key=lambda item: -item[1])
+    for package, package_seconds in seconds_by_package[:top]:
+        print(f"    {package_seconds * 1000:7.1f}ms  {package}")
+    print(f"  slowest modules, counting what they import:")
+    for name, _, cumulative_us, depth in sorted(imports, key=lambda item: -item[2])[:top]:
+        print(f"    {cumulative_us / 1000:7.1f}ms  {'  ' * depth}{name}")
+
+
+def main():
+    args = get_args()
+    for module in args.modules:
+        seconds, imports = min(
+            (profile_import(module) for _ in range(args.runs)),
+            key=lambda profile: profile[0],
+        )
+        print_profile(module, seconds, imports, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,54 @@
 # allows me to run:
-# $ python scripts/dump_albums.py
+# $ python scripts/scrounge_songs_from_file.py
+# $ python scripts/scrounge_songs_from_file.py --batch "newsletters/*.txt"
+import argparse
+import os
 import sys
 sys.path.extend(['.', '../'])
 
+from packages.music_api_clients.rate_limiter import RateLimiter
+from packages.music_api_clients.search_cache import SearchCache
 from packages.music_api_clients.spotify import Spotify
+from packages.song_scrounger.batch_scrounger import MAX_API_CALLS_PER_SECOND, BatchScrounger
 from packages.song_scrounger.song_scrounger import SongScrounger
+from packages.song_scrounger.util import MAX_CHARS
 from scrounge_helper import print_summary_of_song_matches
 
 
+def get_args():
+    parser = argparse.ArgumentParser(description="Finds songs mentioned in text files.")
+    parser.add_argument(
+        "--batch",
+        metavar="DIRECTORY_OR_GLOB",
+        help="scrounge every .txt file in a directory, or every file matching a glob, at once",
+    )
+    parser.add_argument("--processes", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("--max-calls-per-second", type=float, default=MAX_API_CALLS_PER_SECOND)
+    return parser.parse_args()
+
+
 def main():
-    spotify = Spotify()
-    song_scrounger = SongScrounger(spotify)
-    file_name = input("Enter the relative path to a file and I'll look at it and find songs mentioned in it: ")
+    args = get_args()
+    spotify = Spotify(search_cache=SearchCache.load(), rate_limiter=RateLimiter(args.max_calls_per_second))
+    song_scrounger = SongScrounger(spotify, stop_searching_once_artist_mentioned=True)
+
+    if args.batch is not None:
+        print(f"\nScanning for songs in '{args.batch}'...")
+        batch_scrounger = BatchScrounger(song_scrounger, args.processes)
+        songs = batch_scrounger.find_songs_in_text_files(args.batch)
+    else:
+        file_name = input("Enter the relative path to a file and I'll look at it and find songs mentioned in it: ")
 
-    print("\nScanning for songs...")
-    songs = song_scrounger.find_songs_in_text_file(file_name)
+        print("\nScanning for songs...")
+        if os.path.getsize(file_name) > MAX_CHARS:
+            print("That's a big file! I'll read it bit by bit and look for artists near each song.")
+            songs = song_scrounger.find_songs_in_large_text_file(file_name)
+        else:
+            songs = song_scrounger.find_songs_in_text_file(file_name, incremental=True)
 
+    spotify.search_cache.save()
     print_summary_of_song_matches(songs)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -7,6 +7,7 @@ from packages.music_management.music_util import MusicUtil
 from packages.music_management.my_music_lib import MyMusicLib
 from packages.music_management.playlist_updater import PlaylistUpdater
 from packages.music_management.playlist_analyzer import PlaylistAnalyzer
+from packages.music_management.local_recommender import LOCAL_RECOMMENDER_INDEX_PATH, LocalRecommender
 from packages.music_api_clients.spotify import Spotify
 
 
@@ -26,16 +27,19 @@ def main():
         return
     print(f"Got it!")
 
+    local_recommender = LocalRecommender.load(LOCAL_RECOMMENDER_INDEX_PATH)
     playlist_updater = PlaylistUpdater(
         my_music_lib,
         music_util,
         spotify,
         print,
         playlist_analyzer,
+        local_recommender=local_recommender,
     )
 
     playlist_updater.add_recommended_songs_with_similar_attributes(
         playlist, lambda: 10)
+    local_recommender.save(LOCAL_RECOMMENDER_INDEX_PATH)
 
 
 if __name__ == "__main__":
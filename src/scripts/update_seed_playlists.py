@@ -1,5 +1,8 @@
 # allows me to run:
-# $ python scripts/dump_playlist_genres.py
+# $ python scripts/update_seed_playlists.py
+# $ python scripts/update_seed_playlists.py --record seed_sync.cassette
+# $ python scripts/update_seed_playlists.py --replay seed_sync.cassette --replay-latency-ms 50
+import argparse
 import sys
 sys.path.extend(['.', '../'])
 
@@ -7,13 +10,53 @@ from packages.music_management.my_music_lib import MyMusicLib
 from packages.music_management.music_util import MusicUtil
 from packages.music_management.playlist_updater import PlaylistUpdater
 from packages.music_management.playlist_analyzer import PlaylistAnalyzer
+from packages.music_api_clients.cassette import REPLAY_ACCESS_TOKEN, CassettePlayer, CassetteRecorder
 from packages.music_api_clients.spotify import Spotify
 
 NUM_TRACKS_PER_ALBUM = 3
 
 
+def get_args():
+    parser = argparse.ArgumentParser(description="Updates target playlists from seed playlists.")
+    parser.add_argument("--record", metavar="CASSETTE", help="record every API call to a cassette")
+    parser.add_argument(
+        "--replay",
+        metavar="CASSETTE",
+        help="replay API calls from a cassette instead of calling the API; needs no credentials",
+    )
+    parser.add_argument("--replay-latency-ms", type=float, default=0, help="simulated latency per replayed call")
+    parser.add_argument(
+        "--replay-recorded-latency",
+        action="store_true",
+        help="also wait as long as each call took when it was recorded",
+    )
+    return parser.parse_args()
+
+
+def get_cassette(args):
+    "Returns (CassetteRecorder|CassettePlayer|None)."
+    if args.record is not None:
+        return CassetteRecorder(args.record)
+    if args.replay is not None:
+        return CassettePlayer(args.replay, args.replay_latency_ms / 1000, args.replay_recorded_latency)
+    return None
+
+
 def main():
-    spotify = Spotify()
+    args = get_args()
+    cassette = get_cassette(args)
+    try:
+        update_seed_playlists(cassette)
+    finally:
+        if cassette is not None:
+            cassette.close()
+
+
+def update_seed_playlists(cassette):
+    spotify = Spotify(
+        access_token=REPLAY_ACCESS_TOKEN if isinstance(cassette, CassettePlayer) else None,
+        cassette=cassette,
+    )
     music_util = MusicUtil(spotify, print)
     my_music_lib = MyMusicLib(spotify, music_util, print)
     playlist_analyzer = PlaylistAnalyzer(my_music_lib, music_util, print)
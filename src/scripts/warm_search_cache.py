@@ -0,0 +1,50 @@
+# allows me to run:
+# $ python scripts/warm_search_cache.py newsletter.txt reviews.txt --albums
+import argparse
+import sys
+sys.path.extend(['.', '../'])
+
+from packages.music_api_clients.search_cache import SEARCH_CACHE_PATH, SearchCache
+from packages.music_api_clients.spotify import Spotify
+from packages.song_scrounger.song_scrounger import SongScrounger
+from packages.song_scrounger.util import read_paragraphs
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Searches Spotify for the names quoted in the given files and caches the results.")
+    parser.add_argument("file_paths", nargs="+", help="text files to scrounge names from")
+    parser.add_argument("--albums", action="store_true", help="search for albums instead of songs")
+    parser.add_argument("--one-name-per-line", action="store_true", help="files list one name per line, unquoted")
+    parser.add_argument("--cache-path", default=SEARCH_CACHE_PATH)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    search_cache = SearchCache.load(args.cache_path)
+    spotify = Spotify(search_cache=search_cache)
+    song_scrounger = SongScrounger(spotify)
+    print(f"Starting with {len(search_cache)} cached searches.")
+
+    names = []
+    for file_path in args.file_paths:
+        if args.one_name_per_line:
+            names.extend(line.strip() for line in read_paragraphs(file_path) if len(line.strip()) > 0)
+        else:
+            names.extend(
+                name
+                for paragraph in read_paragraphs(file_path)
+                for name in song_scrounger.find_names(paragraph)
+            )
+
+    name_lookup = spotify.get_matching_albums if args.albums else spotify.get_matching_tracks
+    print(f"Searching for {len(set(names))} names...")
+    song_scrounger.look_up_names(names, name_lookup)
+
+    search_cache.save()
+    print(f"Saved {len(search_cache)} cached searches to '{args.cache_path}'.")
+
+
+if __name__ == "__main__":
+    main()
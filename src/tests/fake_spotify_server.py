@@ -0,0 +1,585 @@
+import json
+import re
+import time
+
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+
+FAKE_USER_ID = "fakeuser"
+FAKE_ACCESS_TOKEN = "fake-access-token"
+# words that synthetic names are made of; few enough that many tracks share a name
+NAME_WORDS = [
+    "love", "night", "blue", "heart", "rain", "fire", "summer", "dream",
+    "road", "river", "gold", "moon", "city", "home", "wild", "light",
+]
+GENRES = ["rock", "indie rock", "jazz", "soul", "hip hop", "folk", "electronic", "pop", "blues", "funk"]
+DEFAULT_ADDED_AT = "2020-01-01T00:00:00Z"
+MAX_SEARCH_LIMIT = 50
+MAX_PAGE_LIMIT = 100
+MAX_ALBUM_IDS = 20
+MAX_TRACK_IDS = 50
+MAX_ARTIST_IDS = 50
+MAX_AUDIO_FEATURE_IDS = 100
+MAX_PLAYLIST_ITEMS_PER_REQUEST = 100
+
+
+class FakeSpotifyLibrary:
+    """Synthetic Spotify catalog and user library, in the shape the Web API returns it.
+
+    Albums, artists and tracks are derived from their index on demand, so libraries
+    of 10k+ albums cost little more than the index of their names.
+    """
+
+    def __init__(self, num_albums=100, tracks_per_album=10, num_artists=None, num_saved_albums=None, seed=0):
+        """
+        Params:
+            num_albums (int): in the catalog.
+            tracks_per_album (int).
+            num_artists (int|None): defaults to one per 5 albums.
+            num_saved_albums (int|None): in the user's library; defaults to all of them.
+            seed (int): for audio features.
+        """
+        self.num_albums = num_albums
+        self.tracks_per_album = tracks_per_album
+        self.num_artists = num_artists if num_artists is not None else max(1, num_albums // 5)
+        self.seed = seed
+        num_saved_albums = num_albums if num_saved_albums is None else min(num_saved_albums, num_albums)
+        # most recently saved first, as the Web API returns them
+        self.saved_album_ids = [self.get_album_id(index) for index in range(num_saved_albums)]
+        self.added_at_by_album_id = dict()
+        self.playlists = dict()
+        self._lock = Lock()
+
+        self._track_ids_by_name = defaultdict(list)
+        self._album_ids_by_name = defaultdict(list)
+        for album_index in range(num_albums):
+            self._album_ids_by_name[self._get_album_name(album_index).lower()].append(self.get_album_id(album_index))
+            for track_number in range(1, tracks_per_album + 1):
+                self._track_ids_by_name[self._get_track_name(album_index, track_number).lower()].append(
+                    self.get_track_id(album_index, track_number))
+
+    def get_album_id(self, album_index):
+        return f"album{album_index}"
+
+    def get_track_id(self, album_index, track_number):
+        return f"album{album_index}track{track_number}"
+
+    def get_artist_id(self, artist_index):
+        return f"artist{artist_index}"
+
+    def get_track_names(self):
+        return list(self._track_ids_by_name.keys())
+
+    def get_album_names(self):
+        return list(self._album_ids_by_name.keys())
+
+    def get_artist(self, artist_id):
+        artist_index = self._parse_index("artist", artist_id)
+        return {
+            **self._get_simplified_artist(artist_index),
+            "popularity": (artist_index * 31) % 101,
+            "genres": [GENRES[artist_index % len(GENRES)], GENRES[(artist_index * 7 + 3) % len(GENRES)]],
+        }
+
+    def get_album(self, album_id):
+        album_index = self._parse_index("album", album_id)
+        return {
+            **self.get_simplified_album(album_id),
+            "popularity": (album_index * 37) % 101,
+            "genres": [],
+            "tracks": self.get_page([
+                self._get_simplified_track(album_index, track_number)
+                for track_number in range(1, self.tracks_per_album + 1)
+            ], 0, MAX_SEARCH_LIMIT),
+        }
+
+    def get_simplified_album(self, album_id):
+        album_index = self._parse_index("album", album_id)
+        return {
+            "id": album_id,
+            "uri": f"spotify:album:{album_id}",
+            "name": self._get_album_name(album_index),
+            "album_type": "album",
+            "artists": [self._get_simplified_artist(self._get_artist_index(album_index))],
+            "release_date": f"{1960 + album_index % 60}-{1 + album_index % 12:02d}-{1 + album_index % 28:02d}",
+            "total_tracks": self.tracks_per_album,
+        }
+
+    def get_track(self, track_id):
+        album_index, track_number = self._parse_track_id(track_id)
+        return {
+            **self._get_simplified_track(album_index, track_number),
+            "album": self.get_simplified_album(self.get_album_id(album_index)),
+            "popularity": (album_index * 37 + track_number * 11) % 101,
+        }
+
+    def get_audio_features(self, track_id):
+        album_index, track_number = self._parse_track_id(track_id)
+        random = Random(f"{self.seed}:{track_id}")
+        return {
+            "id": track_id,
+            "uri": f"spotify:track:{track_id}",
+            "danceability": random.random(),
+            "energy": random.random(),
+            "key": random.randrange(12),
+            "loudness": -random.uniform(0, 30),
+            "mode": random.randrange(2),
+            "speechiness": random.random() * 0.5,
+            "acousticness": random.random(),
+            "instrumentalness": random.random(),
+            "liveness": random.random(),
+            "valence": random.random(),
+            "tempo": random.uniform(60, 180),
+            "duration_ms": 120000 + (album_index * 7919 + track_number * 104729) % 240000,
+            "time_signature": 4,
+        }
+
+    def has_track(self, track_id):
+        try:
+            album_index, track_number = self._parse_track_id(track_id)
+        except ValueError:
+            return False
+        return album_index < self.num_albums and 1 <= track_number <= self.tracks_per_album
+
+    def has_album(self, album_id):
+        try:
+            return self._parse_index("album", album_id) < self.num_albums
+        except ValueError:
+            return False
+
+    def has_artist(self, artist_id):
+        try:
+            return self._parse_index("artist", artist_id) < self.num_artists
+        except ValueError:
+            return False
+
+    def search(self, kind, query):
+        """
+        Params:
+            kind (str): "track", "album" or "artist".
+            query (str): e.g. "track:love night"; matches names containing it, ignoring case.
+
+        Returns:
+            ([str]): IDs of matching items, most relevant first.
+        """
+        query = query.split(":", 1)[1] if ":" in query else query
+        query = query.strip().lower()
+        if kind == "track":
+            ids_by_name = self._track_ids_by_name
+        elif kind == "album":
+            ids_by_name = self._album_ids_by_name
+        else:
+            return [
+                self.get_artist_id(artist_index)
+                for artist_index in range(self.num_artists)
+                if query in self._get_artist_name(artist_index).lower()
+            ]
+        exact_matches = ids_by_name.get(query, [])
+        partial_matches = [
+            spotify_id
+            for name, ids in ids_by_name.items() if query in name and name != query
+            for spotify_id in ids
+        ]
+        return exact_matches + partial_matches
+
+    def get_search_result(self, kind, spotify_id):
+        "Returns (dict): the item, as it appears in search results."
+        if kind == "track":
+            return self.get_track(spotify_id)
+        if kind == "album":
+            return self.get_simplified_album(spotify_id)
+        return self.get_artist(spotify_id)
+
+    def get_artist_albums(self, artist_id):
+        artist_index = self._parse_index("artist", artist_id)
+        return [
+            self.get_simplified_album(self.get_album_id(album_index))
+            for album_index in range(artist_index, self.num_albums, self.num_artists)
+        ]
+
+    def get_recommendations(self, seed_track_ids, limit, filters):
+        """
+        Params:
+            seed_track_ids ([str]).
+            limit (int).
+            filters (dict): e.g. {"min_energy": 0.2, "max_popularity": 80}.
+
+        Returns:
+            ([dict]): tracks from the seeds' artists' albums that pass the filters.
+        """
+        artist_indexes = {
+            self._get_artist_index(self._parse_track_id(track_id)[0])
+            for track_id in seed_track_ids
+            if self.has_track(track_id)
+        }
+        recommendations = []
+        for album_index in range(self.num_albums):
+            if self._get_artist_index(album_index) not in artist_indexes:
+                continue
+            for track_number in range(1, self.tracks_per_album + 1):
+                track_id = self.get_track_id(album_index, track_number)
+                if track_id in seed_track_ids:
+                    continue
+                track = self.get_track(track_id)
+                if self._passes_filters(track, self.get_audio_features(track_id), filters):
+                    recommendations.append(track)
+                    if len(recommendations) == limit:
+                        return recommendations
+        return recommendations
+
+    def save_album(self, album_id, added_at):
+        "Saves the album, or saves it again, to the top of the user's library."
+        with self._lock:
+            self.unsave_album(album_id)
+            self.saved_album_ids.insert(0, album_id)
+            self.added_at_by_album_id[album_id] = added_at
+
+    def unsave_album(self, album_id):
+        if album_id in self.saved_album_ids:
+            self.saved_album_ids.remove(album_id)
+
+    def get_added_at(self, album_id):
+        return self.added_at_by_album_id.get(album_id, DEFAULT_ADDED_AT)
+
+    def create_playlist(self, name, description):
+        with self._lock:
+            playlist_id = f"playlist{len(self.playlists)}"
+            self.playlists[playlist_id] = {"name": name, "description": description, "track_ids": []}
+        return self.get_playlist(playlist_id)
+
+    def get_playlist(self, playlist_id):
+        return {
+            **self.get_simplified_playlist(playlist_id),
+            "tracks": self.get_page(self.get_playlist_items(playlist_id), 0, MAX_PAGE_LIMIT),
+        }
+
+    def get_simplified_playlist(self, playlist_id):
+        playlist = self.playlists[playlist_id]
+        return {
+            "id": playlist_id,
+            "uri": f"spotify:playlist:{playlist_id}",
+            "name": playlist["name"],
+            "description": playlist["description"],
+            "owner": {"id": FAKE_USER_ID},
+            "tracks": {"total": len(playlist["track_ids"])},
+        }
+
+    def get_playlist_items(self, playlist_id):
+        return [{"track": self.get_track(track_id)} for track_id in self.playlists[playlist_id]["track_ids"]]
+
+    def add_playlist_items(self, playlist_id, track_ids, position=None):
+        with self._lock:
+            playlist_track_ids = self.playlists[playlist_id]["track_ids"]
+            position = len(playlist_track_ids) if position is None else position
+            playlist_track_ids[position:position] = track_ids
+
+    def remove_playlist_items(self, playlist_id, track_ids):
+        with self._lock:
+            track_ids = set(track_ids)
+            playlist = self.playlists[playlist_id]
+            playlist["track_ids"] = [track_id for track_id in playlist["track_ids"] if track_id not in track_ids]
+
+    def delete_playlist(self, playlist_id):
+        with self._lock:
+            self.playlists.pop(playlist_id, None)
+
+    def get_page(self, items, offset, limit):
+        "Returns (dict): a paging object, as the Web API returns lists."
+        page_items = items[offset:offset + limit]
+        has_next = offset + len(page_items) < len(items)
+        return {
+            "items": page_items,
+            "total": len(items),
+            "offset": offset,
+            "limit": limit,
+            "next": f"?offset={offset + limit}&limit={limit}" if has_next else None,
+        }
+
+    def _get_simplified_artist(self, artist_index):
+        artist_id = self.get_artist_id(artist_index)
+        return {"id": artist_id, "uri": f"spotify:artist:{artist_id}", "name": self._get_artist_name(artist_index)}
+
+    def _get_simplified_track(self, album_index, track_number):
+        track_id = self.get_track_id(album_index, track_number)
+        return {
+            "id": track_id,
+            "uri": f"spotify:track:{track_id}",
+            "name": self._get_track_name(album_index, track_number),
+            "artists": [self._get_simplified_artist(self._get_artist_index(album_index))],
+            "disc_number": 1,
+            "track_number": track_number,
+            "duration_ms": self.get_audio_features(track_id)["duration_ms"],
+        }
+
+    def _get_artist_index(self, album_index):
+        return album_index % self.num_artists
+
+    def _get_artist_name(self, artist_index):
+        return f"The {NAME_WORDS[artist_index % len(NAME_WORDS)].title()} Band {artist_index}"
+
+    def _get_album_name(self, album_index):
+        return f"{self._get_name_from_number(album_index * 7 + 1)} Sessions"
+
+    def _get_track_name(self, album_index, track_number):
+        return self._get_name_from_number(album_index * 13 + track_number * 5)
+
+    def _get_name_from_number(self, number):
+        first_word = NAME_WORDS[number % len(NAME_WORDS)]
+        second_word = NAME_WORDS[(number // len(NAME_WORDS)) % len(NAME_WORDS)]
+        return f"{first_word} {second_word}".title()
+
+    def _parse_index(self, kind, spotify_id):
+        if (match := re.fullmatch(f"{kind}(\\d+)", spotify_id)) is None:
+            raise ValueError(f"Not a fake {kind} ID: {spotify_id}")
+        return int(match.group(1))
+
+    def _parse_track_id(self, track_id):
+        if (match := re.fullmatch("album(\\d+)track(\\d+)", track_id)) is None:
+            raise ValueError(f"Not a fake track ID: {track_id}")
+        return int(match.group(1)), int(match.group(2))
+
+    def _passes_filters(self, track, audio_features, filters):
+        for param, bound in filters.items():
+            prefix, attribute = param.split("_", 1)
+            value = track["popularity"] if attribute == "popularity" else audio_features.get(attribute)
+            if value is None:
+                continue
+            if (prefix == "min" and value < float(bound)) or (prefix == "max" and value > float(bound)):
+                return False
+        return True
+
+
+class FakeSpotifyServer:
+    """Loopback HTTP stand-in for the parts of the Spotify Web API that Spotify uses.
+
+    e.g.
+        with FakeSpotifyServer(FakeSpotifyLibrary(num_albums=10000), latency_seconds=0.01) as server:
+            spotify = Spotify(base_url=server.base_url, access_token=FAKE_ACCESS_TOKEN)
+    """
+
+    def __init__(self, library=None, latency_seconds=0, rate_limit_every=None, retry_after_seconds=0):
+        """
+        Params:
+            library (FakeSpotifyLibrary|None): defaults to a small one.
+            latency_seconds (float): added to every response.
+            rate_limit_every (int|None): answer every nth request with 429 Too Many Requests.
+            retry_after_seconds (int): sent in the Retry-After header of 429 responses.
+        """
+        self.library = library if library is not None else FakeSpotifyLibrary()
+        self.latency_seconds = latency_seconds
+        self.rate_limit_every = rate_limit_every
+        self.retry_after_seconds = retry_after_seconds
+        self.requests = []
+        self.num_rate_limited = 0
+        self._num_rate_limits_to_inject = 0
+        self._lock = Lock()
+        self._http_server = None
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def base_url(self):
+        host, port = self._http_server.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def start(self):
+        "Returns (FakeSpotifyServer): itself, listening on a free loopback port."
+        fake_server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake_server._handle(self, "GET")
+
+            def do_POST(self):
+                fake_server._handle(self, "POST")
+
+            def do_PUT(self):
+                fake_server._handle(self, "PUT")
+
+            def do_DELETE(self):
+                fake_server._handle(self, "DELETE")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http_server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self._http_server.daemon_threads = True
+        self._thread = Thread(target=self._http_server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._http_server is None:
+            return
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        self._thread.join()
+        self._http_server = None
+
+    def inject_rate_limits(self, num_requests):
+        "Answers the next num_requests requests with 429 Too Many Requests."
+        with self._lock:
+            self._num_rate_limits_to_inject += num_requests
+
+    def get_num_requests(self, method=None, path_prefix=""):
+        """
+        Params:
+            method (str|None): e.g. "GET"; any if None.
+            path_prefix (str): e.g. "search".
+        """
+        with self._lock:
+            return len([
+                request
+                for request in self.requests
+                if (method is None or request[0] == method) and request[1].startswith(path_prefix)
+            ])
+
+    def _handle(self, request_handler, method):
+        url = urlparse(request_handler.path)
+        path = url.path[len("/v1/"):] if url.path.startswith("/v1/") else url.path.lstrip("/")
+        path = path.rstrip("/")
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = None
+        content_length = int(request_handler.headers.get("Content-Length") or 0)
+        if content_length > 0:
+            body = json.loads(request_handler.rfile.read(content_length))
+
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        if self._should_rate_limit(method, path):
+            self._respond(request_handler, 429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                {"Retry-After": str(self.retry_after_seconds)})
+            return
+        if request_handler.headers.get("Authorization") is None:
+            self._respond(request_handler, 401, {"error": {"status": 401, "message": "No token provided"}})
+            return
+
+        try:
+            status, response = self._route(method, path, params, body)
+        except (KeyError, ValueError) as error:
+            status, response = 400, {"error": {"status": 400, "message": str(error)}}
+        self._respond(request_handler, status, response)
+
+    def _should_rate_limit(self, method, path):
+        with self._lock:
+            self.requests.append((method, path))
+            if self._num_rate_limits_to_inject > 0:
+                self._num_rate_limits_to_inject -= 1
+            elif self.rate_limit_every is None or len(self.requests) % self.rate_limit_every != 0:
+                return False
+            self.num_rate_limited += 1
+            return True
+
+    def _respond(self, request_handler, status, response, headers=None):
+        content = json.dumps(response).encode("utf-8")
+        request_handler.send_response(status)
+        request_handler.send_header("Content-Type", "application/json")
+        request_handler.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or dict()).items():
+            request_handler.send_header(name, value)
+        request_handler.end_headers()
+        request_handler.wfile.write(content)
+
+    def _route(self, method, path, params, body):
+        "Returns (tuple): (int) status and (dict) JSON response."
+        library = self.library
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 20))
+        ids = params["ids"].split(",") if params.get("ids") else []
+        parts = path.split("/")
+
+        if method == "GET" and path == "search":
+            kind = params["type"]
+            self._check_limit(limit, MAX_SEARCH_LIMIT)
+            page = library.get_page(library.search(kind, params["q"]), offset, limit)
+            page["items"] = [library.get_search_result(kind, spotify_id) for spotify_id in page["items"]]
+            return 200, {f"{kind}s": page}
+        if method == "GET" and path == "me":
+            return 200, {"id": FAKE_USER_ID, "display_name": "Fake User", "uri": f"spotify:user:{FAKE_USER_ID}"}
+        if method == "GET" and path == "me/albums":
+            self._check_limit(limit, MAX_SEARCH_LIMIT)
+            saved_albums = library.saved_album_ids[offset:offset + limit]
+            page = library.get_page(library.saved_album_ids, offset, limit)
+            page["items"] = [
+                {"added_at": library.get_added_at(album_id), "album": library.get_album(album_id)}
+                for album_id in saved_albums
+            ]
+            return 200, page
+        if method == "GET" and path in ("me/playlists", f"users/{FAKE_USER_ID}/playlists"):
+            self._check_limit(limit, MAX_SEARCH_LIMIT)
+            playlists = [library.get_simplified_playlist(playlist_id) for playlist_id in library.playlists]
+            return 200, library.get_page(playlists, offset, limit)
+        if method == "POST" and path == f"users/{FAKE_USER_ID}/playlists":
+            return 201, library.create_playlist(body["name"], body.get("description", ""))
+        if method == "GET" and path == "albums":
+            self._check_limit(len(ids), MAX_ALBUM_IDS)
+            return 200, {"albums": [library.get_album(album_id) if library.has_album(album_id) else None for album_id in ids]}
+        if method == "GET" and path == "tracks":
+            self._check_limit(len(ids), MAX_TRACK_IDS)
+            return 200, {"tracks": [library.get_track(track_id) if library.has_track(track_id) else None for track_id in ids]}
+        if method == "GET" and path == "audio-features":
+            self._check_limit(len(ids), MAX_AUDIO_FEATURE_IDS)
+            return 200, {"audio_features": [
+                library.get_audio_features(track_id) if library.has_track(track_id) else None for track_id in ids]}
+        if method == "GET" and path == "recommendations":
+            seed_track_ids = params.get("seed_tracks", "").split(",")
+            filters = {
+                key: value for key, value in params.items()
+                if key.startswith("min_") or key.startswith("max_")
+            }
+            return 200, {"seeds": [], "tracks": library.get_recommendations(seed_track_ids, limit, filters)}
+        if method == "GET" and path == "artists":
+            self._check_limit(len(ids), MAX_ARTIST_IDS)
+            return 200, {"artists": [library.get_artist(artist_id) if library.has_artist(artist_id) else None for artist_id in ids]}
+        if method == "GET" and len(parts) == 2 and parts[0] == "artists":
+            return self._get_if_exists(library.has_artist(parts[1]), lambda: library.get_artist(parts[1]))
+        if method == "GET" and len(parts) == 3 and parts[0] == "artists" and parts[2] == "albums":
+            self._check_limit(limit, MAX_SEARCH_LIMIT)
+            return 200, library.get_page(library.get_artist_albums(parts[1]), offset, limit)
+        if len(parts) >= 2 and parts[0] == "playlists":
+            playlist_id = parts[1]
+            if playlist_id not in library.playlists:
+                return 404, {"error": {"status": 404, "message": "Not found."}}
+            return self._route_playlist(method, playlist_id, parts[2:], params, body, offset, limit)
+        return 404, {"error": {"status": 404, "message": f"Service not found: {method} {path}"}}
+
+    def _route_playlist(self, method, playlist_id, subpath, params, body, offset, limit):
+        library = self.library
+        if method == "GET" and subpath == []:
+            return 200, library.get_playlist(playlist_id)
+        if method == "GET" and subpath in (["tracks"], ["items"]):
+            self._check_limit(limit, MAX_PAGE_LIMIT)
+            return 200, library.get_page(library.get_playlist_items(playlist_id), offset, limit)
+        if method == "POST" and subpath in (["tracks"], ["items"]):
+            uris = body["uris"] if isinstance(body, dict) else body
+            self._check_limit(len(uris), MAX_PLAYLIST_ITEMS_PER_REQUEST)
+            position = int(params["position"]) if "position" in params else None
+            library.add_playlist_items(playlist_id, [uri.split(":")[-1] for uri in uris], position)
+            return 201, {"snapshot_id": f"{playlist_id}-{len(self.requests)}"}
+        if method == "DELETE" and subpath in (["tracks"], ["items"]):
+            uris = [item["uri"] for item in body["items"]]
+            self._check_limit(len(uris), MAX_PLAYLIST_ITEMS_PER_REQUEST)
+            library.remove_playlist_items(playlist_id, [uri.split(":")[-1] for uri in uris])
+            return 200, {"snapshot_id": f"{playlist_id}-{len(self.requests)}"}
+        if method == "DELETE" and subpath == ["followers"]:
+            library.delete_playlist(playlist_id)
+            return 200, {}
+        return 404, {"error": {"status": 404, "message": "Service not found."}}
+
+    def _get_if_exists(self, exists, get):
+        if not exists:
+            return 404, {"error": {"status": 404, "message": "Not found."}}
+        return 200, get()
+
+    def _check_limit(self, num, max_num):
+        if num > max_num:
+            raise ValueError(f"Invalid limit: {num} is more than {max_num}")
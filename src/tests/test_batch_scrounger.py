@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from packages.music_api_clients.rate_limiter import RateLimiter
+from packages.song_scrounger.batch_scrounger import BatchScrounger, get_file_paths
+from packages.song_scrounger.song_scrounger import SongScrounger
+from tests.fixtures import mock_artist, mock_track
+
+
+class TestBatchScrounger(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.write_file("a.txt", "When Don McLean recorded \"American Pie\"\nThen \"Sorry\" by Justin Bieber")
+        self.write_file("b.txt", "\"American Pie\" again, by Madonna this time")
+        self.write_file("notes.md", "\"Not Scrounged\"")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_file(self, name, text):
+        with open(os.path.join(self.directory.name, name), "w") as f:
+            f.write(text)
+
+    def test_get_file_paths__directory__returns_text_files(self):
+        file_paths = get_file_paths(self.directory.name)
+
+        self.assertEqual(["a.txt", "b.txt"], [os.path.basename(path) for path in file_paths])
+
+    def test_find_songs_in_text_files__looks_up_each_name_once_and_merges_results(self):
+        by_don_mclean = mock_track(
+            name="American Pie", spotify_id="1", artists=[mock_artist("Don McLean")], popularity=1)
+        by_madonna = mock_track(
+            name="American Pie", spotify_id="2", artists=[mock_artist("Madonna")], popularity=1)
+        sorry = mock_track(
+            name="Sorry", spotify_id="3", artists=[mock_artist("Justin Bieber")], popularity=1)
+        mock_spotify = MagicMock()
+        mock_spotify.get_matching_tracks.side_effect = lambda name: {
+            "American Pie": set([by_don_mclean, by_madonna]),
+            "Sorry": set([sorry]),
+        }[name]
+        batch_scrounger = BatchScrounger(SongScrounger(mock_spotify), max_processes=2)
+
+        results = batch_scrounger.find_songs_in_text_files(self.directory.name)
+
+        self.assertEqual(2, mock_spotify.get_matching_tracks.call_count)
+        self.assertEqual({"American Pie", "Sorry"}, set(results.keys()))
+        self.assertEqual({"1", "2"}, {track.spotify_id for track in results["American Pie"]})
+        self.assertEqual(["3"], [track.spotify_id for track in results["Sorry"]])
+
+    def test_find_songs_in_text_files__again__reuses_lookups(self):
+        mock_spotify = MagicMock()
+        mock_spotify.get_matching_tracks.side_effect = lambda name: set()
+        batch_scrounger = BatchScrounger(SongScrounger(mock_spotify), max_processes=2)
+
+        batch_scrounger.find_songs_in_text_files(self.directory.name)
+        batch_scrounger.find_songs_in_text_files(self.directory.name)
+
+        self.assertEqual(2, mock_spotify.get_matching_tracks.call_count)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_wait__calls_too_close__sleeps_until_next_slot(self):
+        now, sleeps = [10.0], []
+        rate_limiter = RateLimiter(2, clock=lambda: now[0], sleep=sleeps.append)
+
+        rate_limiter.wait()
+        rate_limiter.wait()
+        now[0] += 2
+        rate_limiter.wait()
+
+        self.assertEqual([0.5], sleeps)
+
+    def test_mount__requests_through_session_wait_their_turn(self):
+        now, sleeps = [10.0], []
+        rate_limiter = RateLimiter(2, clock=lambda: now[0], sleep=sleeps.append)
+        session, adapter = requests.Session(), MagicMock()
+        session.mount("https://", adapter)
+
+        rate_limiter.mount(session)
+        session.adapters["https://"].send("request 1")
+        session.adapters["https://"].send("request 2")
+
+        self.assertEqual([0.5], sleeps)
+        self.assertEqual(2, adapter.send.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
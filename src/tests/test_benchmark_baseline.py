@@ -0,0 +1,57 @@
+import unittest
+
+from benchmarks.baseline import find_regressions
+
+
+def mock_measurement(wall_seconds=1.0, cpu_seconds=0.5, peak_rss_mb=40.0, api_calls=100):
+    return {
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": cpu_seconds,
+        "peak_rss_mb": peak_rss_mb,
+        "api_calls": api_calls,
+        "api_calls_by_endpoint": {},
+        "rate_limited": 0,
+    }
+
+
+class TestBenchmarkBaseline(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {"config": {}, "stages": {"seed_sync": mock_measurement()}}
+
+    def test_find_regressions__within_tolerance__none(self):
+        measurements = {"seed_sync": mock_measurement(wall_seconds=1.5, peak_rss_mb=45.0, api_calls=90)}
+
+        regressions = find_regressions(self.baseline, measurements, tolerance=0.25, timing_tolerance=0.75)
+
+        self.assertEqual([], regressions)
+
+    def test_find_regressions__more_api_calls__flagged(self):
+        measurements = {"seed_sync": mock_measurement(api_calls=101)}
+
+        regressions = find_regressions(self.baseline, measurements)
+
+        self.assertEqual(["seed_sync: api_calls went from 100 to 101"], regressions)
+
+    def test_find_regressions__slower_and_bigger__flagged(self):
+        measurements = {"seed_sync": mock_measurement(wall_seconds=2.0, peak_rss_mb=80.0)}
+
+        regressions = find_regressions(self.baseline, measurements, tolerance=0.25, timing_tolerance=0.75)
+
+        self.assertEqual(2, len(regressions))
+        self.assertTrue(regressions[0].startswith("seed_sync: wall_seconds"))
+        self.assertTrue(regressions[1].startswith("seed_sync: peak_rss_mb"))
+
+    def test_find_regressions__short_stage_much_slower__flagged(self):
+        self.baseline["stages"]["artist_discography"] = mock_measurement(cpu_seconds=0.03)
+        measurements = {"artist_discography": mock_measurement(cpu_seconds=0.2)}
+
+        regressions = find_regressions(self.baseline, measurements)
+
+        self.assertEqual(["artist_discography: cpu_seconds went from 0.03 to 0.20"], regressions)
+
+    def test_find_regressions__stage_not_in_baseline__skipped(self):
+        measurements = {"new_stage": mock_measurement(api_calls=1000)}
+
+        regressions = find_regressions(self.baseline, measurements)
+
+        self.assertEqual([], regressions)
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+
+from unittest.mock import MagicMock
+
+from packages.music_api_clients.cassette import (
+    REPLAY_ACCESS_TOKEN,
+    CassettePlayer,
+    CassetteRecorder,
+    get_key_digest,
+)
+from packages.music_api_clients.spotify import Spotify
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MyMusicLib
+from packages.music_management.playlist_updater import PlaylistUpdater
+from tests.fake_spotify_server import FAKE_ACCESS_TOKEN, FakeSpotifyLibrary, FakeSpotifyServer
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.library = FakeSpotifyLibrary(num_albums=30, tracks_per_album=4)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "test.cassette")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def record(self, run):
+        with FakeSpotifyServer(self.library) as server, CassetteRecorder(self.path) as cassette:
+            result = run(Spotify(base_url=server.base_url, access_token=FAKE_ACCESS_TOKEN, cassette=cassette))
+            num_requests = len(server.requests)
+        return result, num_requests
+
+    def replay(self, run, **kwargs):
+        with CassettePlayer(self.path, **kwargs) as cassette:
+            # nothing listens there, so any request not served from the cassette fails
+            spotify = Spotify(base_url="http://127.0.0.1:9/v1/", access_token=REPLAY_ACCESS_TOKEN, cassette=cassette)
+            return run(spotify)
+
+    def test_replay__returns_what_was_recorded_without_the_api(self):
+        track_name = self.library.get_track_names()[0]
+        def run(spotify):
+            return (
+                [album.spotify_id for album in spotify.get_my_albums(20)],
+                sorted(track.spotify_id for track in spotify.get_matching_tracks(track_name)),
+            )
+
+        recorded, num_requests = self.record(run)
+        replayed = self.replay(run)
+
+        self.assertEqual(recorded, replayed)
+        with CassettePlayer(self.path) as cassette:
+            self.assertEqual(num_requests, len(cassette))
+
+    def test_replay__repeated_request__responses_in_recorded_order(self):
+        def run(spotify):
+            tracks = spotify.get_my_albums(1)[0].tracks[:2]
+            playlist = spotify.create_playlist("test", "")
+            before = len(spotify.get_playlist(playlist).tracks)
+            spotify.add_tracks(playlist, tracks)
+            after = len(spotify.get_playlist(playlist).tracks)
+            return before, after
+
+        recorded, _ = self.record(run)
+        replayed = self.replay(run)
+
+        self.assertEqual((0, 2), recorded)
+        self.assertEqual(recorded, replayed)
+
+    def test_replay__request_not_recorded__raises(self):
+        self.record(lambda spotify: spotify.get_my_albums(10))
+
+        with self.assertRaises(KeyError):
+            self.replay(lambda spotify: spotify.get_matching_tracks("not recorded"))
+
+    def test_replay__simulates_latency(self):
+        self.record(lambda spotify: spotify.get_my_albums(10))
+        sleep = MagicMock()
+
+        self.replay(lambda spotify: spotify.get_my_albums(10), latency_seconds=0.05, sleep=sleep)
+
+        self.assertGreater(sleep.call_count, 0)
+        sleep.assert_called_with(0.05)
+
+    def test_replay__seed_sync__writes_matched_in_recorded_order(self):
+        seed_playlist = self.library.create_playlist("seed: Jazz", "")
+        self.library.add_playlist_items(seed_playlist["id"], [
+            self.library.get_track_id(album_index, track_number)
+            for album_index in range(3)
+            for track_number in range(1, self.library.tracks_per_album + 1)
+        ])
+        def run(spotify):
+            music_util = MusicUtil(spotify, MagicMock())
+            my_music_lib = MyMusicLib(spotify, music_util, MagicMock())
+            playlist_updater = PlaylistUpdater(my_music_lib, music_util, spotify, MagicMock(), MagicMock())
+            updates = playlist_updater.create_or_update_all_targets_from_seeds(
+                my_music_lib.search_my_playlists("seed: "),
+                2,
+                lambda seed_playlist: seed_playlist.name[len("seed: "):],
+            )
+            return [(playlist.name, num_tracks_added) for playlist, num_tracks_added in updates]
+
+        recorded, _ = self.record(run)
+        replayed = self.replay(run)
+
+        self.assertEqual([("Jazz", 6)], recorded)
+        self.assertEqual(recorded, replayed)
+
+    def test_get_key_digest__ignores_host_and_query_param_order(self):
+        self.assertEqual(
+            get_key_digest("GET", "https://api.spotify.com/v1/search?q=a&type=track"),
+            get_key_digest("GET", "http://127.0.0.1:8080/v1/search?type=track&q=a"),
+        )
+        self.assertNotEqual(
+            get_key_digest("GET", "https://api.spotify.com/v1/playlists/p/tracks"),
+            get_key_digest("POST", "https://api.spotify.com/v1/playlists/p/tracks"),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from app.cli import JobRunner
+from packages.music_api_clients.spotify import Spotify
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MyMusicLib
+from packages.song_scrounger.song_scrounger import SongScrounger
+from tests.fake_spotify_server import FAKE_ACCESS_TOKEN, FakeSpotifyLibrary, FakeSpotifyServer
+
+
+class TestJobRunner(unittest.TestCase):
+    def setUp(self):
+        self.library = FakeSpotifyLibrary(num_albums=20, tracks_per_album=4)
+        self.server = FakeSpotifyServer(self.library).start()
+        spotify = Spotify(base_url=self.server.base_url, access_token=FAKE_ACCESS_TOKEN)
+        info_logger = lambda _: None
+        music_util = MusicUtil(spotify, info_logger)
+        my_music_lib = MyMusicLib(spotify, music_util, info_logger)
+        self.job_runner = JobRunner(spotify, my_music_lib, music_util, SongScrounger(spotify), info_logger)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def add_seed_playlist(self, name, album_indices):
+        playlist = self.library.create_playlist(name, "")
+        self.library.add_playlist_items(playlist["id"], [
+            self.library.get_track_id(album_index, track_number)
+            for album_index in album_indices
+            for track_number in range(1, self.library.tracks_per_album + 1)
+        ])
+
+    def test_run_job__seed_sync__reports_what_it_added(self):
+        self.add_seed_playlist("seed: Jazz", [0, 1])
+
+        result = self.job_runner.run_job("seed_sync", {"seed_prefix": "seed: ", "num_tracks_per_album": 2})
+
+        self.assertEqual("ok", result["status"])
+        self.assertEqual(1, result["result"]["num_seed_playlists"])
+        self.assertEqual(
+            [{"playlist_name": "Jazz", "num_tracks_added": 4}], result["result"]["updated_playlists"])
+
+    def test_run_job__playlist_of_albums(self):
+        self.add_seed_playlist("Albums", [0, 1, 2])
+
+        result = self.job_runner.run_job(
+            "playlist_of_albums",
+            {"playlist_name": "Albums", "new_playlist_name": "Best of", "num_tracks_per_album": 1},
+        )
+
+        self.assertEqual("ok", result["status"])
+        playlist = self.job_runner.my_music_lib.get_playlist_by_name("Best of")
+        self.assertEqual(3, len(playlist.tracks))
+
+    def test_run_job__genre_playlists_of_entire_library__same_groups_as_recent_albums(self):
+        # every group, as groups with as many albums are in no particular order
+        params = {"num_playlists": 100, "min_genres_per_group": 1, "min_albums_per_playlist": 2, "min_artists_per_playlist": 1}
+        as_comparable = lambda result: sorted(
+            (playlist["playlist_name"], playlist["num_albums"]) for playlist in result["result"]["created_playlists"])
+
+        recent = self.job_runner.run_job("genre_playlists", dict(params, num_albums_to_fetch=50))
+        entire_library = self.job_runner.run_job("genre_playlists", dict(params, entire_library=True))
+
+        self.assertEqual("ok", recent["status"])
+        self.assertGreater(len(recent["result"]["created_playlists"]), 1)
+        self.assertEqual(as_comparable(recent), as_comparable(entire_library))
+
+    def test_run_job__song_scrounger__same_songs_either_way(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        file = os.path.join(directory.name, "text.txt")
+        track = self.library.get_track(self.library.get_track_id(0, 1))
+        with open(file, "w") as f:
+            f.write(f"I like \"{track['name']}\" and \"{track['name']}\".")
+
+        all_at_once = self.job_runner.run_job("song_scrounger", {"file": file, "playlist_name": "All at once"})
+        progressive = self.job_runner.run_job(
+            "song_scrounger", {"file": file, "playlist_name": "Progressive", "progressive": True})
+
+        self.assertEqual("ok", all_at_once["status"])
+        self.assertEqual(1, all_at_once["result"]["num_tracks_added"])
+        self.assertEqual(1, progressive["result"]["num_tracks_added"])
+
+    def test_run_job__unknown_action_or_params__reported_as_error(self):
+        unknown_action = self.job_runner.run_job("dance", {})
+        unknown_param = self.job_runner.run_job("seed_sync", {"seed_prefx": "seed: "})
+        missing_playlist = self.job_runner.run_job("recommendations", {"playlist_name": "nope"})
+
+        self.assertEqual("error", unknown_action["status"])
+        self.assertIn("Unknown action 'dance'", unknown_action["error"])
+        self.assertEqual("error", unknown_param["status"])
+        self.assertIn("seed_prefx", unknown_param["error"])
+        self.assertEqual("error", missing_playlist["status"])
+        self.assertIn("Couldn't find 'nope'", missing_playlist["error"])
+
+    def test_run_jobs__keeps_going_after_a_failed_job(self):
+        self.add_seed_playlist("seed: Jazz", [0])
+        results_as_they_come = []
+
+        results = self.job_runner.run_jobs(
+            [
+                {"action": "recommendations", "params": {"playlist_name": "nope"}},
+                {"action": "seed_sync"},
+            ],
+            results_as_they_come.append,
+        )
+
+        self.assertEqual(["error", "ok"], [result["status"] for result in results])
+        self.assertEqual([0, 1], [result["job"] for result in results])
+        self.assertEqual(results, results_as_they_come)
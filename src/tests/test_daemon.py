@@ -0,0 +1,147 @@
+import json
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from app.daemon import DaemonServer, JobQueue
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.job_runner = MagicMock()
+        self.job_runner.actions = {"seed_sync": None, "recommendations": None}
+        self.job_runner.run_job.side_effect = lambda action, params: {"action": action, "status": "ok", "result": params}
+
+    def test_jobs_run_most_urgent_first_then_in_order_submitted(self):
+        job_queue = JobQueue(self.job_runner, max_concurrent_jobs=1)
+        job_queue.submit("seed_sync", {"n": 1}, priority=10)
+        job_queue.submit("recommendations", {"n": 2}, priority=0)
+        job_queue.submit("seed_sync", {"n": 3}, priority=10)
+
+        job_queue.start()
+        self.assertTrue(job_queue.wait_until_idle(5))
+        job_queue.stop()
+
+        self.assertEqual(
+            [{"n": 2}, {"n": 1}, {"n": 3}],
+            [call[0][1] for call in self.job_runner.run_job.call_args_list],
+        )
+        self.assertEqual(["ok", "ok", "ok"], [job["status"] for job in job_queue.get_jobs()])
+
+    def test_jobs_of_same_action__never_more_than_limit_at_once(self):
+        running, max_running = {"seed_sync": 0}, {"seed_sync": 0}
+        def run_job(action, params):
+            running[action] = running.get(action, 0) + 1
+            max_running[action] = max(max_running.get(action, 0), running[action])
+            time.sleep(0.01)
+            running[action] -= 1
+            return {"status": "ok"}
+        self.job_runner.run_job.side_effect = run_job
+        job_queue = JobQueue(self.job_runner, max_concurrent_jobs=3, max_concurrent_jobs_per_action=1).start()
+
+        for _ in range(4):
+            job_queue.submit("seed_sync")
+        job_queue.submit("recommendations")
+        self.assertTrue(job_queue.wait_until_idle(5))
+        job_queue.stop()
+
+        self.assertEqual(1, max_running["seed_sync"])
+        self.assertEqual(5, self.job_runner.run_job.call_count)
+
+    def test_song_scrounger_jobs__one_at_a_time_whatever_the_limit_per_action(self):
+        running, max_running = {"song_scrounger": 0}, {"song_scrounger": 0}
+        def run_job(action, params):
+            running[action] += 1
+            max_running[action] = max(max_running[action], running[action])
+            time.sleep(0.01)
+            running[action] -= 1
+            return {"status": "ok"}
+        self.job_runner.run_job.side_effect = run_job
+        job_queue = JobQueue(self.job_runner, max_concurrent_jobs=3, max_concurrent_jobs_per_action=3).start()
+
+        for _ in range(3):
+            job_queue.submit("song_scrounger")
+        self.assertTrue(job_queue.wait_until_idle(5))
+        job_queue.stop()
+
+        self.assertEqual(1, max_running["song_scrounger"])
+
+    def test_jobs_writing_to_same_playlist__one_at_a_time_whatever_their_actions(self):
+        writing, overlaps = [], []
+        def run_job(action, params):
+            playlist_name = params.get("playlist_name")
+            if len(writing) > 0 and (playlist_name is None or None in writing or playlist_name in writing):
+                overlaps.append((action, playlist_name))
+            writing.append(playlist_name)
+            time.sleep(0.01)
+            writing.remove(playlist_name)
+            return {"status": "ok"}
+        self.job_runner.run_job.side_effect = run_job
+        job_queue = JobQueue(self.job_runner, max_concurrent_jobs=3, max_concurrent_jobs_per_action=3).start()
+
+        job_queue.submit("recommendations", {"playlist_name": "Jazz"})
+        job_queue.submit("recommendations", {"playlist_name": "Jazz"})
+        job_queue.submit("seed_sync")
+        job_queue.submit("recommendations", {"playlist_name": "Rock"})
+        self.assertTrue(job_queue.wait_until_idle(5))
+        job_queue.stop()
+
+        self.assertEqual([], overlaps)
+        self.assertEqual(4, self.job_runner.run_job.call_count)
+
+    def test_submit__wrong_types__raises_before_queueing(self):
+        job_queue = JobQueue(self.job_runner)
+
+        with self.assertRaises(ValueError):
+            job_queue.submit("seed_sync", priority="high")
+        with self.assertRaises(ValueError):
+            job_queue.submit("seed_sync", params=["seed: "])
+        job_queue.submit("seed_sync", priority=1)
+
+        self.assertEqual([1], [job["priority"] for job in job_queue.get_jobs()])
+
+    def test_get_job__has_result_once_done(self):
+        job_queue = JobQueue(self.job_runner).start()
+
+        job = job_queue.submit("seed_sync", {"seed_prefix": "seed: "})
+        job_queue.wait_until_idle(5)
+        job_queue.stop()
+
+        self.assertEqual("queued", job["status"])
+        self.assertEqual({"seed_prefix": "seed: "}, job_queue.get_job(job["job_id"])["result"])
+        self.assertIsNone(job_queue.get_job(123))
+
+
+class TestDaemonServer(unittest.TestCase):
+    def setUp(self):
+        job_runner = MagicMock()
+        job_runner.actions = {"seed_sync": None}
+        job_runner.run_job.return_value = {"action": "seed_sync", "status": "ok", "result": {"num_seed_playlists": 2}}
+        self.job_queue = JobQueue(job_runner).start()
+        self.server = DaemonServer(self.job_queue, port=0).start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.job_queue.stop()
+
+    def test_submit_then_get_job(self):
+        response = requests.post(f"{self.server.url}jobs", data=json.dumps({"action": "seed_sync", "priority": 0}))
+        job_id = response.json()["job_id"]
+        self.job_queue.wait_until_idle(5)
+        job = requests.get(f"{self.server.url}jobs/{job_id}").json()
+
+        self.assertEqual(202, response.status_code)
+        self.assertEqual("ok", job["status"])
+        self.assertEqual({"num_seed_playlists": 2}, job["result"])
+        self.assertEqual([job_id], [job["job_id"] for job in requests.get(f"{self.server.url}jobs").json()])
+
+    def test_bad_requests(self):
+        self.assertEqual(400, requests.post(f"{self.server.url}jobs", data='{"action": "dance"}').status_code)
+        self.assertEqual(400, requests.post(f"{self.server.url}jobs", data="not json").status_code)
+        self.assertEqual(400, requests.post(f"{self.server.url}jobs", data='{"action": "seed_sync", "priority": "high"}').status_code)
+        self.assertEqual(400, requests.post(f"{self.server.url}jobs", data='{"action": "seed_sync", "params": 1}').status_code)
+        self.assertEqual([], requests.get(f"{self.server.url}jobs").json())
+        self.assertEqual(404, requests.get(f"{self.server.url}jobs/42").status_code)
+        self.assertEqual(["seed_sync"], requests.get(f"{self.server.url}actions").json())
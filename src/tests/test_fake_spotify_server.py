@@ -0,0 +1,95 @@
+import time
+import unittest
+
+from packages.music_api_clients.spotify import Spotify
+from tests.fake_spotify_server import FAKE_ACCESS_TOKEN, FakeSpotifyLibrary, FakeSpotifyServer
+
+
+class TestFakeSpotifyServer(unittest.TestCase):
+    def setUp(self):
+        self.library = FakeSpotifyLibrary(num_albums=50, tracks_per_album=4)
+        self.server = FakeSpotifyServer(self.library).start()
+        self.spotify = Spotify(base_url=self.server.base_url, access_token=FAKE_ACCESS_TOKEN)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_client__created_on_first_request(self):
+        spotify = Spotify(base_url=self.server.base_url, access_token=FAKE_ACCESS_TOKEN)
+
+        self.assertIsNone(spotify._client)
+        spotify.get_my_albums(1)
+        self.assertIsNotNone(spotify._client)
+        self.assertEqual(self.server.base_url, spotify.client.prefix)
+
+    def test_get_matching_tracks__finds_every_track_with_that_name(self):
+        track_name = self.library.get_track_names()[0]
+
+        tracks = self.spotify.get_matching_tracks(track_name)
+
+        self.assertEqual(len(self.library.search("track", track_name)), len(tracks))
+        self.assertTrue(all(track.name.lower() == track_name for track in tracks))
+        self.assertTrue(all(track.popularity is not None for track in tracks))
+
+    def test_get_matching_albums__fetches_full_albums(self):
+        album_name = self.library.get_album_names()[0]
+
+        albums = self.spotify.get_matching_albums(album_name)
+
+        self.assertGreater(len(albums), 0)
+        self.assertTrue(all(len(album.tracks) == 4 for album in albums))
+
+    def test_get_my_albums__pages_through_saved_albums(self):
+        albums = self.spotify.get_my_albums(40)
+
+        self.assertEqual(40, len(albums))
+        self.assertEqual(2, self.server.get_num_requests("GET", "me/albums"))
+
+    def test_get_my_albums__stops_at_end_of_library_and_at_max(self):
+        self.assertEqual(50, len(self.spotify.get_my_albums(1000)))
+        self.assertEqual(3, self.server.get_num_requests("GET", "me/albums"))
+        self.assertEqual(30, len(self.spotify.get_my_albums(30)))
+
+    def test_create_playlist_and_add_tracks__in_batches_of_100(self):
+        tracks = [track for album in self.spotify.get_albums_by_ids(self.library.saved_album_ids) for track in album.tracks]
+
+        playlist = self.spotify.create_playlist("Fake Playlist", "made offline")
+        self.spotify.add_tracks(playlist, tracks[:150])
+        playlist = self.spotify.get_playlist(playlist)
+
+        self.assertEqual("Fake Playlist", playlist.name)
+        self.assertEqual(set(tracks[:150]), set(playlist.get_tracks()))
+        self.assertEqual(2, self.server.get_num_requests("POST", f"playlists/{playlist.spotify_id}"))
+
+    def test_set_track_audio_features_and_recommendations(self):
+        track = self.spotify.get_matching_tracks(self.library.get_track_names()[0]).pop()
+
+        self.spotify.set_track_audio_features([track])
+        results = self.spotify.client.recommendations(seed_tracks=[track.spotify_id], limit=5)
+
+        self.assertIsNotNone(track.audio_features)
+        self.assertTrue(0 < len(results["tracks"]) <= 5)
+
+    def test_rate_limited__client_retries(self):
+        self.server.inject_rate_limits(2)
+
+        artist = self.spotify.get_matching_artists("band")[0]
+
+        self.assertEqual(2, self.server.num_rate_limited)
+        self.assertIsNotNone(artist.spotify_id)
+
+    def test_latency__added_to_each_request(self):
+        self.server.latency_seconds = 0.05
+
+        start = time.perf_counter()
+        self.spotify.client.me()
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_synthetic_library__10k_albums__cheap_to_build(self):
+        start = time.perf_counter()
+        library = FakeSpotifyLibrary(num_albums=10000)
+
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(10000, len(library.saved_album_ids))
+        self.assertEqual("album9999", library.get_album(library.get_album_id(9999))["id"])
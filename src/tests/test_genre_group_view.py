@@ -0,0 +1,80 @@
+import sqlite3
+import unittest
+from random import Random
+
+from packages.music_api_clients.genre_group_view import GenreGroupView
+from packages.music_management.genre_signature_grouper import GenreSignatureGrouper
+
+GENRES = ["rock", "indie rock", "jazz", "soul", "hip hop", "folk"]
+
+
+class TestGenreGroupView(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.view = GenreGroupView(self.connection)
+        random = Random(0)
+        self.genres_by_album_id = {
+            f"album{index}": random.sample(GENRES, random.randint(0, 3))
+            for index in range(80)
+        }
+
+    def tearDown(self):
+        self.connection.close()
+
+    def regroup(self, min_genres_per_group):
+        grouper = GenreSignatureGrouper()
+        for album_id, genres in self.genres_by_album_id.items():
+            grouper.add(album_id, genres, [])
+        return grouper.get_groups(min_genres_per_group)
+
+    def as_comparable(self, album_groups):
+        return sorted((tuple(sorted(group["genres"])), tuple(sorted(group["album_ids"]))) for group in album_groups)
+
+    def test_albums_added_then_removed__same_groups_as_grouping_again(self):
+        for album_id, genres in self.genres_by_album_id.items():
+            self.view.add_album(album_id, genres)
+        self.assertEqual(self.as_comparable(self.regroup(1)), self.as_comparable(self.view.get_groups(1)))
+
+        for album_id in list(self.genres_by_album_id)[::3]:
+            self.view.remove_album(album_id)
+            del self.genres_by_album_id[album_id]
+
+        for min_genres_per_group in (1, 2):
+            self.assertEqual(
+                self.as_comparable(self.regroup(min_genres_per_group)),
+                self.as_comparable(self.view.get_groups(min_genres_per_group)),
+            )
+
+    def test_add_album__signature_already_matched__groups_unchanged(self):
+        self.view.add_album("album0", ["jazz", "soul"])
+        self.view.add_album("album1", ["jazz", "soul"])
+        self.view.add_album("album2", ["jazz"])
+        num_changes = self.connection.total_changes
+
+        self.view.add_album("album3", ["jazz", "soul"])
+
+        # the album's signature and its album count, nothing else
+        self.assertEqual(2, self.connection.total_changes - num_changes)
+        self.assertEqual(
+            [(("jazz",), ("album0", "album1", "album2", "album3")), (("jazz", "soul"), ("album0", "album1", "album3"))],
+            self.as_comparable(self.view.get_groups(1)),
+        )
+
+    def test_find_groups__same_as_filtering_all_groups(self):
+        for album_id, genres in self.genres_by_album_id.items():
+            self.view.add_album(album_id, genres)
+        album_groups = self.view.get_groups(0)
+
+        for genres in (["jazz"], ["rock", "soul"], ["folk", "jazz", "soul"]):
+            self.assertEqual(
+                self.as_comparable([group for group in album_groups if set(genres) <= set(group["genres"])]),
+                self.as_comparable(self.view.find_groups(genres, superset=True)),
+            )
+            self.assertEqual(
+                self.as_comparable([group for group in album_groups if set(genres) == set(group["genres"])]),
+                self.as_comparable(self.view.find_groups(genres)),
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
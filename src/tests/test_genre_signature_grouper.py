@@ -0,0 +1,99 @@
+import unittest
+from random import Random
+from unittest.mock import MagicMock
+
+from packages.music_api_clients.spotify import Spotify
+from packages.music_management.genre_signature_grouper import GenreSignatureGrouper
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MyMusicLib
+from tests.fake_spotify_server import FAKE_ACCESS_TOKEN, FakeSpotifyLibrary, FakeSpotifyServer
+from tests.fixtures import mock_album, mock_artist
+
+GENRES = ["rock", "indie rock", "jazz", "soul", "hip hop", "folk"]
+
+
+class TestGenreSignatureGrouper(unittest.TestCase):
+    def setUp(self):
+        random = Random(0)
+        self.albums = [
+            mock_album(
+                spotify_id=f"album{index}",
+                genres=random.sample(GENRES, random.randint(0, 3)),
+                artists=[mock_artist(name=f"Artist {index % 7}", spotify_id=f"artist{index % 7}")],
+            )
+            for index in range(60)
+        ]
+
+    def get_groups(self, min_genres_per_group, max_memberships_in_memory=1000):
+        grouper = GenreSignatureGrouper(max_memberships_in_memory)
+        for album in self.albums:
+            grouper.add(album.spotify_id, album.genres, [(artist.spotify_id, artist.name) for artist in album.artists])
+        return grouper.get_groups(min_genres_per_group)
+
+    def as_comparable(self, album_groups):
+        return sorted(
+            (tuple(sorted(group["genres"])), tuple(sorted(group.get("album_ids") or [album.spotify_id for album in group["albums"]])))
+            for group in album_groups
+        )
+
+    def test_get_groups__same_as_music_util(self):
+        music_util = MusicUtil(MagicMock(), MagicMock())
+
+        for min_genres_per_group in (1, 2):
+            self.assertEqual(
+                self.as_comparable(music_util.group_albums_with_genres(self.albums, min_genres_per_group)),
+                self.as_comparable(self.get_groups(min_genres_per_group)),
+            )
+
+    def test_get_groups__spilled_to_disk__same_groups(self):
+        self.assertEqual(
+            self.as_comparable(self.get_groups(1)),
+            self.as_comparable(self.get_groups(1, max_memberships_in_memory=5)),
+        )
+
+    def test_get_groups__most_albums_first_with_their_artists(self):
+        album_groups = self.get_groups(1)
+
+        num_albums = [len(group["album_ids"]) for group in album_groups]
+        self.assertEqual(sorted(num_albums, reverse=True), num_albums)
+        self.assertEqual(
+            [f"Artist {artist_id[len('artist'):]}" for artist_id in album_groups[0]["artist_ids"]],
+            album_groups[0]["artist_names"],
+        )
+
+    def test_get_groups__no_shared_genres__each_album_by_itself(self):
+        self.albums = [
+            mock_album(spotify_id="album0", genres=["jazz"], artists=[mock_artist(spotify_id="artist0")]),
+            mock_album(spotify_id="album1", genres=["folk"], artists=[mock_artist(spotify_id="artist1")]),
+        ]
+
+        self.assertEqual(
+            [(("folk",), ("album1",)), (("jazz",), ("album0",))],
+            self.as_comparable(self.get_groups(1)),
+        )
+
+
+class TestMyMusicLibEntireLibrary(unittest.TestCase):
+    def setUp(self):
+        self.library = FakeSpotifyLibrary(num_albums=1100, tracks_per_album=1)
+        self.server = FakeSpotifyServer(self.library).start()
+        self.spotify = Spotify(base_url=self.server.base_url, access_token=FAKE_ACCESS_TOKEN)
+        self.my_music_lib = MyMusicLib(self.spotify, MusicUtil(self.spotify, MagicMock()), MagicMock())
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_get_all_my_album_groups_by_genre__whole_library_without_fetching_albums_again(self):
+        album_groups = self.my_music_lib.get_all_my_album_groups_by_genre(1)
+
+        album_ids = {album_id for group in album_groups for album_id in group["album_ids"]}
+        self.assertEqual(1100, len(album_ids))
+        self.assertEqual(0, self.server.get_num_requests("GET", "albums"))
+
+        albums = self.my_music_lib.get_albums_of_group(album_groups[-1])
+
+        self.assertEqual(sorted(album_groups[-1]["album_ids"]), sorted(album.spotify_id for album in albums))
+
+
+if __name__ == '__main__':
+    unittest.main()
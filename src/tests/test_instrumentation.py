@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+import unittest
+
+from unittest.mock import MagicMock
+
+from packages.music_api_clients.instrumentation import (
+    Instrumentation,
+    JsonLinesExporter,
+    OpenTelemetryJsonExporter,
+    StdoutSummaryExporter,
+)
+from packages.music_api_clients.search_cache import SearchCache
+from packages.music_api_clients.spotify import Spotify
+from packages.music_management.music_util import MusicUtil
+from tests.fixtures import mock_album, mock_artist, mock_song_attribute_ranges, mock_track
+from tests.fake_spotify_server import FAKE_ACCESS_TOKEN, FakeSpotifyLibrary, FakeSpotifyServer
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.library = FakeSpotifyLibrary(num_albums=20, tracks_per_album=4)
+        self.server = FakeSpotifyServer(self.library).start()
+        self.exporter = MagicMock()
+        self.instrumentation = Instrumentation([self.exporter])
+        self.spotify = Spotify(
+            search_cache=SearchCache(),
+            base_url=self.server.base_url,
+            access_token=FAKE_ACCESS_TOKEN,
+            instrumentation=self.instrumentation,
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_api_calls__counted_per_endpoint_with_bytes_received(self):
+        self.spotify.get_my_albums(10)
+        self.spotify.get_matching_tracks(self.library.get_track_names()[0])
+
+        summary = self.instrumentation.get_summary()
+
+        self.assertEqual(len(self.server.requests), summary["api_calls"])
+        self.assertEqual(1, summary["endpoints"]["current_user_saved_albums"]["calls"])
+        self.assertGreater(summary["endpoints"]["search"]["bytes_received"], 0)
+        self.assertEqual(
+            summary["endpoints"]["search"]["calls"],
+            sum(summary["endpoints"]["search"]["latency_histogram"].values()),
+        )
+
+    def test_search_cache__hit_ratio(self):
+        track_name = self.library.get_track_names()[0]
+
+        self.spotify.get_matching_tracks(track_name)
+        self.spotify.get_matching_tracks(track_name)
+
+        cache = self.instrumentation.get_summary()["caches"]["track search"]
+        self.assertEqual(1, cache["hits"])
+        self.assertEqual(1, cache["misses"])
+        self.assertEqual(0.5, cache["hit_ratio"])
+
+    def test_trace_methods__nests_api_calls_in_calling_method_span(self):
+        music_util = self.instrumentation.trace_methods(
+            MusicUtil(self.spotify, lambda _: None), ["get_discography"])
+
+        with self.instrumentation.span("MusicLibBot.run_something"):
+            music_util.get_discography(mock_artist(spotify_id="artist0"))
+
+        spans_by_name = {span.name: span for span in self.instrumentation.spans}
+        action_span = spans_by_name["MusicLibBot.run_something"]
+        method_span = spans_by_name["MusicUtil.get_discography"]
+        api_spans = [span for span in self.instrumentation.spans if span.is_api_call]
+        self.assertEqual(action_span.span_id, method_span.parent_span_id)
+        self.assertTrue(any(span.parent_span_id == method_span.span_id for span in api_spans))
+        self.assertTrue(all(span.trace_id == action_span.trace_id for span in api_spans))
+
+    def test_trace_methods__only_given_methods_traced(self):
+        music_util = self.instrumentation.trace_methods(
+            MusicUtil(self.spotify, lambda _: None), ["get_discography"])
+
+        music_util.is_live(mock_album(name="Live at Leeds"))
+
+        self.assertEqual([], self.instrumentation.spans)
+
+    def test_trace_methods__api_calls_from_worker_threads__nested_in_calling_method_span(self):
+        music_util = self.instrumentation.trace_methods(
+            MusicUtil(self.spotify, lambda _: None), ["get_recommendations_based_on_tracks"])
+        seed_tracks = [
+            mock_track(spotify_id=self.library.get_track_id(album_index, 1))
+            for album_index in range(15)
+        ]
+
+        music_util.get_recommendations_based_on_tracks(seed_tracks, mock_song_attribute_ranges(loudness_range=[-60, 0]))
+
+        method_span = next(
+            span for span in self.instrumentation.spans
+            if span.name == "MusicUtil.get_recommendations_based_on_tracks")
+        api_spans = [span for span in self.instrumentation.spans if span.is_api_call]
+        self.assertGreater(len(api_spans), 1)
+        self.assertTrue(all(span.parent_span_id == method_span.span_id for span in api_spans))
+
+    def test_export__hands_spans_and_summary_to_exporters_then_resets(self):
+        with self.instrumentation.span("action"):
+            self.spotify.get_my_albums(10)
+
+        self.instrumentation.export()
+
+        spans, summary = self.exporter.export.call_args[0]
+        self.assertEqual("action", spans[-1].name)
+        self.assertEqual(len(self.server.requests), len(spans) - 1)
+        self.assertEqual(len(self.server.requests), summary["api_calls"])
+        self.assertEqual(0, self.instrumentation.get_summary()["api_calls"])
+
+    def test_span__records_error_and_reraises(self):
+        with self.assertRaises(ValueError):
+            with self.instrumentation.span("action"):
+                raise ValueError("oops")
+
+        self.assertIn("oops", self.instrumentation.spans[0].error)
+
+
+class TestInstrumentationExporters(unittest.TestCase):
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+        with self.instrumentation.span("MusicLibBot.run_song_scrounger"):
+            with self.instrumentation.span("spotify.search", is_api_call=True, endpoint="search"):
+                pass
+            self.instrumentation.record_api_call("search", 0.03)
+        self.spans = self.instrumentation.spans
+        self.summary = self.instrumentation.get_summary()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "trace")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_stdout_summary_exporter(self):
+        lines = []
+
+        StdoutSummaryExporter(lines.append).export(self.spans, self.summary)
+
+        self.assertTrue(lines[0].startswith("MusicLibBot.run_song_scrounger took"))
+        self.assertIn("1 API call(s)", lines[1])
+        self.assertIn("- MusicLibBot.run_song_scrounger made 1 API call(s)", lines)
+
+    def test_json_lines_exporter(self):
+        JsonLinesExporter(self.path).export(self.spans, self.summary)
+
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(["span", "span", "summary"], [record["type"] for record in records])
+        self.assertEqual(1, records[-1]["api_calls"])
+
+    def test_open_telemetry_json_exporter(self):
+        OpenTelemetryJsonExporter(self.path).export(self.spans, self.summary)
+
+        with open(self.path) as f:
+            request = json.loads(f.readline())
+        otel_spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        api_span, action_span = otel_spans
+        self.assertEqual(action_span["spanId"], api_span["parentSpanId"])
+        self.assertNotIn("parentSpanId", action_span)
+        self.assertEqual(32, len(api_span["traceId"]))
+        self.assertEqual({"key": "endpoint", "value": {"stringValue": "search"}}, api_span["attributes"][0])
@@ -0,0 +1,174 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from packages.music_api_clients.library_snapshot import LibrarySnapshot
+from packages.music_api_clients.spotify import Spotify
+from packages.music_management.genre_signature_grouper import GenreSignatureGrouper
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MIN_SECONDS_BETWEEN_SYNCS, MyMusicLib
+from tests.fake_spotify_server import FAKE_ACCESS_TOKEN, FakeSpotifyLibrary, FakeSpotifyServer
+
+
+class TestLibrarySnapshot(unittest.TestCase):
+    def setUp(self):
+        self.library = FakeSpotifyLibrary(num_albums=130, tracks_per_album=3, num_saved_albums=120)
+        self.server = FakeSpotifyServer(self.library).start()
+        self.spotify = Spotify(base_url=self.server.base_url, access_token=FAKE_ACCESS_TOKEN)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "library_snapshot.sqlite")
+        self.snapshot = LibrarySnapshot(self.path)
+
+    def tearDown(self):
+        self.snapshot.close()
+        self.directory.cleanup()
+        self.server.stop()
+
+    def test_sync__first_time__fetches_whole_library_and_each_artists_genres_once(self):
+        changes = self.snapshot.sync(self.spotify)
+
+        albums = self.snapshot.get_albums()
+        self.assertEqual({"added": 120, "removed": 0, "total": 120}, changes)
+        self.assertEqual(sorted(self.library.saved_album_ids), sorted(album.spotify_id for album in albums))
+        self.assertEqual(3, self.server.get_num_requests("GET", "me/albums"))
+        self.assertEqual(1, self.server.get_num_requests("GET", "artists"))
+        album = next(album for album in albums if album.spotify_id == "album7")
+        self.assertEqual(sorted(self.library.get_artist(album.artists[0].spotify_id)["genres"]), sorted(album.genres))
+        self.assertEqual([track["id"] for track in self.library.get_album("album7")["tracks"]["items"]],
+            [track.spotify_id for track in album.tracks])
+
+    def test_sync__again__stops_at_first_known_album(self):
+        self.snapshot.sync(self.spotify)
+        self.library.save_album("album125", "2021-01-01T00:00:00Z")
+        num_requests = len(self.server.requests)
+
+        changes = self.snapshot.sync(self.spotify)
+
+        self.assertEqual({"added": 1, "removed": 0, "total": 121}, changes)
+        self.assertEqual(num_requests + 1, len(self.server.requests))
+        self.assertEqual("album125", self.snapshot.get_albums(1)[0].spotify_id)
+
+    def test_sync__artist_without_genres__not_fetched_again(self):
+        get_genres_by_artist_id = self.spotify.get_genres_by_artist_id
+        # as if the API returned null for the first artist
+        self.spotify.get_genres_by_artist_id = lambda artist_ids: {
+            artist_id: genres
+            for artist_id, genres in get_genres_by_artist_id(artist_ids).items()
+            if artist_id != artist_ids[0]
+        }
+        self.snapshot.sync(self.spotify)
+        self.library.save_album("album125", "2021-01-01T00:00:00Z")
+
+        self.snapshot.sync(self.spotify)
+
+        self.assertEqual(1, self.server.get_num_requests("GET", "artists"))
+
+    def test_sync__album_removed__pages_through_library_to_find_it(self):
+        self.snapshot.sync(self.spotify)
+        self.library.unsave_album("album60")
+
+        changes = self.snapshot.sync(self.spotify)
+
+        self.assertEqual({"added": 0, "removed": 1, "total": 119}, changes)
+        self.assertNotIn("album60", [album.spotify_id for album in self.snapshot.get_albums()])
+
+    def test_sync__count_mismatch_left_after_paging_through_library__not_paged_through_again(self):
+        get_my_saved_album_pages = self.spotify.get_my_saved_album_pages
+        # as if Spotify counted an album it doesn't list
+        self.spotify.get_my_saved_album_pages = lambda: (
+            (page, total + 1) for page, total in get_my_saved_album_pages())
+        self.snapshot.sync(self.spotify)
+        num_requests = len(self.server.requests)
+
+        changes = self.snapshot.sync(self.spotify)
+
+        self.assertEqual({"added": 0, "removed": 0, "total": 120}, changes)
+        self.assertEqual(num_requests + 1, len(self.server.requests))
+
+    def test_sync__album_saved_again__moves_to_top(self):
+        self.snapshot.sync(self.spotify)
+        self.library.save_album("album60", "2021-01-01T00:00:00Z")
+
+        changes = self.snapshot.sync(self.spotify)
+
+        self.assertEqual({"added": 0, "removed": 0, "total": 120}, changes)
+        self.assertEqual("album60", self.snapshot.get_albums(1)[0].spotify_id)
+
+    def test_kept_on_disk(self):
+        self.snapshot.sync(self.spotify)
+        self.snapshot.close()
+
+        self.snapshot = LibrarySnapshot(self.path)
+
+        self.assertEqual(120, len(self.snapshot))
+
+    def test_my_music_lib__groups_albums_from_snapshot_without_fetching_genres_again(self):
+        now = [0]
+        my_music_lib = MyMusicLib(
+            self.spotify, MusicUtil(self.spotify, MagicMock()), MagicMock(), self.snapshot, clock=lambda: now[0])
+        my_music_lib.get_my_albums_grouped_by_genre(10, 1)
+        num_requests = len(self.server.requests)
+        now[0] += MIN_SECONDS_BETWEEN_SYNCS
+
+        album_groups = my_music_lib.get_my_albums_grouped_by_genre(50, 1)
+
+        self.assertGreater(len(album_groups), 0)
+        self.assertTrue(all(
+            set(group["genres"]) <= set(album.genres)
+            for group in album_groups
+            for album in group["albums"]
+        ))
+        self.assertEqual(num_requests + 1, len(self.server.requests))
+
+    def test_get_genre_groups__kept_up_to_date_with_library(self):
+        self.snapshot.sync(self.spotify)
+        self.library.save_album("album125", "2021-01-01T00:00:00Z")
+        self.library.unsave_album("album60")
+        self.snapshot.sync(self.spotify)
+        self.snapshot.close()
+        self.snapshot = LibrarySnapshot(self.path)
+
+        grouper = GenreSignatureGrouper()
+        for album in self.snapshot.get_albums():
+            grouper.add(album.spotify_id, album.genres, [(artist.spotify_id, artist.name) for artist in album.artists])
+        as_comparable = lambda album_groups: sorted(
+            (tuple(group["genres"]), tuple(sorted(group["album_ids"])), tuple(sorted(group["artist_ids"])))
+            for group in album_groups
+        )
+        self.assertEqual(as_comparable(grouper.get_groups(1)), as_comparable(self.snapshot.get_genre_groups(1)))
+
+    def test_my_music_lib__finds_albums_with_genres_in_view(self):
+        my_music_lib = MyMusicLib(self.spotify, MusicUtil(self.spotify, MagicMock()), MagicMock(), self.snapshot)
+        self.snapshot.sync(self.spotify)
+        genres = self.snapshot.get_genre_groups(2)[0]["genres"]
+        num_requests = len(self.server.requests)
+
+        albums = my_music_lib.find_my_albums_with_genres(genres[:1], 50, superset=True)
+
+        self.assertGreater(len(albums), 1)
+        self.assertTrue(all(set(genres[:1]) <= set(album.genres) for album in albums))
+        self.assertEqual([], my_music_lib.find_my_albums_with_genres(["polka"], 50))
+        # syncing once, which finds nothing new
+        self.assertEqual(num_requests + 1, len(self.server.requests))
+
+    def test_my_music_lib__synced_at_most_once_every_min_seconds_between_syncs(self):
+        now = [0]
+        my_music_lib = MyMusicLib(
+            self.spotify, MusicUtil(self.spotify, MagicMock()), MagicMock(), self.snapshot, clock=lambda: now[0])
+        my_music_lib.get_my_albums(10)
+        self.library.save_album("album125", "2021-01-01T00:00:00Z")
+        num_requests = len(self.server.requests)
+
+        my_music_lib.get_all_my_album_groups_by_genre(1)
+        my_music_lib.get_my_albums(10)
+        num_requests_before_interval = len(self.server.requests)
+        now[0] += MIN_SECONDS_BETWEEN_SYNCS
+        albums = my_music_lib.get_my_albums(10)
+
+        self.assertEqual(num_requests, num_requests_before_interval)
+        self.assertEqual("album125", albums[0].spotify_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
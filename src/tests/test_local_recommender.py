@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from packages.music_management.local_recommender import LocalRecommender
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MyMusicLib
+from packages.music_management.playlist_updater import PlaylistUpdater
+from packages.music_api_clients.models.audio_features import AudioFeatures
+from tests.fixtures import mock_playlist, mock_song_attribute_ranges, mock_track
+
+
+def mock_track_with_features(spotify_id, danceability, energy=0.5, popularity=50):
+    return mock_track(
+        spotify_id=spotify_id,
+        popularity=popularity,
+        audio_features=AudioFeatures(
+            danceability, energy, 0, -10, 1, 0.1, 0.1, 0.1, 0.1, 0.5, 120, 200000, 4),
+    )
+
+
+class TestLocalRecommender(unittest.TestCase):
+    def setUp(self):
+        self.local_recommender = LocalRecommender()
+
+    def test_index_tracks__no_audio_features__skips_track(self):
+        num_indexed = self.local_recommender.index_tracks(
+            [mock_track(spotify_id="no-features", audio_features=None)])
+
+        self.assertEqual(0, num_indexed)
+        self.assertEqual(0, self.local_recommender.get_num_tracks())
+
+    def test_index_tracks__same_track_twice__indexed_once(self):
+        track = mock_track_with_features("same-track", 0.5)
+
+        self.local_recommender.index_tracks([track])
+        self.local_recommender.index_tracks([track])
+
+        self.assertEqual(1, self.local_recommender.get_num_tracks())
+
+    def test_get_tracks_in_ranges__only_returns_tracks_within_ranges(self):
+        tracks = [
+            mock_track_with_features(f"track-{i}", danceability=i / 20)
+            for i in range(20)
+        ]
+        self.local_recommender.index_tracks(tracks)
+
+        matching_tracks = self.local_recommender.get_tracks_in_ranges(
+            mock_song_attribute_ranges(danceability_range=[0.25, 0.5], loudness_range=[-60, 0]))
+
+        self.assertEqual(
+            {f"track-{i}" for i in range(5, 11)},
+            {track.spotify_id for track in matching_tracks},
+        )
+
+    def test_get_recommendations_based_on_tracks__orders_by_distance_to_centroid(self):
+        seed = mock_track_with_features("seed", danceability=0.5)
+        close = mock_track_with_features("close", danceability=0.55)
+        far = mock_track_with_features("far", danceability=0.9)
+        self.local_recommender.index_tracks([seed, far, close])
+
+        recommendations = self.local_recommender.get_recommendations_based_on_tracks(
+            [seed], mock_song_attribute_ranges(loudness_range=[-60, 0]))
+
+        self.assertEqual([close, far], recommendations)
+
+    def test_save_and_load__keeps_indexed_tracks(self):
+        self.local_recommender.index_tracks([mock_track_with_features("saved", 0.5)])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.pickle")
+            self.local_recommender.save(path)
+
+            loaded = LocalRecommender.load(path)
+
+        self.assertEqual(1, loaded.get_num_tracks())
+
+    def test_add_recommended_songs__no_remote_recommendations__falls_back_to_local(self):
+        seed = mock_track_with_features("seed", danceability=0.5)
+        known_track = mock_track_with_features("known", danceability=0.55)
+        self.local_recommender.index_tracks([known_track])
+        playlist_updater = self.get_playlist_updater(recommended_tracks_by_percentage={})
+        playlist = mock_playlist(tracks=[seed])
+
+        num_added = playlist_updater.add_recommended_songs(
+            playlist, mock_song_attribute_ranges(loudness_range=[-60, 0]), lambda: 10)
+
+        self.assertEqual(1, num_added)
+        self.mock_spotify.add_tracks.assert_called_once_with(playlist, [known_track])
+
+    def test_add_recommended_songs__highly_recommended_remotely__fetches_no_audio_features(self):
+        recommended_track = mock_track(spotify_id="recommended", audio_features=None)
+        playlist_updater = self.get_playlist_updater(
+            recommended_tracks_by_percentage={1.0: [recommended_track], 0.2: [mock_track(spotify_id="weak", audio_features=None)]})
+        playlist = mock_playlist(tracks=[mock_track_with_features("seed", danceability=0.5)])
+
+        num_added = playlist_updater.add_recommended_songs(
+            playlist, mock_song_attribute_ranges(loudness_range=[-60, 0]), lambda: 10)
+
+        self.assertEqual(1, num_added)
+        self.mock_spotify.set_track_audio_features.assert_not_called()
+        self.assertEqual(1, self.local_recommender.get_num_tracks())
+
+    def test_add_recommended_songs__only_weakly_recommended_remotely__indexes_them_for_local(self):
+        weakly_recommended_track = mock_track(spotify_id="weak", popularity=50, audio_features=None)
+        def set_track_audio_features(tracks):
+            for track in tracks:
+                track.audio_features = mock_track_with_features(track.spotify_id, danceability=0.55).audio_features
+        playlist_updater = self.get_playlist_updater(recommended_tracks_by_percentage={0.2: [weakly_recommended_track]})
+        self.mock_spotify.set_track_audio_features.side_effect = set_track_audio_features
+        playlist = mock_playlist(tracks=[mock_track_with_features("seed", danceability=0.5)])
+
+        num_added = playlist_updater.add_recommended_songs(
+            playlist, mock_song_attribute_ranges(loudness_range=[-60, 0]), lambda: 10)
+
+        self.assertEqual(1, num_added)
+        self.mock_spotify.set_track_audio_features.assert_called_once_with([weakly_recommended_track])
+        self.mock_spotify.add_tracks.assert_called_once_with(playlist, [weakly_recommended_track])
+
+    def get_playlist_updater(self, recommended_tracks_by_percentage):
+        self.mock_spotify = MagicMock()
+        music_util = MusicUtil(self.mock_spotify, MagicMock())
+        music_util.get_recommendations_based_on_tracks = MagicMock(return_value=recommended_tracks_by_percentage)
+        return PlaylistUpdater(
+            MyMusicLib(self.mock_spotify, music_util, MagicMock()),
+            music_util,
+            self.mock_spotify,
+            MagicMock(),
+            MagicMock(),
+            local_recommender=self.local_recommender,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
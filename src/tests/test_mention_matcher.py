@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import MagicMock
+
+from packages.song_scrounger.mention_matcher import MentionMatcher
+from packages.song_scrounger.song_scrounger import SongScrounger
+from tests.fixtures import mock_artist, mock_track
+
+
+class TestMentionMatcher(unittest.TestCase):
+    def test_scan__finds_words_but_not_as_substrings(self):
+        matcher = MentionMatcher(["allen", "stone", "the rolling stones"])
+
+        scan = matcher.scan("The Rolling Stones challenged the Beatles")
+
+        self.assertTrue(scan.contains("the rolling stones"))
+        self.assertFalse(scan.contains("stone"))
+        self.assertFalse(scan.contains("allen"))
+
+    def test_scan__word_is_suffix_of_another_word__finds_both(self):
+        matcher = MentionMatcher(["lonnie donnegan", "donnegan"])
+
+        scan = matcher.scan("by Lonnie Donnegan.")
+
+        self.assertTrue(scan.contains("lonnie donnegan"))
+        self.assertTrue(scan.contains("donnegan"))
+
+    def test_scan__word_with_regex_special_chars__matched_literally(self):
+        matcher = MentionMatcher(["x.y", "ac/dc (live)", ""])
+
+        scan = matcher.scan("AC/DC (Live) and xzy")
+
+        self.assertTrue(scan.contains("ac/dc (live)"))
+        self.assertTrue(scan.has_answer("x.y", scan.lowered_text))
+        self.assertFalse(scan.contains("x.y"))
+        self.assertFalse(scan.has_answer("", scan.lowered_text))
+
+    def test_filter_by_mentioned_artist__scans_text_instead_of_searching_it(self):
+        song_scrounger = SongScrounger(MagicMock())
+        song_scrounger.find_occurrences = MagicMock(return_value=[])
+        song_by_mentioned_artist = mock_track(
+            artists=[mock_artist(name="Lonnie Donnegan & His Skiffle Group")])
+        song_by_unmentioned_artist = mock_track(artists=[mock_artist(name="Allen Stone")])
+
+        filtered_songs = song_scrounger.filter_by_mentioned_artist(
+            [song_by_mentioned_artist, song_by_unmentioned_artist],
+            "The Rolling Stones and Lonnie Donnegan",
+        )
+
+        self.assertEqual({song_by_mentioned_artist}, filtered_songs)
+        song_scrounger.find_occurrences.assert_not_called()
+
+    def test_filter_by_mentioned_artist__artist_names_with_regex_special_chars__found_by_scan(self):
+        song_scrounger = SongScrounger(MagicMock())
+        song_scrounger.find_occurrences = MagicMock(return_value=[])
+        songs_by_mentioned_artists = {
+            mock_track(spotify_id="1", artists=[mock_artist(name="AC/DC")]),
+            mock_track(spotify_id="2", artists=[mock_artist(name="Sunn O)))")]),
+        }
+        song_by_unmentioned_artist = mock_track(spotify_id="3", artists=[mock_artist(name="Allen Stone")])
+
+        filtered_songs = song_scrounger.filter_by_mentioned_artist(
+            songs_by_mentioned_artists | {song_by_unmentioned_artist},
+            "AC/DC opened for Sunn O))) that night.",
+        )
+
+        self.assertEqual(songs_by_mentioned_artists, filtered_songs)
+        song_scrounger.find_occurrences.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 
 from tests.fixtures import mock_album, mock_artist, mock_audio_features, mock_playlist, mock_song_attribute_ranges, mock_track
-from packages.music_management.music_util import MusicUtil
+from packages.music_management.music_util import MAX_RECOMMENDATION_SEED_BATCHES, MusicUtil
 
 
 class TestMusicUtil(unittest.TestCase):
@@ -222,6 +222,53 @@ class TestMusicUtil(unittest.TestCase):
         self.assertEqual(2.0/3.0, recommendations_with_percentage[recommended_track1])
         self.assertEqual(1.0/3.0, recommendations_with_percentage[recommended_track2])
 
+    def test__get_recommendations_based_on_tracks_in_batches__seed_track_recommended__excludes_it(self):
+        seed_track = mock_track(spotify_id="mock-seed-track")
+        recommended_track = mock_track(spotify_id="mock-recommendation")
+        self.mock_spotify.get_recommendation_seed_limit = MagicMock(
+            return_value=5)
+        self.mock_spotify.get_recommendations_based_on_tracks = MagicMock(
+            return_value=[seed_track, recommended_track])
+
+        recommendations_with_percentage = self.music_util._get_recommendations_based_on_tracks_in_batches(
+            [seed_track], mock_song_attribute_ranges())
+
+        self.assertEqual({recommended_track: 1.0}, recommendations_with_percentage)
+
+    def test__get_recommendations_based_on_tracks_in_batches__max_seed_batches__caps_num_requests(self):
+        track_ids = [f"mock-seed-track-{i}" for i in range(10)]
+        self.mock_spotify.get_recommendation_seed_limit = MagicMock(
+            return_value=1)
+        recommended_track = mock_track(spotify_id="mock-recommendation")
+        self.mock_spotify.get_recommendations_based_on_tracks = MagicMock(
+            return_value=[recommended_track])
+
+        recommendations_with_percentage = self.music_util._get_recommendations_based_on_tracks_in_batches(
+            track_ids, mock_song_attribute_ranges(), max_seed_batches=3)
+
+        self.assertEqual(3, self.mock_spotify.get_recommendations_based_on_tracks.call_count)
+        self.assertEqual(1.0, recommendations_with_percentage[recommended_track])
+
+    def test_get_recommendations_based_on_tracks__huge_playlist__capped_by_default(self):
+        tracks = [mock_track(spotify_id=f"mock-seed-track-{i}") for i in range(MAX_RECOMMENDATION_SEED_BATCHES + 10)]
+        self.mock_spotify.get_recommendation_seed_limit = MagicMock(
+            return_value=1)
+        self.mock_spotify.get_recommendations_based_on_tracks = MagicMock(return_value=[])
+
+        self.music_util.get_recommendations_based_on_tracks(tracks, mock_song_attribute_ranges())
+
+        self.assertEqual(MAX_RECOMMENDATION_SEED_BATCHES, self.mock_spotify.get_recommendations_based_on_tracks.call_count)
+
+    def test__get_recommendations_based_on_tracks_in_batches__no_tracks__returns_empty(self):
+        self.mock_spotify.get_recommendation_seed_limit = MagicMock(
+            return_value=5)
+
+        recommendations_with_percentage = self.music_util._get_recommendations_based_on_tracks_in_batches(
+            [], mock_song_attribute_ranges())
+
+        self.assertEqual({}, recommendations_with_percentage)
+        self.mock_spotify.get_recommendations_based_on_tracks.assert_not_called()
+
     def test_get_artist_ids(self):
         artist = mock_artist(spotify_id="mock-id-123")
         mock_artists = [artist]
@@ -593,6 +640,19 @@ class TestMusicUtil(unittest.TestCase):
         self.assertEqual(['hip hop', 'rap', 'trap'], genre_matches[mock_album3][mock_album1])
         self.assertEqual(['hip hop', 'rap', 'trap'], genre_matches[mock_album3][mock_album2])
 
+    def test_group_albums_with_genres__no_genres_shared__groups_each_album_without_fetching_genres(self):
+        jazz_album = mock_album(spotify_id='id1', genres=['jazz'])
+        folk_album = mock_album(spotify_id='id2', genres=['folk'])
+
+        album_groups = self.music_util.group_albums_with_genres([jazz_album, folk_album], 1)
+
+        self.assertEqual(
+            [(['jazz'], [jazz_album]), (['folk'], [folk_album])],
+            [(group['genres'], group['albums']) for group in album_groups],
+        )
+        self.mock_spotify.get_albums.assert_not_called()
+        self.mock_spotify.get_artist_genres.assert_not_called()
+
     def test__group_albums__2_albums_1_genre(self):
         mock_album1 = mock_album(spotify_id='id1')
         mock_album2 = mock_album(spotify_id='id2')
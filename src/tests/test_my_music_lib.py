@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 
 from packages.music_management.my_music_lib import MyMusicLib
+from tests.fixtures import mock_track
 
 
 class TestMyMusicLib(unittest.TestCase):
@@ -9,6 +10,42 @@ class TestMyMusicLib(unittest.TestCase):
         self.my_music_lib = MyMusicLib(
             MagicMock(), MagicMock(), MagicMock())
 
+    def test_add_tracks_to_playlist_in_chunks__adds_in_order_without_duplicates(self):
+        playlist = MagicMock()
+        tracks = [mock_track(spotify_id=str(index)) for index in range(250)]
+        on_chunk_added = MagicMock()
+
+        num_tracks_added = self.my_music_lib.add_tracks_to_playlist_in_chunks(
+            playlist, iter(tracks + tracks[:10]), on_chunk_added)
+
+        self.assertEqual(250, num_tracks_added)
+        chunks = [args[1] for args, _ in self.my_music_lib.music_api_client.add_tracks.call_args_list]
+        self.assertEqual([100, 100, 50], [len(chunk) for chunk in chunks])
+        self.assertEqual(tracks, [track for chunk in chunks for track in chunk])
+        self.assertEqual([100, 200, 250], [args[0] for args, _ in on_chunk_added.call_args_list])
+
+    def test_add_tracks_to_playlist_in_chunks__no_tracks__adds_nothing(self):
+        num_tracks_added = self.my_music_lib.add_tracks_to_playlist_in_chunks(MagicMock(), iter([]))
+
+        self.assertEqual(0, num_tracks_added)
+        self.my_music_lib.music_api_client.add_tracks.assert_not_called()
+
+    def test_get_suggested_album_groups__enough_albums_and_artists__most_albums_first(self):
+        self.my_music_lib.music_util.get_num_diff_artists.side_effect = lambda albums: len(set(albums))
+        album_groups = [
+            {"genres": ["rock"], "albums": ["a", "b"]},
+            {"genres": ["jazz", "bebop"], "album_ids": ["c", "d", "e"], "artist_ids": ["x", "y"]},
+            {"genres": ["polka"], "albums": ["f"]},
+            {"genres": ["folk"], "album_ids": ["g", "h"], "artist_ids": ["z"]},
+        ]
+
+        suggested = self.my_music_lib.get_suggested_album_groups(album_groups, 2, 2)
+
+        self.assertEqual([
+            {"description": "jazz, bebop", "album_ids": ["c", "d", "e"], "artist_ids": ["x", "y"]},
+            {"description": "rock", "albums": ["a", "b"]},
+        ], suggested)
+
     @unittest.skip("ported from old test")
     def test_get_playlist(self):
         name = "Real Canadian Cheddar"
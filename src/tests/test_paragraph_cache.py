@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from packages.song_scrounger.paragraph_cache import ParagraphCache
+from packages.song_scrounger.song_scrounger import SongScrounger
+from tests.fixtures import mock_artist, mock_track
+
+
+class TestParagraphCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_file_path = os.path.join(self.directory.name, "newsletter.txt")
+        self.songs_by_name = {
+            "Sorry": [
+                mock_track(name="Sorry", spotify_id="1", popularity=90, artists=[mock_artist("Justin Bieber")]),
+                mock_track(name="Sorry", spotify_id="2", popularity=50, artists=[mock_artist("Nothing But Thieves")]),
+            ],
+            "Hello": [mock_track(name="Hello", spotify_id="3", popularity=80, artists=[mock_artist("Adele")])],
+            "Rain": [mock_track(name="Rain", spotify_id="4", popularity=40, artists=[mock_artist("The Beatles")])],
+        }
+        self.spotify_client = MagicMock()
+        self.spotify_client.get_matching_tracks = MagicMock(side_effect=lambda name: set(self.songs_by_name[name]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_input(self, text):
+        with open(self.input_file_path, "w") as f:
+            f.write(text)
+
+    def find_songs(self, stop_searching_once_artist_mentioned=False):
+        self.spotify_client.get_matching_tracks.reset_mock()
+        # a fresh scrounger each time, like re-running the script
+        song_scrounger = SongScrounger(self.spotify_client, stop_searching_once_artist_mentioned)
+        return song_scrounger.find_songs_in_text_file(self.input_file_path, incremental=True)
+
+    def get_looked_up_names(self):
+        return {args[0] for args, _ in self.spotify_client.get_matching_tracks.call_args_list}
+
+    def test_find_songs_in_text_file__nothing_changed__nothing_looked_up(self):
+        self.write_input("\"Sorry\" is great.\n\"Hello\" by Adele\n")
+        first_results = self.find_songs()
+
+        second_results = self.find_songs()
+
+        self.assertEqual(set(), self.get_looked_up_names())
+        self.assertEqual(
+            {name: set(songs) for name, songs in first_results.items()},
+            {name: set(songs) for name, songs in second_results.items()},
+        )
+        self.assertTrue(os.path.exists(ParagraphCache.get_path(self.input_file_path, "songs")))
+
+    def test_find_songs_in_text_file__one_paragraph_edited__only_it_is_redone(self):
+        self.write_input("\"Sorry\" is great.\n\"Hello\" by Adele\n")
+        self.find_songs()
+        self.write_input("\"Sorry\" is great.\n\"Rain\", not \"Hello\", by Adele\n")
+
+        results = self.find_songs()
+
+        self.assertEqual({"Rain", "Hello"}, self.get_looked_up_names())
+        self.assertEqual({"Sorry", "Hello", "Rain"}, set(results.keys()))
+
+    def test_find_songs_in_text_file__artist_newly_mentioned__paragraph_redone(self):
+        self.write_input("\"Sorry\" is great.\n")
+        results = self.find_songs()
+        self.assertEqual(2, len(results["Sorry"]))
+
+        self.write_input("\"Sorry\" is great.\nNothing But Thieves are too.\n")
+        results = self.find_songs()
+
+        self.assertEqual({"Sorry"}, self.get_looked_up_names())
+        self.assertEqual(["Nothing But Thieves"], [song.artists[0].name for song in results["Sorry"]])
+
+    def test_find_songs_in_text_file__unrelated_artist_mentioned__paragraph_reused(self):
+        self.write_input("\"Sorry\" is great.\n")
+        self.find_songs()
+
+        self.write_input("\"Sorry\" is great.\nTaylor Swift is too.\n")
+        self.find_songs()
+
+        self.assertEqual(set(), self.get_looked_up_names())
+
+    def test_find_songs_in_text_file__search_stopped_early__paragraph_not_reused(self):
+        def get_matching_tracks(name, stop_when=None):
+            songs = set()
+            # a page of results per song
+            for song in self.songs_by_name[name]:
+                songs.add(song)
+                if stop_when is not None and stop_when(songs):
+                    break
+            return songs
+        self.spotify_client.get_matching_tracks = MagicMock(side_effect=get_matching_tracks)
+        self.write_input("\"Sorry\" is great.\nJustin Bieber is too.\n\"Hello\" by Adele\n\"Rain\" is lovely.\n")
+        self.find_songs(stop_searching_once_artist_mentioned=True)
+
+        self.find_songs(stop_searching_once_artist_mentioned=True)
+
+        self.assertEqual({"Sorry", "Hello"}, self.get_looked_up_names())
+
+    def test_save__removed_paragraphs__dropped(self):
+        path = os.path.join(self.directory.name, "cache.pickle")
+        paragraph_cache = ParagraphCache(path)
+        paragraph_cache.set("kept", {}, set(), lambda artist_name: False)
+        paragraph_cache.set("removed", {}, set(), lambda artist_name: False)
+        paragraph_cache.save()
+
+        paragraph_cache = ParagraphCache.load(path)
+        self.assertEqual({}, paragraph_cache.get("kept", lambda artist_name: False))
+        paragraph_cache.save()
+
+        paragraph_cache = ParagraphCache.load(path)
+        self.assertEqual(1, len(paragraph_cache))
+        self.assertIsNone(paragraph_cache.get("removed", lambda artist_name: False))
@@ -9,6 +9,8 @@ from tests.fixtures import mock_audio_features, mock_playlist, mock_track
 class TestPlaylistAnalyzer(unittest.TestCase):
     def setUp(self):
         self.mock_spotify = MagicMock()
+        # all the playlist's tracks in one page
+        self.mock_spotify.get_playlist_track_pages.side_effect = lambda playlist: iter([playlist.tracks_fetcher()])
         self.music_util = MusicUtil(self.mock_spotify, MagicMock())
         self.my_music_lib = MyMusicLib(MagicMock(), MagicMock(), MagicMock())
         self.playlist_analyzer = PlaylistAnalyzer(self.my_music_lib, self.music_util, MagicMock())
@@ -51,4 +53,23 @@ class TestPlaylistAnalyzer(unittest.TestCase):
         audio_feature_range = self.playlist_analyzer.get_audio_feature_representative_range(playlist)
 
         self.assertEqual(0.75, audio_feature_range[0].danceability)
-        self.assertEqual(0.75, audio_feature_range[1].danceability)
\ No newline at end of file
+        self.assertEqual(0.75, audio_feature_range[1].danceability)
+
+    def test_get_strict_song_attribute_ranges__tracks_already_fetched__sketched_without_fetching_again(self):
+        playlist = mock_playlist(tracks=[
+            mock_track(spotify_id=str(index), audio_features=mock_audio_features(danceability=danceability), popularity=popularity)
+            for index, (danceability, popularity) in enumerate([(0.2, 20), (0.4, 40), (0.6, 60), (0.8, 80)])
+        ])
+        playlist.get_tracks()
+
+        song_attribute_ranges = self.music_util.get_strict_song_attribute_ranges(playlist, self.playlist_analyzer)
+
+        self.assertAlmostEqual(0.25, song_attribute_ranges.danceability_range[0])
+        self.assertAlmostEqual(0.75, song_attribute_ranges.danceability_range[1])
+        self.assertEqual((25, 75), song_attribute_ranges.popularity_range)
+        self.mock_spotify.get_playlist_track_pages.assert_not_called()
+        self.mock_spotify.get_tracks.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import MagicMock
+
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.my_music_lib import MyMusicLib
+from packages.music_management.playlist_updater import PlaylistUpdater
+from tests.fixtures import mock_album, mock_playlist, mock_track
+
+
+class TestPlaylistUpdater(unittest.TestCase):
+    def setUp(self):
+        self.mock_spotify = MagicMock()
+        self.music_util = MusicUtil(self.mock_spotify, MagicMock())
+        self.my_music_lib = MyMusicLib(self.mock_spotify, self.music_util, MagicMock())
+        self.playlist_updater = PlaylistUpdater(
+            self.my_music_lib, self.music_util, self.mock_spotify, MagicMock(), MagicMock())
+
+    def test_plan_target_update_from_seed__all_albums_in_target__fetches_no_albums(self):
+        album = mock_album(spotify_id="mock-album")
+        seed = mock_playlist(tracks=[mock_track(spotify_id="1", album=album)])
+        target = mock_playlist(tracks=[mock_track(spotify_id="2", album=album)])
+
+        plan = self.playlist_updater.plan_target_update_from_seed(seed, target, 1)
+
+        self.assertTrue(plan.is_empty())
+        self.mock_spotify.get_albums_by_ids.assert_not_called()
+        self.mock_spotify.get_albums_of_tracks.assert_not_called()
+
+    def test_plan_target_update_from_seed__new_album__only_fetches_new_album(self):
+        old_album, new_album = mock_album(spotify_id="old-album"), mock_album(spotify_id="new-album")
+        new_track = mock_track(spotify_id="new-track", album=new_album, popularity=1)
+        new_album.tracks = [new_track]
+        seed = mock_playlist(tracks=[
+            mock_track(spotify_id="1", album=old_album),
+            mock_track(spotify_id="2", album=new_album),
+            mock_track(spotify_id="3", album=new_album),
+        ])
+        target = mock_playlist(tracks=[mock_track(spotify_id="4", album=old_album)])
+        self.mock_spotify.get_albums_by_ids = MagicMock(return_value=[new_album])
+
+        plan = self.playlist_updater.plan_target_update_from_seed(seed, target, 1)
+
+        self.mock_spotify.get_albums_by_ids.assert_called_once_with(["new-album"])
+        self.assertEqual(["new-album"], plan.album_ids_to_add)
+        self.assertEqual([new_track], plan.tracks_to_add)
+        self.assertEqual(1, len(plan.positions))
+
+    def test_plan_target_update_from_seed__empty_target__appends_without_positions(self):
+        album = mock_album(spotify_id="mock-album")
+        track = mock_track(spotify_id="1", album=album, popularity=1)
+        album.tracks = [track]
+        seed, target = mock_playlist(tracks=[track]), mock_playlist(tracks=[])
+        self.mock_spotify.get_albums_by_ids = MagicMock(return_value=[album])
+
+        plan = self.playlist_updater.plan_target_update_from_seed(seed, target, 1)
+
+        self.assertIsNone(plan.positions)
+        self.assertEqual([track], plan.tracks_to_add)
+
+    def test_apply_seed_sync_plan__with_positions__inserts_at_each_position(self):
+        album = mock_album(spotify_id="mock-album")
+        track = mock_track(spotify_id="1", album=album, popularity=1)
+        album.tracks = [track]
+        seed = mock_playlist(tracks=[track])
+        target = mock_playlist(tracks=[mock_track(spotify_id="2")])
+        self.mock_spotify.get_albums_by_ids = MagicMock(return_value=[album])
+        plan = self.playlist_updater.plan_target_update_from_seed(seed, target, 1)
+
+        num_tracks_added = self.playlist_updater.apply_seed_sync_plan(plan)
+
+        self.assertEqual(1, num_tracks_added)
+        self.mock_spotify.add_track_at_position.assert_called_once_with(
+            target, track, plan.positions[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import random
+import unittest
+from statistics import quantiles
+from unittest.mock import MagicMock
+
+from packages.music_api_clients.models.audio_features import AudioFeatures
+from packages.music_management.music_util import MusicUtil
+from packages.music_management.playlist_analyzer import PlaylistAnalyzer
+from packages.music_management.playlist_sketch import PlaylistSketch
+from packages.music_management.quantile_sketch import QuantileSketch
+from tests.fixtures import mock_playlist, mock_track
+
+
+def mock_track_with_features(danceability, popularity=50):
+    return mock_track(
+        popularity=popularity,
+        audio_features=AudioFeatures(
+            danceability, 0.5, 0, -10, 1, 0.1, 0.1, 0.1, 0.1, 0.5, 120, 200000, 4),
+    )
+
+
+class TestQuantileSketch(unittest.TestCase):
+    def test_get_quantiles__few_values__same_as_statistics_quantiles(self):
+        values = [5, 1, 9, 3, 7, 2]
+        sketch = QuantileSketch()
+
+        sketch.add_all(values)
+
+        self.assertEqual(quantiles(values), sketch.get_quantiles())
+
+    def test_get_quantiles__no_values__returns_empty_list(self):
+        self.assertEqual([], QuantileSketch().get_quantiles())
+
+    def test_add__many_values__keeps_memory_bounded_and_quantiles_close(self):
+        generator = random.Random(0)
+        values = [generator.random() for _ in range(20000)]
+        sketch = QuantileSketch(seed=0)
+
+        sketch.add_all(values)
+
+        self.assertEqual(20000, len(sketch))
+        self.assertLess(sum(len(level) for level in sketch.levels), 1000)
+        for expected, actual in zip(quantiles(values), sketch.get_quantiles()):
+            self.assertAlmostEqual(expected, actual, delta=0.05)
+
+    def test_merge__two_sketches__summarizes_values_of_both(self):
+        sketch_1, sketch_2 = QuantileSketch(seed=0), QuantileSketch(seed=0)
+        sketch_1.add_all(range(0, 5000))
+        sketch_2.add_all(range(5000, 10000))
+
+        sketch_1.merge(sketch_2)
+
+        self.assertEqual(10000, len(sketch_1))
+        for expected, actual in zip(quantiles(range(10000)), sketch_1.get_quantiles()):
+            self.assertAlmostEqual(expected, actual, delta=500)
+
+
+class TestPlaylistSketch(unittest.TestCase):
+    def test_get_audio_feature_representative_range__single_track__allows_full_range(self):
+        sketch = PlaylistSketch()
+        sketch.add_tracks([mock_track_with_features(0.75)])
+
+        min_audio_features, max_audio_features = sketch.get_audio_feature_representative_range()
+
+        self.assertEqual(0, min_audio_features.danceability)
+        self.assertEqual(1, max_audio_features.danceability)
+
+    def test_get_audio_feature_representative_range__merged_sketches__covers_middle_of_both(self):
+        sketch_1, sketch_2 = PlaylistSketch(), PlaylistSketch()
+        sketch_1.add_tracks([mock_track_with_features(i / 100) for i in range(0, 50)])
+        sketch_2.add_tracks([mock_track_with_features(i / 100) for i in range(50, 100)])
+
+        min_audio_features, max_audio_features = sketch_1.merge(
+            sketch_2).get_audio_feature_representative_range()
+
+        self.assertEqual(100, sketch_1.get_num_tracks())
+        self.assertAlmostEqual(0.2425, min_audio_features.danceability)
+        self.assertAlmostEqual(0.7475, max_audio_features.danceability)
+
+    def test_get_popularity_representative_range__no_popularity__allows_full_range(self):
+        sketch = PlaylistSketch()
+        sketch.add_tracks([mock_track(popularity=None, audio_features=None)])
+
+        self.assertEqual(
+            (AudioFeatures.MIN_POPULARITY, AudioFeatures.MAX_POPULARITY),
+            sketch.get_popularity_representative_range(),
+        )
+
+    def test_sketch_playlist__multiple_pages__reports_progress_after_each_page(self):
+        pages = [
+            [mock_track_with_features(0.1), mock_track_with_features(0.2)],
+            [mock_track_with_features(0.3), mock_track_with_features(0.4)],
+        ]
+        mock_spotify = MagicMock()
+        mock_spotify.get_playlist_track_pages.return_value = iter(pages)
+        playlist_analyzer = PlaylistAnalyzer(
+            MagicMock(), MusicUtil(mock_spotify, MagicMock()), MagicMock())
+        num_tracks_seen = []
+
+        sketch = playlist_analyzer.sketch_playlist(
+            mock_playlist(),
+            on_progress=lambda sketch: num_tracks_seen.append(sketch.get_num_tracks()),
+        )
+
+        self.assertEqual([2, 4], num_tracks_seen)
+        self.assertEqual(4, sketch.get_num_tracks())
+        mock_spotify.set_track_audio_features.assert_not_called()
+        mock_spotify.get_tracks.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from packages.music_api_clients.search_cache import SearchCache
+from packages.music_api_clients.spotify import Spotify
+
+
+def mock_spotify_search_results(track_names):
+    return {"tracks": {"items": [
+        {
+            "name": track_name,
+            "artists": [{"name": "Justin Bieber", "id": "artist-id", "uri": "spotify:artist:artist-id"}],
+            "disc_number": 1,
+            "duration_ms": 200000,
+            "popularity": 50,
+            "track_number": 1,
+            "album": {"id": "album-id"},
+            "id": f"{track_name}-id",
+            "uri": f"spotify:track:{track_name}-id",
+        }
+        for track_name in track_names
+    ], "next": None}}
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000
+        self.search_cache = SearchCache(
+            path=None, ttl_seconds=100, negative_ttl_seconds=10, clock=lambda: self.now)
+
+    def test_get_key__ignores_case_and_whitespace(self):
+        self.assertEqual(
+            self.search_cache.get_key("track", "sorry - remastered"),
+            self.search_cache.get_key("track", "  SORRY  - Remastered"),
+        )
+
+    def test_get_key__metadata__kept(self):
+        self.assertNotEqual(
+            self.search_cache.get_key("track", "sorry"),
+            self.search_cache.get_key("track", "Sorry (Live)"),
+        )
+
+    def test_get__expired__returns_none(self):
+        self.search_cache.set("track:sorry", ["result"])
+
+        self.now += 50
+        self.assertEqual(["result"], self.search_cache.get("track:sorry"))
+        self.now += 51
+        self.assertIsNone(self.search_cache.get("track:sorry"))
+
+    def test_get__empty_results__expire_sooner(self):
+        self.search_cache.set("track:no such song", [])
+
+        self.assertEqual([], self.search_cache.get("track:no such song"))
+        self.now += 11
+        self.assertIsNone(self.search_cache.get("track:no such song"))
+
+    def test_save_and_load__keeps_entries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "search_cache.pickle")
+            search_cache = SearchCache(path)
+            search_cache.set("track:sorry", ["result"])
+            search_cache.save()
+
+            loaded = SearchCache.load(path)
+
+        self.assertEqual(["result"], loaded.get("track:sorry"))
+
+    def test_get_matching_tracks__same_name_searched_again__uses_cache(self):
+        spotify = Spotify(search_cache=self.search_cache)
+        spotify.client = MagicMock()
+        spotify.client.search.return_value = mock_spotify_search_results(
+            ["Sorry", "Sorry - Live", "Sorry Not Sorry"])
+
+        spotify.get_matching_tracks("Sorry")
+        tracks = spotify.get_matching_tracks("SORRY")
+
+        self.assertEqual(1, spotify.client.search.call_count)
+        self.assertEqual({"Sorry", "Sorry - Live"}, {track.name for track in tracks})
+
+    def test_get_matching_tracks__name_with_metadata__searched_separately(self):
+        spotify = Spotify(search_cache=self.search_cache)
+        spotify.client = MagicMock()
+        spotify.client.search.return_value = mock_spotify_search_results(["Sorry", "Sorry - Live"])
+
+        spotify.get_matching_tracks("Sorry")
+        spotify.get_matching_tracks("Sorry - Live")
+
+        self.assertEqual(
+            ["track:Sorry", "track:Sorry - Live"],
+            [kwargs["q"] for _, kwargs in spotify.client.search.call_args_list],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+from packages.music_api_clients.models.audio_features import AudioFeatures
+from packages.music_management.song_attribute_range_index import SongAttributeRangeIndex
+from packages.music_management.track_feature_matrix import TrackFeatureMatrix
+from tests.fixtures import mock_song_attribute_ranges, mock_track
+
+
+def mock_track_with_features(spotify_id, danceability, energy, popularity=50):
+    return mock_track(
+        spotify_id=spotify_id,
+        popularity=popularity,
+        audio_features=AudioFeatures(
+            danceability, energy, 0, -10, 1, 0.1, 0.1, 0.1, 0.1, 0.5, 120, 200000, 4),
+    )
+
+
+class TestSongAttributeRangeIndex(unittest.TestCase):
+    def setUp(self):
+        self.feature_matrix = TrackFeatureMatrix()
+        self.range_index = SongAttributeRangeIndex(self.feature_matrix, num_buckets=4)
+
+    def test_query__no_tracks__returns_empty(self):
+        tracks = self.range_index.query(mock_song_attribute_ranges())
+
+        self.assertEqual([], tracks)
+
+    def test_get_rows_in_ranges__matches_exact_scan(self):
+        for i in range(10):
+            for j in range(10):
+                self.feature_matrix.add_track(
+                    mock_track_with_features(f"{i}-{j}", i / 10, j / 10))
+        song_attribute_ranges = mock_song_attribute_ranges(
+            danceability_range=[0.2, 0.5], energy_range=[0.35, 0.9], loudness_range=[-60, 0])
+        bounds = self.feature_matrix.get_bounds(song_attribute_ranges)
+
+        rows = self.range_index.get_rows_in_ranges(song_attribute_ranges)
+
+        self.assertEqual(
+            [row for row in range(len(self.feature_matrix)) if self.feature_matrix.is_in_bounds(row, bounds)],
+            rows,
+        )
+        self.assertEqual(4 * 6, len(rows))
+
+    def test_query__orders_by_distance_to_range_centre(self):
+        edge = mock_track_with_features("edge", 0.1, 0.5)
+        centre = mock_track_with_features("centre", 0.5, 0.5)
+        self.feature_matrix.add_tracks([edge, centre])
+
+        tracks = self.range_index.query(mock_song_attribute_ranges(
+            danceability_range=[0, 1], energy_range=[0, 1], loudness_range=[-20, 0],
+            speechiness_range=[0, 0.2], acousticness_range=[0, 0.2], instrumentalness_range=[0, 0.2],
+            liveness_range=[0, 0.2], tempo_range=[100, 140], duration_ms_range=[180000, 220000],
+            popularity_range=[40, 60]))
+
+        self.assertEqual([centre, edge], tracks)
+
+    def test_query__unknown_popularity__still_matches(self):
+        track = mock_track_with_features("no-popularity", 0.5, 0.5, popularity=None)
+        self.feature_matrix.add_track(track)
+
+        tracks = self.range_index.query(mock_song_attribute_ranges(
+            loudness_range=[-60, 0], popularity_range=[90, 100]))
+
+        self.assertEqual([track], tracks)
+
+    def test_query__tracks_added_after_query__are_indexed(self):
+        self.range_index.query(mock_song_attribute_ranges())
+        track = mock_track_with_features("added-later", 0.5, 0.5)
+        self.feature_matrix.add_track(track)
+
+        tracks = self.range_index.query(mock_song_attribute_ranges(loudness_range=[-60, 0]))
+
+        self.assertEqual([track], tracks)
+
+    def test_query__track_updated_after_query__found_at_its_new_values(self):
+        for i in range(100):
+            self.feature_matrix.add_track(mock_track_with_features(f"t{i}", i / 100, 0.5))
+        song_attribute_ranges = mock_song_attribute_ranges(danceability_range=[0.9, 1.0], loudness_range=[-60, 0])
+        self.range_index.get_rows_in_ranges(song_attribute_ranges)
+        self.feature_matrix.add_track(mock_track_with_features("t0", 0.95, 0.5))
+
+        rows = self.range_index.get_rows_in_ranges(song_attribute_ranges)
+
+        self.assertEqual([0] + list(range(90, 100)), rows)
+
+
+    def test_get_rows_in_ranges__same_tracks_added_again__not_rebuilt(self):
+        tracks = [mock_track_with_features(f"t{i}", i / 10, 0.5, popularity=None) for i in range(10)]
+        self.feature_matrix.add_tracks(tracks)
+        song_attribute_ranges = mock_song_attribute_ranges(loudness_range=[-60, 0])
+        self.range_index.get_rows_in_ranges(song_attribute_ranges)
+        columns = self.range_index._columns
+
+        self.feature_matrix.add_tracks(tracks)
+        rows = self.range_index.get_rows_in_ranges(song_attribute_ranges)
+
+        self.assertIs(columns, self.range_index._columns)
+        self.assertEqual(list(range(10)), rows)
+
+if __name__ == '__main__':
+    unittest.main()
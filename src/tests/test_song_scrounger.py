@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 
 from collections import defaultdict
@@ -282,6 +284,104 @@ class TestSongScrounger(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(results["Sweetener"]), 1)
         self.assertEqual(results["Sweetener"], [albums[0]])
 
+    async def test_find_media_items__same_name_in_diff_paragraphs__looks_up_once(self):
+        text = "\"Sorry\" by Justin Bieber.\nAs I said, \"Sorry\"."
+        song = mock_track(name="Sorry", artists=[mock_artist("Justin Bieber")], popularity=1)
+        name_lookup = MagicMock(return_value=set([song]))
+
+        results = self.song_scrounger.find_media_items(text, name_lookup)
+
+        name_lookup.assert_called_once_with("Sorry")
+        self.assertEqual(results["Sorry"], [song])
+
+    async def test_find_media_items_in_paragraphs__artist_in_neighbouring_paragraph__disambiguates(self):
+        paragraphs = [
+            "The artist in the next paragraph has a song called \"Socially Awkward\".",
+            "Now I'm mentioning the artist Kiefer.",
+            "A paragraph too far away mentions Someone Else.",
+        ]
+        song_by_neighbouring_artist = mock_track(
+            name="Socially Awkward", artists=[mock_artist("Kiefer")], popularity=1)
+        song_by_far_away_artist = mock_track(
+            name="Socially Awkward", artists=[mock_artist("Someone Else")], popularity=1)
+        name_lookup = MagicMock(return_value=set([song_by_neighbouring_artist, song_by_far_away_artist]))
+
+        results = self.song_scrounger.find_media_items_in_paragraphs(
+            iter(paragraphs), name_lookup, context_size=1)
+
+        self.assertEqual(results["Socially Awkward"], [song_by_neighbouring_artist])
+
+    async def test_generate_media_items_in_paragraphs__yields_in_text_order_batch_by_batch(self):
+        paragraphs_read = []
+        def read_paragraphs():
+            for index in range(3):
+                paragraphs_read.append(index)
+                yield f"\"Song {index}\" and \"Song {index}b\""
+        name_lookup = MagicMock(side_effect=lambda name: set([mock_track(name=name, spotify_id=name)]))
+
+        with patch("packages.song_scrounger.song_scrounger.PARAGRAPHS_PER_LOOKUP_BATCH", 1):
+            generated = self.song_scrounger.generate_media_items_in_paragraphs(read_paragraphs(), name_lookup, context_size=0)
+            first_name, first_songs = next(generated)
+            self.assertEqual([0], paragraphs_read)
+            names = [first_name] + [name for name, _ in generated]
+
+        self.assertEqual(["Song 0", "Song 0b", "Song 1", "Song 1b", "Song 2", "Song 2b"], names)
+        self.assertEqual(["Song 0"], [song.name for song in first_songs])
+
+    async def test_generate_songs_in_text_file__artist_mentioned_far_away__same_songs_as_find_songs(self):
+        self._write_far_away_artist_text_file()
+
+        generated = dict(self.song_scrounger.generate_songs_in_text_file(self.file_path))
+
+        self.assertEqual([self.song_by_far_away_artist], generated["Socially Awkward"])
+        self.assertEqual(
+            self.song_scrounger.find_songs_in_text_file(self.file_path)["Socially Awkward"],
+            generated["Socially Awkward"])
+
+    async def test_generate_songs_in_text_file__too_large_to_read__disambiguates_in_context_only(self):
+        self._write_far_away_artist_text_file()
+
+        with patch("packages.song_scrounger.song_scrounger.MAX_CHARS", 0):
+            generated = dict(self.song_scrounger.generate_songs_in_text_file(self.file_path))
+
+        self.assertEqual(2, len(generated["Socially Awkward"]))
+
+    def _write_far_away_artist_text_file(self):
+        self.song_by_far_away_artist = mock_track(
+            name="Socially Awkward", spotify_id="kiefer", artists=[mock_artist("Kiefer")], popularity=1)
+        song_by_other_artist = mock_track(
+            name="Socially Awkward", spotify_id="someone-else", artists=[mock_artist("Someone Else")], popularity=1)
+        self.mock_spotify_client.get_matching_tracks.return_value = set(
+            [self.song_by_far_away_artist, song_by_other_artist])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.file_path = os.path.join(directory.name, "text.txt")
+        with open(self.file_path, "w") as f:
+            f.write("\n".join(
+                ["There's a song called \"Socially Awkward\"."]
+                + ["Nothing to see here."] * 30
+                + ["Now I'm mentioning the artist Kiefer."]))
+
+    async def test_look_up_names__looked_up_before__reuses_results(self):
+        name_lookup = MagicMock(side_effect=lambda name: set([name]))
+
+        self.song_scrounger.look_up_names(["Sorry", "Hello"], name_lookup)
+        results = self.song_scrounger.look_up_names(["Hello", "Yesterday"], name_lookup)
+
+        self.assertEqual({"Hello": set(["Hello"]), "Yesterday": set(["Yesterday"])}, results)
+        self.assertEqual(3, get_num_times_called(name_lookup))
+
+    async def test_look_up_names__cache_full__evicts_least_recently_used(self):
+        name_lookup = MagicMock(side_effect=lambda name: set([name]))
+
+        with patch("packages.song_scrounger.song_scrounger.LOOKUP_CACHE_SIZE", 2):
+            self.song_scrounger.look_up_names(["Sorry", "Hello"], name_lookup)
+            self.song_scrounger.look_up_names(["Sorry"], name_lookup)
+            self.song_scrounger.look_up_names(["Yesterday"], name_lookup)
+            self.song_scrounger.look_up_names(["Sorry", "Hello"], name_lookup)
+
+        self.assertEqual(4, get_num_times_called(name_lookup))
+
     async def test_filter_if_any_artists_mentioned_greedy__no_matching_artist_in_cur_paragraph_and_multiple_matching_songs__finds_artist_elsewhere_in_doc(self):
         song_w_matching_artist = mock_track(
             name="American Pie",
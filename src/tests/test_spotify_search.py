@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import MagicMock
+
+from packages.music_api_clients.search_cache import SearchCache
+from packages.music_api_clients.spotify import SPOTIFY_SEARCH_API_LIMIT, Spotify
+from packages.song_scrounger.song_scrounger import SongScrounger
+from tests.test_search_cache import mock_spotify_search_results
+
+
+def mock_spotify_search_page(track_names, offset, total):
+    results = mock_spotify_search_results(track_names)
+    for index, track in enumerate(results["tracks"]["items"]):
+        track["id"] = f"track-{offset + index}"
+        track["uri"] = f"spotify:track:track-{offset + index}"
+    results["tracks"]["next"] = "next page" if offset + len(track_names) < total else None
+    return results
+
+
+class TestSpotifySearch(unittest.TestCase):
+    def get_spotify_with_pages(self, num_pages, search_cache=None):
+        "Every page has one track named 'Home', the rest are named differently."
+        spotify = Spotify(search_cache=search_cache)
+        spotify.client = MagicMock()
+        total = num_pages * SPOTIFY_SEARCH_API_LIMIT
+        def search(q, type, offset, limit):
+            track_names = ["Home"] + [
+                f"Homeward {offset + index}" for index in range(1, limit)]
+            return mock_spotify_search_page(track_names, offset, total)
+        spotify.client.search.side_effect = search
+        return spotify
+
+    def test_get_matching_tracks__many_pages__searches_at_most_max_pages(self):
+        spotify = self.get_spotify_with_pages(10)
+
+        tracks = spotify.get_matching_tracks("Home", max_pages=2)
+
+        self.assertEqual(2, spotify.client.search.call_count)
+        self.assertEqual(2, len(tracks))
+        spotify.client.search.assert_any_call(
+            q="track:Home", type="track", offset=SPOTIFY_SEARCH_API_LIMIT, limit=SPOTIFY_SEARCH_API_LIMIT)
+
+    def test_get_matching_tracks__last_page__stops_searching(self):
+        spotify = self.get_spotify_with_pages(1)
+
+        spotify.get_matching_tracks("Home", max_pages=5)
+
+        self.assertEqual(1, spotify.client.search.call_count)
+
+    def test_get_matching_tracks__stop_when_true__stops_early_and_skips_cache(self):
+        search_cache = SearchCache(path=None)
+        spotify = self.get_spotify_with_pages(10, search_cache)
+
+        tracks = spotify.get_matching_tracks(
+            "Home", max_pages=5, stop_when=lambda tracks: len(tracks) > 0)
+
+        self.assertEqual(1, len(tracks))
+        # the second page may have been prefetched already
+        self.assertLessEqual(spotify.client.search.call_count, 2)
+        self.assertEqual(0, len(search_cache))
+
+    def test_get_matching_tracks__stop_when_true_on_last_page__cached(self):
+        spotify = self.get_spotify_with_pages(1, SearchCache(path=None))
+        stop_when = lambda tracks: len(tracks) > 0
+
+        spotify.get_matching_tracks("Home", max_pages=5, stop_when=stop_when)
+        tracks = spotify.get_matching_tracks("Home", max_pages=5, stop_when=stop_when)
+
+        self.assertEqual(1, len(tracks))
+        self.assertEqual(1, spotify.client.search.call_count)
+
+    def test_get_matching_tracks__max_results_found__stops_early(self):
+        spotify = self.get_spotify_with_pages(10)
+
+        tracks = spotify.get_matching_tracks("Home", max_pages=5, max_results=2)
+
+        self.assertEqual(2, len(tracks))
+        self.assertLessEqual(spotify.client.search.call_count, 3)
+
+    def test_find_songs__stop_searching_once_artist_mentioned__passes_stop_when(self):
+        spotify = self.get_spotify_with_pages(10)
+        song_scrounger = SongScrounger(spotify, stop_searching_once_artist_mentioned=True)
+
+        songs = song_scrounger.find_songs("\"Home\" by Justin Bieber")
+
+        self.assertEqual(1, len(songs["Home"]))
+        self.assertLessEqual(spotify.client.search.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import MagicMock
+
+from packages.song_scrounger.song_scrounger import SongScrounger
+from packages.song_scrounger.text_token_index import TextTokenIndex
+from tests.fixtures import mock_artist, mock_track
+
+
+class TestTextTokenIndex(unittest.TestCase):
+    def setUp(self):
+        self.song_scrounger = SongScrounger(MagicMock())
+
+    def get_index(self, text):
+        return TextTokenIndex(text, self.song_scrounger.find_occurrences)
+
+    def test_contains__multi_word_name__requires_adjacent_tokens(self):
+        index = self.get_index("The Rolling Stones challenged the Beatles")
+
+        self.assertTrue(index.contains("the rolling stones"))
+        self.assertFalse(index.contains("rolling the"))
+
+    def test_contains__token_found_as_substr__not_counted(self):
+        index = self.get_index("The Rolling Stones challenged the Beatles")
+
+        self.assertFalse(index.contains("stone"))
+        self.assertFalse(index.contains("allen"))
+
+    def test_contains__separator_must_match_exactly(self):
+        index = self.get_index("Simon & Garfunkel, Hall and Oates")
+
+        self.assertTrue(index.contains("simon & garfunkel"))
+        self.assertFalse(index.contains("simon garfunkel"))
+        self.assertFalse(index.contains("hall & oates"))
+
+    def test_contains__leading_separator_touching_another_token__not_counted(self):
+        index = self.get_index("d&b and more")
+
+        self.assertFalse(index.contains("&b"))
+        self.assertTrue(index.contains("d&b"))
+
+    def test_contains__word_without_letters__searches_text(self):
+        index = self.get_index("Simon & Garfunkel")
+
+        self.assertTrue(index.contains("&"))
+
+    def test_find_media_items__artist_elsewhere_in_doc__found_without_searching_whole_text(self):
+        text = "\"American Pie\" by someone...\nOh yeah, by Don McLean"
+        song_w_mentioned_artist = mock_track(
+            name="American Pie", artists=[mock_artist("Don McLean")], popularity=1)
+        song_w_unmentioned_artist = mock_track(
+            name="American Pie", artists=[mock_artist("Some other dude")], popularity=1)
+        name_lookup = MagicMock(return_value={song_w_mentioned_artist, song_w_unmentioned_artist})
+        find_occurrences = self.song_scrounger.find_occurrences
+        self.song_scrounger.find_occurrences = MagicMock(side_effect=find_occurrences)
+
+        results = self.song_scrounger.find_media_items(text, name_lookup)
+
+        self.assertEqual({"American Pie": [song_w_mentioned_artist]}, dict(results))
+        for args, _ in self.song_scrounger.find_occurrences.call_args_list:
+            self.assertNotEqual(text.lower(), args[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from packages.song_scrounger.tokenizer import find_occurrences, find_quoted_tokens, get_occurrence_pattern, to_name
+
+
+class TestTokenizer(unittest.TestCase):
+    def test_find_quoted_tokens__straight_and_smart_quotes__in_order(self):
+        text = "“Sorry” by Justin Bieber, then \"Hello\" by Adele, then “Sorry” again"
+
+        tokens = find_quoted_tokens(text)
+
+        self.assertEqual(["Sorry", "Hello", "Sorry"], tokens)
+
+    def test_find_quoted_tokens__mismatched_quote_kinds__not_paired(self):
+        tokens = find_quoted_tokens("“Sorry\" and \"Hello")
+
+        self.assertEqual([" and "], tokens)
+
+    def test_find_quoted_tokens__unbalanced_or_blank__skipped(self):
+        tokens = find_quoted_tokens("\"  \" and “” and \"Hello\" and \"trailing")
+
+        self.assertEqual(["Hello"], tokens)
+
+    def test_find_occurrences__regex_special_chars__matched_literally(self):
+        self.assertTrue(find_occurrences("ac/dc (live)", "i love ac/dc (live)!"))
+        self.assertTrue(find_occurrences("?", "why ? not"))
+        self.assertFalse(find_occurrences("x.y", "xzy"))
+        self.assertFalse(find_occurrences("(", "no parens"))
+
+    def test_find_occurrences__substring_of_another_word__not_found(self):
+        self.assertFalse(find_occurrences("stone", "allen stones"))
+        self.assertTrue(find_occurrences("stone", "allen stone."))
+
+    def test_get_occurrence_pattern__compiled_once_per_word(self):
+        self.assertIs(get_occurrence_pattern("hello"), get_occurrence_pattern("hello"))
+
+    def test_to_name__strips_whitespace_and_trailing_punctuation(self):
+        self.assertEqual("Sorry", to_name("  Sorry,. "))
+
+
+if __name__ == '__main__':
+    unittest.main()
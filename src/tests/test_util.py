@@ -1,4 +1,5 @@
 import os
+import tempfile
 import unittest
 
 from tests import helper
@@ -15,4 +16,44 @@ class TestUtil(unittest.TestCase):
             "When Don McLean recorded \"American Pie\"\n",
             contents,
             "Uexpected file contents!"
-        )
\ No newline at end of file
+        )
+
+    def test_read_paragraphs__skips_empty_paragraphs(self):
+        input_file = helper.get_path_to_test_input_file("test_cross_paragraph_artist_detection.txt")
+
+        paragraphs = list(util.read_paragraphs(input_file))
+
+        self.assertEqual(2, len(paragraphs))
+        self.assertEqual(
+            "Now I'm in some other paragraph over here, mentioning the artist Kiefer.",
+            paragraphs[1],
+        )
+
+    def test_read_paragraphs__windows_line_endings_and_empty_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "input.txt")
+            with open(path, "wb") as f:
+                f.write("Señorita\r\n  \r\nSkullqueen".encode("utf-8"))
+            empty_path = os.path.join(directory, "empty.txt")
+            open(empty_path, "w").close()
+
+            paragraphs = list(util.read_paragraphs(path))
+            no_paragraphs = list(util.read_paragraphs(empty_path))
+
+        self.assertEqual(["Señorita", "Skullqueen"], paragraphs)
+        self.assertEqual([], no_paragraphs)
+
+    def test_get_paragraphs_in_context__includes_neighbouring_paragraphs_only(self):
+        paragraphs = ["one", "two", "three", "four"]
+
+        paragraphs_in_context = list(util.get_paragraphs_in_context(iter(paragraphs), 1))
+
+        self.assertEqual(
+            [
+                ("one", "one\ntwo"),
+                ("two", "one\ntwo\nthree"),
+                ("three", "two\nthree\nfour"),
+                ("four", "three\nfour"),
+            ],
+            paragraphs_in_context,
+        )
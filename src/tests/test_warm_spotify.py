@@ -0,0 +1,54 @@
+import unittest
+
+from packages.music_api_clients.spotify import Spotify
+from packages.music_api_clients.warm_spotify import WarmSpotify
+from tests.fake_spotify_server import FAKE_ACCESS_TOKEN, FakeSpotifyLibrary, FakeSpotifyServer
+from tests.fixtures import mock_artist
+
+
+class TestWarmSpotify(unittest.TestCase):
+    def setUp(self):
+        self.library = FakeSpotifyLibrary(num_albums=30, tracks_per_album=2)
+        self.library.create_playlist("seed: Jazz", "")
+        self.library.create_playlist("Sunday", "")
+        self.server = FakeSpotifyServer(self.library).start()
+        self.now = [0]
+        self.warm_spotify = WarmSpotify(
+            Spotify(base_url=self.server.base_url, access_token=FAKE_ACCESS_TOKEN),
+            ttl_seconds=60,
+            clock=lambda: self.now[0],
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_get_artist_genres__cached_until_expired(self):
+        artist = mock_artist(spotify_id="artist0")
+
+        self.warm_spotify.get_artist_genres(artist)
+        self.warm_spotify.get_artist_genres(artist)
+        self.now[0] += 61
+        self.warm_spotify.get_artist_genres(artist)
+
+        self.assertEqual(2, self.server.get_num_requests("GET", "artists/artist0"))
+
+    def test_playlist_index__kept_up_to_date_with_created_and_deleted_playlists(self):
+        self.assertEqual(["seed: Jazz"], [p.name for p in self.warm_spotify.find_current_user_matching_playlists("seed: ")])
+        num_index_requests = self.server.get_num_requests("GET", "me/playlists")
+
+        playlist = self.warm_spotify.create_playlist("seed: Rock", "")
+        matching = self.warm_spotify.find_current_user_matching_playlists("seed: ")
+        self.warm_spotify.delete_playlist(self.warm_spotify.find_current_user_playlist("Sunday"))
+
+        self.assertEqual(["seed: Jazz", "seed: Rock"], sorted(p.name for p in matching))
+        self.assertEqual(playlist.spotify_id, self.warm_spotify.find_current_user_playlist("seed: Rock"))
+        self.assertIsNone(self.warm_spotify.find_current_user_playlist("Sunday"))
+        self.assertEqual(num_index_requests, self.server.get_num_requests("GET", "me/playlists"))
+
+    def test_playlist_tracks__always_fetched_afresh(self):
+        playlist = self.warm_spotify.get_current_user_playlist_by_name("Sunday")
+        self.warm_spotify.add_tracks(playlist, self.warm_spotify.get_my_albums(1)[0].tracks)
+
+        self.assertEqual(0, len(playlist.tracks))
+        self.assertEqual(2, len(self.warm_spotify.get_current_user_playlist_by_name("Sunday").tracks))
+        self.assertEqual(2, len(self.warm_spotify.find_current_user_matching_playlists("Sunday")[0].get_tracks()))